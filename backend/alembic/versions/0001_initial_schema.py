@@ -0,0 +1,75 @@
+"""Initial schema
+
+Matches the tables created by Base.metadata.create_all before migrations
+were introduced. Databases created that way should be stamped with this
+revision (``alembic stamp 0001``) before running ``alembic upgrade head``.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "tasks",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("due_date", sa.DateTime(), nullable=True),
+        sa.Column("priority", sa.Integer(), nullable=True),
+        sa.Column("category", sa.String(100), nullable=True),
+        sa.Column("tags", sa.JSON(), nullable=True),
+        sa.Column("completed", sa.Boolean(), nullable=True),
+        sa.Column("ai_priority_score", sa.Float(), nullable=True),
+        sa.Column("embedding", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "notes",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("title", sa.String(255), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("summary", sa.Text(), nullable=True),
+        sa.Column("category", sa.String(100), nullable=True),
+        sa.Column("tags", sa.JSON(), nullable=True),
+        sa.Column("embedding", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "users",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("username", sa.String(100), nullable=False, unique=True),
+        sa.Column("email", sa.String(255), nullable=False, unique=True),
+        sa.Column("hashed_password", sa.String(255), nullable=False),
+        sa.Column("preferences", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_table(
+        "device_sync_logs",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("device_id", sa.String(), nullable=False),
+        sa.Column("entity_type", sa.String(50), nullable=False),
+        sa.Column("entity_id", sa.String(), nullable=False),
+        sa.Column("action", sa.String(50), nullable=False),
+        sa.Column("synced_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("device_sync_logs")
+    op.drop_table("users")
+    op.drop_table("notes")
+    op.drop_table("tasks")
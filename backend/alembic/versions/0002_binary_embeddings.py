@@ -0,0 +1,81 @@
+"""Store embeddings as packed float32 instead of JSON
+
+Converts tasks.embedding and notes.embedding from JSON float lists to the
+Vector column type (float32 bytes, or pgvector when PGVECTOR_ENABLED).
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.models.types import Vector
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+TABLES = ("tasks", "notes")
+BATCH_SIZE = 1000
+
+
+def _copy_column(table_name: str, source_type, target_type, convert):
+    """Copy embedding -> embedding_new in batches, converting each value"""
+    bind = op.get_bind()
+    table = sa.table(
+        table_name,
+        sa.column("id", sa.String),
+        sa.column("embedding", source_type),
+        sa.column("embedding_new", target_type),
+    )
+    query = (
+        sa.select(table.c.id, table.c.embedding)
+        .where(table.c.embedding.isnot(None))
+        .order_by(table.c.id)
+        .limit(BATCH_SIZE)
+    )
+    # Page by id so only one batch of embeddings is in memory at a time
+    rows = bind.execute(query).fetchall()
+    while rows:
+        bind.execute(
+            table.update()
+            .where(table.c.id == sa.bindparam("row_id"))
+            .values(embedding_new=sa.bindparam("value")),
+            [{"row_id": row.id, "value": convert(row.embedding)} for row in rows],
+        )
+        rows = bind.execute(query.where(table.c.id > rows[-1].id)).fetchall()
+
+
+def _swap_column(table_name: str):
+    """Replace embedding with the converted embedding_new column"""
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.drop_column("embedding")
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.alter_column("embedding_new", new_column_name="embedding")
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql" and settings.PGVECTOR_ENABLED:
+        op.execute("CREATE EXTENSION IF NOT EXISTS vector")
+
+    for table_name in TABLES:
+        op.add_column(table_name, sa.Column("embedding_new", Vector(), nullable=True))
+        _copy_column(
+            table_name,
+            sa.JSON,
+            Vector(),
+            lambda value: np.asarray(value, dtype=np.float32) if value else None,
+        )
+        _swap_column(table_name)
+
+
+def downgrade():
+    for table_name in TABLES:
+        op.add_column(table_name, sa.Column("embedding_new", sa.JSON(), nullable=True))
+        _copy_column(table_name, Vector(), sa.JSON, lambda value: value.tolist())
+        _swap_column(table_name)
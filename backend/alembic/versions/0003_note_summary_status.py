@@ -0,0 +1,28 @@
+"""Track background summarization status on notes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("notes", sa.Column("summary_status", sa.String(20), nullable=True))
+    # Existing notes were summarized inline; a missing summary means it failed
+    op.execute(
+        "UPDATE notes SET summary_status = "
+        "CASE WHEN summary IS NULL THEN 'failed' ELSE 'ready' END"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table("notes") as batch_op:
+        batch_op.drop_column("summary_status")
@@ -0,0 +1,25 @@
+"""Composite indexes for keyset pagination
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index("ix_tasks_created_at_id", "tasks", ["created_at", "id"])
+    op.create_index("ix_tasks_due_date_id", "tasks", ["due_date", "id"])
+    op.create_index("ix_notes_created_at_id", "notes", ["created_at", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_notes_created_at_id", table_name="notes")
+    op.drop_index("ix_tasks_due_date_id", table_name="tasks")
+    op.drop_index("ix_tasks_created_at_id", table_name="tasks")
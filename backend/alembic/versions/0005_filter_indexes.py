@@ -0,0 +1,49 @@
+"""Secondary indexes for task/note filters and sync lookups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_tasks_completed_created_at_id", "tasks", ["completed", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_tasks_category_created_at_id", "tasks", ["category", "created_at", "id"]
+    )
+    open_tasks = sa.column("completed") == sa.false()
+    op.create_index(
+        "ix_tasks_open_due_date",
+        "tasks",
+        ["completed", "due_date", "id"],
+        sqlite_where=open_tasks,
+        postgresql_where=open_tasks,
+    )
+    op.create_index(
+        "ix_notes_category_created_at_id", "notes", ["category", "created_at", "id"]
+    )
+    op.create_index(
+        "ix_device_sync_logs_user_device", "device_sync_logs", ["user_id", "device_id"]
+    )
+    op.create_index(
+        "ix_device_sync_logs_entity", "device_sync_logs", ["entity_type", "entity_id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_device_sync_logs_entity", table_name="device_sync_logs")
+    op.drop_index("ix_device_sync_logs_user_device", table_name="device_sync_logs")
+    op.drop_index("ix_notes_category_created_at_id", table_name="notes")
+    op.drop_index("ix_tasks_open_due_date", table_name="tasks")
+    op.drop_index("ix_tasks_category_created_at_id", table_name="tasks")
+    op.drop_index("ix_tasks_completed_created_at_id", table_name="tasks")
@@ -0,0 +1,59 @@
+"""Turn device_sync_logs into a sequenced change log
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def _create_table(sequenced):
+    if sequenced:
+        id_column = sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True)
+    else:
+        id_column = sa.Column("id", sa.String(), primary_key=True)
+    op.create_table(
+        "device_sync_logs",
+        id_column,
+        sa.Column("user_id", sa.String(), nullable=sequenced),
+        sa.Column("device_id", sa.String(), nullable=sequenced),
+        sa.Column("entity_type", sa.String(50), nullable=False),
+        sa.Column("entity_id", sa.String(), nullable=False),
+        sa.Column("action", sa.String(50), nullable=False),
+        sa.Column("synced_at", sa.DateTime(), server_default=sa.func.now()),
+        sqlite_autoincrement=sequenced,
+    )
+    op.create_index(
+        "ix_device_sync_logs_user_device", "device_sync_logs", ["user_id", "device_id"]
+    )
+    op.create_index(
+        "ix_device_sync_logs_entity", "device_sync_logs", ["entity_type", "entity_id"]
+    )
+
+
+def upgrade():
+    # Nothing wrote the old table, so it is replaced rather than converted
+    op.drop_table("device_sync_logs")
+    _create_table(sequenced=True)
+
+    # Seed the log so a device syncing from cursor 0 receives every entity
+    op.execute(
+        "INSERT INTO device_sync_logs (entity_type, entity_id, action) "
+        "SELECT 'task', id, 'create' FROM tasks ORDER BY created_at, id"
+    )
+    op.execute(
+        "INSERT INTO device_sync_logs (entity_type, entity_id, action) "
+        "SELECT 'note', id, 'create' FROM notes ORDER BY created_at, id"
+    )
+
+
+def downgrade():
+    op.drop_table("device_sync_logs")
+    _create_table(sequenced=False)
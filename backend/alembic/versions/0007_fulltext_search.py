@@ -0,0 +1,34 @@
+"""Add full-text indexes over task and note text
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+from app.models.fulltext import (
+    FULLTEXT_COLUMNS,
+    create_statements,
+    drop_statements,
+    rebuild_statements,
+)
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table in FULLTEXT_COLUMNS:
+        for statement in create_statements(table, dialect) + rebuild_statements(table, dialect):
+            op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for table in FULLTEXT_COLUMNS:
+        for statement in drop_statements(table, dialect):
+            op.execute(statement)
@@ -0,0 +1,33 @@
+"""Add content_chunks for chunked note/task text embeddings
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.models.types import Vector
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing text is chunked by revision 0011 and embedded by the API
+    op.create_table(
+        "content_chunks",
+        sa.Column("entity_type", sa.String(50), primary_key=True),
+        sa.Column("entity_id", sa.String(), primary_key=True),
+        sa.Column("content_hash", sa.String(40), primary_key=True),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("content", sa.Text(), nullable=False),
+        sa.Column("embedding", Vector(), nullable=True),
+    )
+
+
+def downgrade():
+    op.drop_table("content_chunks")
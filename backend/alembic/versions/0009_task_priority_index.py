@@ -0,0 +1,28 @@
+"""Index tasks by stored urgency score for order=ai_priority
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Scores of open tasks are filled in by the API's startup rescoring; any
+    # score left on a completed task by earlier versions is cleared here
+    tasks = sa.table(
+        "tasks", sa.column("completed", sa.Boolean), sa.column("ai_priority_score", sa.Float)
+    )
+    op.execute(tasks.update().where(tasks.c.completed == sa.true()).values(ai_priority_score=None))
+    op.create_index("ix_tasks_ai_priority_id", "tasks", ["ai_priority_score", "id"])
+
+
+def downgrade():
+    op.drop_index("ix_tasks_ai_priority_id", table_name="tasks")
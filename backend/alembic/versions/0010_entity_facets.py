@@ -0,0 +1,83 @@
+"""Add entity_facets tag index and facet_counts
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+
+from collections import Counter
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+# Frozen copy of facet_service.entity_facets as of this revision, so later
+# changes to the service don't change what this migration writes
+def _normalize_tag(tag):
+    if not isinstance(tag, str):
+        return None
+    return " ".join(tag.split()).casefold()[:100] or None
+
+
+def _entity_facets(category, tags):
+    facets = {("tag", tag) for tag in map(_normalize_tag, tags or []) if tag}
+    if category:
+        facets.add(("category", category))
+    return facets
+
+
+def upgrade():
+    facets = op.create_table(
+        "entity_facets",
+        sa.Column("entity_type", sa.String(50), primary_key=True),
+        sa.Column("facet", sa.String(20), primary_key=True),
+        sa.Column("value", sa.String(100), primary_key=True),
+        sa.Column("entity_id", sa.String(), primary_key=True),
+    )
+    op.create_index("ix_entity_facets_entity", "entity_facets", ["entity_type", "entity_id"])
+    counts = op.create_table(
+        "facet_counts",
+        sa.Column("entity_type", sa.String(50), primary_key=True),
+        sa.Column("facet", sa.String(20), primary_key=True),
+        sa.Column("value", sa.String(100), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+    )
+
+    # Index the tags and categories of existing tasks and notes
+    bind = op.get_bind()
+    for entity_type, table_name in (("task", "tasks"), ("note", "notes")):
+        table = sa.table(
+            table_name,
+            sa.column("id", sa.String),
+            sa.column("category", sa.String),
+            sa.column("tags", sa.JSON),
+        )
+        rows = []
+        for entity_id, category, tags in bind.execute(
+            sa.select(table.c.id, table.c.category, table.c.tags)
+        ):
+            rows.extend(
+                {"entity_type": entity_type, "facet": f, "value": v, "entity_id": entity_id}
+                for f, v in _entity_facets(category, tags)
+            )
+        if rows:
+            op.bulk_insert(facets, rows)
+            totals = Counter((row["facet"], row["value"]) for row in rows)
+            op.bulk_insert(
+                counts,
+                [
+                    {"entity_type": entity_type, "facet": f, "value": v, "count": n}
+                    for (f, v), n in totals.items()
+                ],
+            )
+
+
+def downgrade():
+    op.drop_table("facet_counts")
+    op.drop_index("ix_entity_facets_entity", table_name="entity_facets")
+    op.drop_table("entity_facets")
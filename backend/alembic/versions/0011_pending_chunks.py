@@ -0,0 +1,102 @@
+"""Chunk existing text once and index chunks waiting for embeddings
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+
+import hashlib
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+# Frozen copies of chunk_service.split_chunks and chunk_hash as of this
+# revision, so later changes to the service don't change what this writes.
+# Window sizes come from the settings the API will re-chunk edits with.
+def _split_chunks(text):
+    size, overlap = settings.CHUNK_SIZE_WORDS, settings.CHUNK_OVERLAP_WORDS
+    step = max(size - overlap, 1)
+    chunks = []
+    for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+        words = paragraph.split()
+        for start in range(0, len(words), step):
+            chunks.append(" ".join(words[start : start + size]))
+            if start + size >= len(words):
+                break
+    return chunks
+
+
+def _chunk_hash(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def upgrade():
+    pending = sa.column("embedding").is_(None)
+    op.create_index(
+        "ix_content_chunks_pending",
+        "content_chunks",
+        ["entity_type", "entity_id", "content_hash"],
+        sqlite_where=pending,
+        postgresql_where=pending,
+    )
+
+    # Text written before chunking existed is chunked here, once, instead of
+    # being looked for on every API start; the API embeds the pending chunks
+    chunks = sa.table(
+        "content_chunks",
+        sa.column("entity_type", sa.String),
+        sa.column("entity_id", sa.String),
+        sa.column("content_hash", sa.String),
+        sa.column("position", sa.Integer),
+        sa.column("content", sa.Text),
+    )
+    bind = op.get_bind()
+    for entity_type, table_name, text_column in (
+        ("task", "tasks", "description"),
+        ("note", "notes", "content"),
+    ):
+        table = sa.table(table_name, sa.column("id", sa.String), sa.column(text_column, sa.Text))
+        has_chunks = (
+            sa.select(chunks.c.entity_id)
+            .where(chunks.c.entity_type == entity_type, chunks.c.entity_id == table.c.id)
+            .exists()
+        )
+        rows = bind.execute(
+            sa.select(table.c.id, table.c[text_column]).where(
+                table.c[text_column].isnot(None), ~has_chunks
+            )
+        ).all()
+        values = []
+        for entity_id, text in rows:
+            seen = set()
+            for position, content in enumerate(_split_chunks(text)):
+                content_hash = _chunk_hash(content)
+                if content_hash not in seen:
+                    seen.add(content_hash)
+                    values.append(
+                        {
+                            "entity_type": entity_type,
+                            "entity_id": entity_id,
+                            "content_hash": content_hash,
+                            "position": position,
+                            "content": content,
+                        }
+                    )
+        for start in range(0, len(values), BATCH_SIZE):
+            op.bulk_insert(chunks, values[start : start + BATCH_SIZE])
+
+
+def downgrade():
+    op.drop_index("ix_content_chunks_pending", table_name="content_chunks")
@@ -0,0 +1,40 @@
+"""Key the SQLite full-text tables on entity ids instead of rowids
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+from app.models.fulltext import (
+    FULLTEXT_COLUMNS,
+    create_statements,
+    drop_statements,
+    rebuild_statements,
+)
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect != "sqlite":
+        return
+    # The external-content tables matched rows by the entity tables' implicit
+    # rowids, which VACUUM renumbers; rebuild them as id-keyed tables
+    for table in FULLTEXT_COLUMNS:
+        for statement in (
+            drop_statements(table, dialect)
+            + create_statements(table, dialect)
+            + rebuild_statements(table, dialect)
+        ):
+            op.execute(statement)
+
+
+def downgrade():
+    # 0007 creates the same id-keyed tables, so there is nothing to undo
+    pass
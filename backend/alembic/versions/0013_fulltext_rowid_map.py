@@ -0,0 +1,40 @@
+"""Look full-text rows up by a mapped integer rowid
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+
+from app.models.fulltext import (
+    FULLTEXT_COLUMNS,
+    create_statements,
+    drop_statements,
+    rebuild_statements,
+)
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect != "sqlite":
+        return
+    # The triggers deleted FTS rows by their UNINDEXED id column, scanning the
+    # whole table on every delete and text edit; rebuild with the id→rowid map
+    for table in FULLTEXT_COLUMNS:
+        for statement in (
+            drop_statements(table, dialect)
+            + create_statements(table, dialect)
+            + rebuild_statements(table, dialect)
+        ):
+            op.execute(statement)
+
+
+def downgrade():
+    # 0007 creates the same tables, so there is nothing to undo
+    pass
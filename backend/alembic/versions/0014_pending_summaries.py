@@ -0,0 +1,29 @@
+"""Index notes waiting for a summary
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-18
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    pending = sa.column("summary_status") == "pending"
+    op.create_index(
+        "ix_notes_summary_pending",
+        "notes",
+        ["summary_status", "id"],
+        sqlite_where=pending,
+        postgresql_where=pending,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_notes_summary_pending", table_name="notes")
@@ -2,8 +2,9 @@
 AI/LLM API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.database import get_db
 from app.schemas.schemas import (
@@ -14,6 +15,7 @@ from app.schemas.schemas import (
     TaskResponse,
 )
 from app.services.ai_service import AIService
+from app.services.priority_service import priority_service
 
 router = APIRouter()
 ai_service = AIService()
@@ -36,10 +38,29 @@ async def summarize_content(
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/summarize/stream")
+async def summarize_content_stream(
+    request: SummarizeRequest,
+):
+    """
+    Summarize content using AI, streaming the result as it is generated
+
+    Returns newline-delimited JSON events: `token` (raw generated text),
+    `summary` and `bullet` (each parsed line, as soon as it is complete),
+    then `done` with the full summary. Disconnecting cancels generation.
+    """
+
+    async def events():
+        async for event in ai_service.summarize_stream(request.content, request.max_points):
+            yield event.model_dump_json(exclude_none=True) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
 @router.post("/prioritize", response_model=PrioritizeResponse)
 async def prioritize_tasks(
     request: PrioritizeRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Prioritize tasks using AI
@@ -58,3 +79,29 @@ async def prioritize_tasks(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/prioritize", response_model=PrioritizeResponse)
+async def get_prioritized_tasks(
+    limit: int = Query(10, ge=1, le=100),
+    focus: str = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Rank the stored open tasks by urgency on the server
+
+    Urgency combines due-date proximity, priority and staleness, and is read
+    from the stored `ai_priority_score`. Pass `focus` (e.g. what you are
+    working on) to also weigh each task's similarity to it. No LLM call is made.
+    """
+    tasks = [
+        TaskResponse.model_validate(task)
+        for task in await priority_service.rank_open_tasks(db, limit, focus)
+    ]
+    reasoning = "Ranked by due date, priority and time since last update"
+    if focus:
+        reasoning += f", and similarity to '{focus}'"
+    return PrioritizeResponse(
+        prioritized_tasks=tasks,
+        next_best_action=tasks[0] if tasks else None,
+        reasoning=reasoning,
+    )
@@ -0,0 +1,32 @@
+"""
+Facet count API endpoints
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.schemas.schemas import FacetsResponse, FacetValue
+from app.services.facet_service import FACET_CATEGORY, FACET_TAG, facet_service
+
+router = APIRouter()
+
+
+@router.get("/", response_model=FacetsResponse)
+async def get_facets(
+    entity_type: str = Query("all", pattern="^(task|note|all)$"),
+    limit: int = Query(50, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Most used tags and categories with their item counts
+
+    Counts are kept up to date by every write, so this reads one stored
+    count per distinct tag or category instead of scanning tasks and notes.
+    """
+    entity_types = ["task", "note"] if entity_type == "all" else [entity_type]
+    counts = await facet_service.counts(db, entity_types, limit)
+    return FacetsResponse(
+        entity_type=entity_type,
+        tags=[FacetValue(value=v, count=c) for v, c in counts[FACET_TAG]],
+        categories=[FacetValue(value=v, count=c) for v, c in counts[FACET_CATEGORY]],
+    )
@@ -2,12 +2,21 @@
 Notes API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.database import get_db
+from app.core.pagination import InvalidCursorError
 from app.models.models import Note
-from app.schemas.schemas import NoteCreate, NoteUpdate, NoteResponse
+from app.schemas.schemas import (
+    BulkCreateRequest,
+    BulkCreateResponse,
+    NoteCreate,
+    NoteUpdate,
+    NoteResponse,
+    NoteSummaryResponse,
+)
 from app.services.note_service import NoteService
 
 router = APIRouter()
@@ -17,27 +26,74 @@ note_service = NoteService()
 @router.post("/", response_model=NoteResponse)
 async def create_note(
     note: NoteCreate,
-    db: Session = Depends(get_db),
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new note"""
-    return await note_service.create_note(db, note)
+    return await note_service.create_note(db, note, x_device_id)
 
 
 @router.get("/", response_model=List[NoteResponse])
 async def list_notes(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     category: str = Query(None),
-    db: Session = Depends(get_db),
+    cursor: str = Query(None),
+    tags: str = Query(None, max_length=1000),
+    db: AsyncSession = Depends(get_db),
 ):
-    """List all notes with optional filtering"""
-    return await note_service.list_notes(db, skip, limit, category)
+    """
+    List all notes with optional filtering
+
+    `tags` is a comma-separated list; only notes with every one of the tags
+    are listed. Pass the `X-Next-Cursor` response header back as `cursor` to
+    fetch the next page; the header is absent on the last page.
+    """
+    try:
+        notes, next_cursor = await note_service.list_notes(
+            db, skip, limit, category, cursor, tags.split(",") if tags else None
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return notes
+
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def bulk_create_notes(
+    request: BulkCreateRequest,
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Create up to BULK_MAX_ITEMS notes in one request
+
+    Each item is validated on its own: invalid items are reported by index
+    in `results` and the valid ones are still created.
+    """
+    results = await note_service.bulk_create_notes(db, request.items, x_device_id)
+    failed = sum(1 for result in results if result.error)
+    return BulkCreateResponse(created=len(results) - failed, failed=failed, results=results)
+
+
+@router.get("/export")
+async def export_notes(
+    category: str = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream all notes as newline-delimited JSON, oldest first"""
+    return StreamingResponse(
+        note_service.export_notes(db, category),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get("/{note_id}", response_model=NoteResponse)
 async def get_note(
     note_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get a specific note"""
     note = await note_service.get_note(db, note_id)
@@ -46,14 +102,36 @@ async def get_note(
     return note
 
 
+@router.get("/{note_id}/summary", response_model=NoteSummaryResponse)
+async def get_note_summary(
+    note_id: str,
+    wait: float = Query(0, ge=0, le=30),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get the AI summary status of a note
+
+    - **wait**: Seconds to long-poll while the summary is still pending (max 30)
+    """
+    note = await note_service.get_summary(db, note_id, wait)
+    if not note:
+        raise HTTPException(status_code=404, detail="Note not found")
+    return NoteSummaryResponse(
+        note_id=note.id,
+        summary_status=note.summary_status,
+        summary=note.summary,
+    )
+
+
 @router.put("/{note_id}", response_model=NoteResponse)
 async def update_note(
     note_id: str,
     note_update: NoteUpdate,
-    db: Session = Depends(get_db),
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a note"""
-    note = await note_service.update_note(db, note_id, note_update)
+    note = await note_service.update_note(db, note_id, note_update, x_device_id)
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     return note
@@ -62,10 +140,11 @@ async def update_note(
 @router.delete("/{note_id}")
 async def delete_note(
     note_id: str,
-    db: Session = Depends(get_db),
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a note"""
-    success = await note_service.delete_note(db, note_id)
+    success = await note_service.delete_note(db, note_id, x_device_id)
     if not success:
         raise HTTPException(status_code=404, detail="Note not found")
     return {"message": "Note deleted successfully"}
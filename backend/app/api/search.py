@@ -2,10 +2,10 @@
 Semantic search API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
-from app.schemas.schemas import SemanticSearchRequest, SemanticSearchResponse
+from app.schemas.schemas import SemanticSearchRequest, SemanticSearchResponse, SuggestResponse
 from app.services.search_service import SearchService
 
 router = APIRouter()
@@ -15,7 +15,7 @@ search_service = SearchService()
 @router.post("/semantic", response_model=SemanticSearchResponse)
 async def semantic_search(
     request: SemanticSearchRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """
     Perform semantic search across tasks and notes
@@ -23,6 +23,7 @@ async def semantic_search(
     - **query**: Search query (natural language)
     - **entity_type**: Filter by 'task', 'note', or 'all' (default: 'all')
     - **limit**: Maximum number of results (default: 10, max: 100)
+    - **mode**: 'hybrid' (keyword + semantic, default), 'semantic', or 'keyword'
     """
     try:
         results = await search_service.semantic_search(
@@ -30,6 +31,7 @@ async def semantic_search(
             request.query,
             request.entity_type,
             request.limit,
+            request.mode,
         )
         return SemanticSearchResponse(
             results=results,
@@ -38,3 +40,19 @@ async def semantic_search(
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+
+@router.get("/suggest", response_model=SuggestResponse)
+async def suggest(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Type-ahead suggestions for a partially typed query
+
+    Matches task and note titles, categories and tags with a word starting
+    with the last word of `q`; earlier words must match whole words. Served
+    from an in-memory index, without the embedding model.
+    """
+    suggestions = await search_service.suggest(db, q, limit)
+    return SuggestResponse(suggestions=suggestions, query=q)
@@ -0,0 +1,52 @@
+"""
+Sync API endpoints
+"""
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_db
+from app.schemas.schemas import SyncChangesResponse, SyncPushRequest, SyncPushResponse
+from app.services.sync_service import SyncService
+
+router = APIRouter()
+sync_service = SyncService()
+
+
+@router.get("/changes", response_model=SyncChangesResponse)
+async def get_changes(
+    since: int = Query(0, ge=0),
+    device_id: str = Query(None),
+    limit: int = Query(200, ge=1, le=500),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Get task and note changes since a sync cursor
+
+    - **since**: `cursor` from the previous sync (0 for a full sync)
+    - **device_id**: Skip changes this device made itself
+    - **limit**: Maximum number of log entries to read
+
+    Each entity appears once with its latest action and current state;
+    deleted entities are returned as tombstones. Keep calling with the
+    returned `cursor` while `has_more` is true.
+    """
+    changes, cursor, has_more = await sync_service.get_changes(db, since, device_id, limit)
+    return SyncChangesResponse(changes=changes, cursor=cursor, has_more=has_more)
+
+
+@router.post("/push", response_model=SyncPushResponse)
+async def push_changes(
+    request: SyncPushRequest,
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Apply a device's queued offline changes in one request
+
+    Mutations are applied in order and committed together. Set
+    `base_updated_at` to the `updated_at` the device last saw to have a
+    mutation rejected as a `conflict` when the server copy changed since;
+    otherwise the last writer wins. Each result carries the entity's server
+    state so the device can reconcile.
+    """
+    results = await sync_service.push(db, request.device_id, request.mutations)
+    return SyncPushResponse(results=results)
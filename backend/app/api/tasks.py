@@ -2,12 +2,20 @@
 Tasks API endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.database import get_db
+from app.core.pagination import InvalidCursorError
 from app.models.models import Task
-from app.schemas.schemas import TaskCreate, TaskUpdate, TaskResponse
+from app.schemas.schemas import (
+    BulkCreateRequest,
+    BulkCreateResponse,
+    TaskCreate,
+    TaskUpdate,
+    TaskResponse,
+)
 from app.services.task_service import TaskService
 
 router = APIRouter()
@@ -17,28 +25,78 @@ task_service = TaskService()
 @router.post("/", response_model=TaskResponse)
 async def create_task(
     task: TaskCreate,
-    db: Session = Depends(get_db),
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Create a new task"""
-    return await task_service.create_task(db, task)
+    return await task_service.create_task(db, task, x_device_id)
 
 
 @router.get("/", response_model=List[TaskResponse])
 async def list_tasks(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
     completed: bool = Query(None),
     category: str = Query(None),
-    db: Session = Depends(get_db),
+    cursor: str = Query(None),
+    order: str = Query("created_at", pattern="^(created_at|due_date|ai_priority)$"),
+    tags: str = Query(None, max_length=1000),
+    db: AsyncSession = Depends(get_db),
 ):
-    """List all tasks with optional filtering"""
-    return await task_service.list_tasks(db, skip, limit, completed, category)
+    """
+    List all tasks with optional filtering
+
+    `tags` is a comma-separated list; only tasks with every one of the tags
+    are listed. Pass the `X-Next-Cursor` response header back as `cursor` to
+    fetch the next page; the header is absent on the last page.
+    """
+    try:
+        tasks, next_cursor = await task_service.list_tasks(
+            db, skip, limit, completed, category, cursor, order,
+            tags.split(",") if tags else None,
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return tasks
+
+
+@router.post("/bulk", response_model=BulkCreateResponse)
+async def bulk_create_tasks(
+    request: BulkCreateRequest,
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Create up to BULK_MAX_ITEMS tasks in one request
+
+    Each item is validated on its own: invalid items are reported by index
+    in `results` and the valid ones are still created.
+    """
+    results = await task_service.bulk_create_tasks(db, request.items, x_device_id)
+    failed = sum(1 for result in results if result.error)
+    return BulkCreateResponse(created=len(results) - failed, failed=failed, results=results)
+
+
+@router.get("/export")
+async def export_tasks(
+    completed: bool = Query(None),
+    category: str = Query(None),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream all tasks as newline-delimited JSON, oldest first"""
+    return StreamingResponse(
+        task_service.export_tasks(db, completed, category),
+        media_type="application/x-ndjson",
+    )
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
     task_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get a specific task"""
     task = await task_service.get_task(db, task_id)
@@ -51,10 +109,11 @@ async def get_task(
 async def update_task(
     task_id: str,
     task_update: TaskUpdate,
-    db: Session = Depends(get_db),
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Update a task"""
-    task = await task_service.update_task(db, task_id, task_update)
+    task = await task_service.update_task(db, task_id, task_update, x_device_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
@@ -63,22 +122,24 @@ async def update_task(
 @router.delete("/{task_id}")
 async def delete_task(
     task_id: str,
-    db: Session = Depends(get_db),
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Delete a task"""
-    success = await task_service.delete_task(db, task_id)
+    success = await task_service.delete_task(db, task_id, x_device_id)
     if not success:
         raise HTTPException(status_code=404, detail="Task not found")
     return {"message": "Task deleted successfully"}
 
 
-@router.post("/{task_id}/complete")
+@router.post("/{task_id}/complete", response_model=TaskResponse)
 async def complete_task(
     task_id: str,
-    db: Session = Depends(get_db),
+    x_device_id: str = Header(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Mark a task as completed"""
-    task = await task_service.complete_task(db, task_id)
+    task = await task_service.complete_task(db, task_id, x_device_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task
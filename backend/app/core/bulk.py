@@ -0,0 +1,65 @@
+"""
+Helpers for bulk import and streaming export
+"""
+
+from typing import Any, AsyncIterator, Dict, List, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import paginate
+
+
+def validation_message(error: ValidationError) -> str:
+    """Flatten a pydantic ValidationError into one line"""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def validate_items(
+    schema: Type[BaseModel], items: List[Dict[str, Any]]
+) -> Tuple[List[Tuple[int, BaseModel]], Dict[int, str]]:
+    """
+    Validate each item of a bulk request on its own
+
+    Returns:
+        (valid, errors): valid (position, parsed item) pairs, and an error
+        message for every position that failed validation
+    """
+    valid, errors = [], {}
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, schema.model_validate(item)))
+        except ValidationError as e:
+            errors[index] = validation_message(e)
+    return valid, errors
+
+
+async def iter_ndjson(
+    db: AsyncSession,
+    query: Select,
+    sort_column,
+    id_column,
+    schema: Type[BaseModel],
+    batch_size: int = 500,
+) -> AsyncIterator[str]:
+    """
+    Stream a query as newline-delimited JSON, one keyset page at a time
+
+    Only one page of rows is held in memory, so exports of any size run in
+    constant memory and never re-scan earlier rows.
+    """
+    cursor = None
+    while True:
+        rows, cursor = await paginate(
+            db, query, sort_column, id_column, "export", batch_size, cursor, nullable=False
+        )
+        for row in rows:
+            yield schema.model_validate(row).model_dump_json() + "\n"
+        # Release the page before fetching the next one
+        db.expunge_all()
+        if cursor is None:
+            return
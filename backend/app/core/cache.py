@@ -0,0 +1,233 @@
+"""
+Content-addressed caching with an in-process LRU tier and optional Redis tier
+"""
+
+import asyncio
+import hashlib
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List
+
+from app.core.config import settings
+
+_MISSING = object()
+_caches: "weakref.WeakValueDictionary[str, TieredCache]" = weakref.WeakValueDictionary()
+
+
+def content_hash(*parts: str) -> str:
+    """Stable hash of one or more text parts, used as a cache key"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+class LRUCache:
+    """Thread-safe LRU cache with per-entry TTL"""
+
+    def __init__(self, maxsize: int, ttl: float = 0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                value, expires_at = entry
+                if expires_at and expires_at < time.monotonic():
+                    del self._data[key]
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class TieredCache:
+    """
+    In-process LRU in front of an optional shared Redis tier
+
+    Values found in Redis are promoted into the local tier. Redis errors
+    never fail a request: the Redis tier is skipped for a cool-down period
+    and the cache behaves as local-only.
+    """
+
+    REDIS_RETRY_SECONDS = 30
+
+    def __init__(
+        self,
+        name: str,
+        maxsize: int,
+        ttl: float = 0,
+        serialize: Callable[[Any], bytes] = None,
+        deserialize: Callable[[bytes], Any] = None,
+    ):
+        self.name = name
+        self.local = LRUCache(maxsize, ttl)
+        self.ttl = ttl
+        self.serialize = serialize
+        self.deserialize = deserialize
+        self.redis_enabled = settings.CACHE_REDIS_ENABLED and serialize is not None
+        self.redis_hits = 0
+        self.redis_errors = 0
+        self._redis_down_until = 0.0
+        self._redis_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = (
+            weakref.WeakKeyDictionary()
+        )
+        _caches[name] = self
+
+    def _key(self, key: str) -> str:
+        return f"pocketgenie:{self.name}:{key}"
+
+    def _redis(self):
+        if not self.redis_enabled or time.monotonic() < self._redis_down_until:
+            return None
+        loop = asyncio.get_running_loop()
+        client = self._redis_clients.get(loop)
+        if client is None:
+            import redis.asyncio as redis
+
+            client = redis.Redis.from_url(
+                settings.REDIS_URL, socket_timeout=0.5, socket_connect_timeout=0.5
+            )
+            self._redis_clients[loop] = client
+        return client
+
+    def _redis_failed(self, error: Exception):
+        self.redis_errors += 1
+        self._redis_down_until = time.monotonic() + self.REDIS_RETRY_SECONDS
+        print(f"Warning: Redis cache '{self.name}' unavailable: {error}")
+
+    async def get(self, key: str, default: Any = None) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        client = self._redis()
+        if client is not None:
+            try:
+                raw = await client.get(self._key(key))
+            except Exception as e:
+                self._redis_failed(e)
+                raw = None
+            if raw is not None:
+                value = self.deserialize(raw)
+                self.redis_hits += 1
+                self.local.set(key, value)
+                return value
+        return default
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """Look up several keys, returning only the ones found
+
+        Keys missing from the local tier are fetched from Redis in one MGET.
+        """
+        found, missing = {}, []
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key, _MISSING)
+            if value is _MISSING:
+                missing.append(key)
+            else:
+                found[key] = value
+
+        client = self._redis() if missing else None
+        if client is not None:
+            try:
+                raws = await client.mget([self._key(key) for key in missing])
+            except Exception as e:
+                self._redis_failed(e)
+                raws = []
+            for key, raw in zip(missing, raws):
+                if raw is not None:
+                    value = found[key] = self.deserialize(raw)
+                    self.redis_hits += 1
+                    self.local.set(key, value)
+        return found
+
+    async def set(self, key: str, value: Any):
+        self.local.set(key, value)
+        client = self._redis()
+        if client is not None:
+            try:
+                await client.set(self._key(key), self.serialize(value), ex=int(self.ttl) or None)
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def set_many(self, items: Dict[str, Any]):
+        """Store several values, writing them to Redis in one pipelined round trip"""
+        for key, value in items.items():
+            self.local.set(key, value)
+        client = self._redis() if items else None
+        if client is not None:
+            try:
+                async with client.pipeline(transaction=False) as pipe:
+                    for key, value in items.items():
+                        pipe.set(self._key(key), self.serialize(value), ex=int(self.ttl) or None)
+                    await pipe.execute()
+            except Exception as e:
+                self._redis_failed(e)
+
+    def clear(self):
+        """Clear the local tier"""
+        self.local.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.local.stats(),
+            "redis_enabled": self.redis_enabled,
+            "redis_hits": self.redis_hits,
+            "redis_errors": self.redis_errors,
+        }
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Hit/miss metrics for every cache in the process"""
+    return {name: cache.stats() for name, cache in sorted(_caches.items())}
+
+
+def clear_caches():
+    """Clear the local tier of every cache"""
+    for cache in list(_caches.values()):
+        cache.clear()
@@ -2,39 +2,143 @@
 Database configuration and session management
 """
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+import time
+from typing import Any, Dict
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
 from app.core.config import settings
 
-# Create engine
-if settings.DATABASE_URL.startswith("sqlite"):
-    # SQLite configuration
-    engine = create_engine(
-        settings.DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool,
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+SQLITE_SYNCHRONOUS_MODES = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool recording how long checkouts wait for a free connection"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def async_database_url(url: str) -> str:
+    """Swap the driver of a DATABASE_URL for its asyncio counterpart"""
+    parsed = make_url(url)
+    return parsed.set(drivername=ASYNC_DRIVERS[parsed.get_backend_name()]).render_as_string(
+        hide_password=False
     )
-else:
-    # PostgreSQL configuration
-    engine = create_engine(
-        settings.DATABASE_URL,
-        pool_pre_ping=True,
-        echo=settings.DEBUG,
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    parsed = make_url(url)
+    return parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:")
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Per-connection SQLite tuning, applied as each connection is opened"""
+    synchronous = settings.SQLITE_SYNCHRONOUS.upper()
+    if synchronous not in SQLITE_SYNCHRONOUS_MODES:
+        raise ValueError(f"Invalid SQLITE_SYNCHRONOUS: {settings.SQLITE_SYNCHRONOUS}")
+    cursor = dbapi_connection.cursor()
+    if settings.SQLITE_WAL:
+        cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute(f"PRAGMA synchronous={synchronous}")
+    cursor.execute(f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.close()
+
+
+def _engine_options(url: str) -> Dict[str, Any]:
+    """create_async_engine keyword arguments for the configured engine profile"""
+    backend = make_url(url).get_backend_name()
+    options: Dict[str, Any] = {"echo": settings.DB_ECHO}
+    connect_args: Dict[str, Any] = {}
+
+    if backend == "sqlite":
+        connect_args["timeout"] = settings.SQLITE_BUSY_TIMEOUT_SECONDS
+    elif backend == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        connect_args["server_settings"] = {"statement_timeout": timeout}
+    options["connect_args"] = connect_args
+
+    if _is_memory_sqlite(url):
+        # Every connection to :memory: is a separate database
+        options["poolclass"] = StaticPool
+    else:
+        options.update(
+            poolclass=TimedAsyncQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS or -1,
+            pool_pre_ping=backend != "sqlite",
+        )
+    return options
+
+
+def build_async_engine(url: str) -> AsyncEngine:
+    """Async engine (aiosqlite or asyncpg) for DATABASE_URL"""
+    engine = create_async_engine(
+        async_database_url(url), **_engine_options(url)
     )
+    if make_url(url).get_backend_name() == "sqlite":
+        event.listen(engine.sync_engine, "connect", _set_sqlite_pragmas)
+    return engine
 
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def pool_stats(engine: AsyncEngine = None) -> Dict[str, Any]:
+    """Connection pool usage for the metrics endpoint"""
+    pool = (engine or async_engine).pool
+    stats: Dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+        )
+    if isinstance(pool, TimedAsyncQueuePool):
+        stats.update(
+            checkouts=pool.checkouts,
+            timeouts=pool.timeouts,
+            wait_avg_ms=round(1000 * pool.wait_seconds_total / pool.checkouts, 3)
+            if pool.checkouts
+            else 0.0,
+            wait_max_ms=round(1000 * pool.wait_seconds_max, 3),
+        )
+    return stats
+
+
+# Async engine used by requests and background jobs
+async_engine = build_async_engine(settings.DATABASE_URL)
+
+# Session factory. Objects stay usable after commit: reloading expired
+# attributes would need implicit IO, which AsyncSession doesn't allow.
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
 
 # Base class for models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """Dependency for getting database session"""
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
-
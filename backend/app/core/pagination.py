@@ -0,0 +1,141 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+from sqlalchemy import DateTime, Select, String, tuple_, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor can't be decoded"""
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(order: str, values: Sequence[Any]) -> str:
+    """Build an opaque cursor from the sort key of the last row on a page"""
+    payload = json.dumps([order, [_encode_value(v) for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, order: str) -> List[Any]:
+    """
+    Decode a cursor produced by encode_cursor
+
+    Raises:
+        InvalidCursorError: Malformed cursor, or one issued for another ordering
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_order, values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = [_decode_value(v) for v in values]
+    except (ValueError, TypeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+    if cursor_order != order:
+        raise InvalidCursorError("Cursor was issued for a different ordering")
+    return values
+
+
+async def paginate(
+    db: AsyncSession,
+    query: Select,
+    sort_column,
+    id_column,
+    order: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0,
+    nullable: bool = True,
+    descending: bool = False,
+) -> Tuple[list, Optional[str]]:
+    """
+    Fetch one page ordered by (sort_column, id_column)
+
+    Rows with a NULL sort value come last in either direction. The cursor carries the sort key of
+    the last row returned, so every page is an index range scan that starts
+    where the previous one stopped instead of skipping over earlier rows.
+    Rows with and without a sort value are read as two separate ranges
+    because SQLite indexes can't produce NULLS LAST order.
+
+    Args:
+        query: select() of a single entity, with any filters applied
+        skip: Legacy offset (prefer cursors); disables the index-range path
+        nullable: Whether sort_column can be NULL
+        descending: Largest sort values first (the index is read backwards)
+
+    Returns:
+        (rows, next_cursor) where next_cursor is None on the last page
+    """
+    # Compare and carry sort values in the database's own representation:
+    # SQLite stores datetimes as text whose format depends on how they were
+    # written, so a re-bound datetime would not compare equal to ties
+    sort_key = sort_column
+    if isinstance(sort_column.type, DateTime):
+        sort_key = type_coerce(sort_column, String)
+    query = query.add_columns(sort_key.label("sort_key"))
+
+    is_null, value, last_id = False, None, None
+    if cursor:
+        try:
+            is_null, value, last_id = decode_cursor(cursor, order)
+        except ValueError as e:
+            raise InvalidCursorError("Invalid cursor") from e
+
+    def direction(column):
+        return column.desc() if descending else column.asc()
+
+    def after(key, last):
+        return key < last if descending else key > last
+
+    async def fetch(statement: Select) -> list:
+        return list((await db.execute(statement)).all())
+
+    if skip:
+        if cursor:
+            raise InvalidCursorError("skip can't be combined with a cursor")
+        rows = await fetch(
+            query.order_by(direction(sort_column).nulls_last(), direction(id_column))
+            .offset(skip)
+            .limit(limit + 1)
+        )
+    else:
+        rows = []
+        if not is_null:
+            valued = query.where(sort_column.isnot(None)) if nullable else query
+            if value is not None:
+                # Row-value comparison lets the planner seek on the composite index
+                valued = valued.where(after(tuple_(sort_key, id_column), (value, last_id)))
+            valued = valued.order_by(direction(sort_column), direction(id_column)).limit(limit + 1)
+            rows = await fetch(valued)
+
+        if nullable and len(rows) <= limit:
+            unvalued = query.where(sort_column.is_(None))
+            if is_null:
+                unvalued = unvalued.where(after(id_column, last_id))
+            rows += await fetch(
+                unvalued.order_by(direction(id_column)).limit(limit + 1 - len(rows))
+            )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_entity, last_sort_key = rows[-1]
+        next_cursor = encode_cursor(
+            order, [last_sort_key is None, last_sort_key, getattr(last_entity, id_column.key)]
+        )
+    return [entity for entity, _ in rows], next_cursor
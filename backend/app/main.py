@@ -6,13 +6,22 @@ Main FastAPI application entry point
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 
-from app.api import tasks, notes, search, ai
+from app.api import tasks, notes, search, ai, sync, facets
+from app.core.cache import cache_stats
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import async_engine, pool_stats
+from app.services.chunk_service import CHUNKED_COLUMNS
+from app.services.embedding_service import EmbeddingService, embedding_batcher
+from app.services.llm_client import llm_client
+from app.services.model_registry import model_registry
+from app.services.priority_service import priority_service
+from app.services.search_service import SearchService
+from app.services.summary_pipeline import summary_pipeline
+from app.services.vector_index import save_vector_indexes
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is owned by the Alembic migrations (`alembic upgrade head`)
 
 
 @asynccontextmanager
@@ -20,9 +29,33 @@ async def lifespan(app: FastAPI):
     """Lifespan context manager for startup and shutdown events"""
     # Startup
     print("🚀 PocketGenie Backend Starting...")
+    if settings.EMBEDDING_WARMUP:
+        # Load the shared embedding model before serving traffic
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, EmbeddingService().warmup)
+        except Exception as e:
+            print(f"Warning: Embedding model warmup failed: {e}")
+    if settings.SEARCH_WARMUP_QUERIES:
+        try:
+            await SearchService().warmup(settings.SEARCH_WARMUP_QUERIES)
+        except Exception as e:
+            print(f"Warning: Search query warmup failed: {e}")
+    await summary_pipeline.start()
+    # Summaries and chunk embeddings whose jobs were lost to a restart
+    # (indexed no-ops usually)
+    summary_pipeline.enqueue_pending()
+    for entity_type in CHUNKED_COLUMNS:
+        summary_pipeline.enqueue_chunks(entity_type)
+    rescoring = asyncio.create_task(priority_service.run())
     yield
     # Shutdown
     print("🛑 PocketGenie Backend Shutting Down...")
+    rescoring.cancel()
+    save_vector_indexes()
+    await summary_pipeline.stop()
+    await llm_client.aclose()
+    await async_engine.dispose()
 
 
 # Initialize FastAPI app
@@ -40,6 +73,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
@@ -48,6 +82,8 @@ app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
 app.include_router(notes.router, prefix="/api/v1/notes", tags=["notes"])
 app.include_router(search.router, prefix="/api/v1/search", tags=["search"])
 app.include_router(ai.router, prefix="/api/v1/ai", tags=["ai"])
+app.include_router(sync.router, prefix="/api/v1/sync", tags=["sync"])
+app.include_router(facets.router, prefix="/api/v1/facets", tags=["facets"])
 
 
 @app.get("/")
@@ -66,6 +102,19 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Runtime metrics for capacity planning"""
+    return {
+        "models": model_registry.stats(),
+        "embedding_batches": embedding_batcher.stats(),
+        "llm": llm_client.stats(),
+        "summary_queue_depth": summary_pipeline.pending(),
+        "caches": cache_stats(),
+        "database": pool_stats(),
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
 
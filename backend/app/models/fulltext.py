@@ -0,0 +1,186 @@
+"""
+Full-text indexes over task and note text
+
+SQLite uses a self-contained FTS5 table per entity table that carries the
+entity id as an UNINDEXED column, kept in sync by triggers and ranked with
+BM25. Entity tables have string primary keys, so their implicit rowids are
+not stable (VACUUM and batch migrations renumber them) and nothing here
+relies on them: a {table}_fts_rowids table maps each entity id to the
+integer rowid of its FTS row. PostgreSQL uses a GIN expression index over
+to_tsvector() of the same columns, ranked with ts_rank_cd. Neither is a
+mapped table or column, so the DDL is attached to the owning table here and
+runs with create_all; migrations call the same helpers.
+
+SQLite batch migrations that recreate an indexed table drop its triggers:
+re-run create_statements() after.
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from sqlalchemy import DDL, Table, event
+
+# Indexed text columns per table; the first column is weighted highest
+FULLTEXT_COLUMNS: Dict[str, Tuple[str, ...]] = {
+    "tasks": ("title", "description"),
+    "notes": ("title", "content"),
+}
+TEXT_SEARCH_CONFIG = "english"
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_table(table: str) -> str:
+    return f"{table}_fts"
+
+
+def fts_rowids(table: str) -> str:
+    return f"{table}_fts_rowids"
+
+
+def fulltext_index(table: str) -> str:
+    return f"ix_{table}_fulltext"
+
+
+def is_fulltext_object(name: str) -> bool:
+    """Whether a schema object belongs to a full-text index (for Alembic autogenerate)"""
+    return any(
+        name == fulltext_index(table) or name.startswith(fts_table(table))
+        for table in FULLTEXT_COLUMNS
+    )
+
+
+def _tsvector(columns: Sequence[str]) -> str:
+    text = " || ' ' || ".join(f"coalesce({column}, '')" for column in columns)
+    return f"to_tsvector('{TEXT_SEARCH_CONFIG}', {text})"
+
+
+def _body(statements: Sequence[str]) -> str:
+    return " ".join(f"{statement};" for statement in statements)
+
+
+def trigger_statements(table: str) -> Dict[str, List[str]]:
+    """
+    Statements run by each SQLite trigger, by trigger name suffix
+
+    FTS rows are keyed by the integer rowid the entity id maps to, so every
+    trigger finds its rows through the mapping's unique index and the FTS
+    rowid instead of scanning for the UNINDEXED id.
+    """
+    fts, rowids = fts_table(table), fts_rowids(table)
+    names = ", ".join(FULLTEXT_COLUMNS[table])
+    new = ", ".join(f"new.{column}" for column in FULLTEXT_COLUMNS[table])
+    delete_old = (
+        f"DELETE FROM {fts} WHERE rowid = (SELECT rowid FROM {rowids} WHERE id = old.id)"
+    )
+    insert_new = (
+        f"INSERT INTO {fts}(rowid, id, {names}) "
+        f"VALUES ((SELECT rowid FROM {rowids} WHERE id = new.id), new.id, {new})"
+    )
+    return {
+        "ai": [f"INSERT INTO {rowids}(id) VALUES (new.id)", insert_new],
+        "ad": [delete_old, f"DELETE FROM {rowids} WHERE id = old.id"],
+        "au": [delete_old, f"UPDATE {rowids} SET id = new.id WHERE id = old.id", insert_new],
+    }
+
+
+def create_statements(table: str, dialect: str) -> List[str]:
+    """DDL creating the full-text index for a table"""
+    columns = FULLTEXT_COLUMNS[table]
+    if dialect == "postgresql":
+        return [
+            f"CREATE INDEX IF NOT EXISTS {fulltext_index(table)} "
+            f"ON {table} USING GIN ({_tsvector(columns)})"
+        ]
+    if dialect != "sqlite":
+        return []
+
+    fts, names = fts_table(table), ", ".join(columns)
+    triggers = trigger_statements(table)
+    return [
+        f"CREATE TABLE IF NOT EXISTS {fts_rowids(table)} ("
+        f"rowid INTEGER PRIMARY KEY, id VARCHAR NOT NULL UNIQUE)",
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"id UNINDEXED, {names}, tokenize='unicode61')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} "
+        f"BEGIN {_body(triggers['ai'])} END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} "
+        f"BEGIN {_body(triggers['ad'])} END",
+        # Only text edits touch the index, not embedding/summary/status writes
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF id, {names} ON {table} "
+        f"BEGIN {_body(triggers['au'])} END",
+    ]
+
+
+def drop_statements(table: str, dialect: str) -> List[str]:
+    """DDL dropping the full-text index for a table"""
+    if dialect == "postgresql":
+        return [f"DROP INDEX IF EXISTS {fulltext_index(table)}"]
+    if dialect != "sqlite":
+        return []
+    fts = fts_table(table)
+    return [f"DROP TRIGGER IF EXISTS {fts}_{suffix}" for suffix in ("ai", "ad", "au")] + [
+        f"DROP TABLE IF EXISTS {fts}",
+        f"DROP TABLE IF EXISTS {fts_rowids(table)}",
+    ]
+
+
+def rebuild_statements(table: str, dialect: str) -> List[str]:
+    """DDL re-indexing rows that already exist (SQLite only; GIN indexes build on create)"""
+    if dialect != "sqlite":
+        return []
+    fts, rowids = fts_table(table), fts_rowids(table)
+    names = ", ".join(FULLTEXT_COLUMNS[table])
+    values = ", ".join(f"{table}.{column}" for column in FULLTEXT_COLUMNS[table])
+    return [
+        f"DELETE FROM {fts}",
+        f"DELETE FROM {rowids}",
+        f"INSERT INTO {rowids}(id) SELECT id FROM {table}",
+        f"INSERT INTO {fts}(rowid, id, {names}) SELECT {rowids}.rowid, {table}.id, {values} "
+        f"FROM {table} JOIN {rowids} ON {rowids}.id = {table}.id",
+    ]
+
+
+def register_fulltext(table: Table):
+    """Create/drop a table's full-text index together with the table"""
+    for dialect in ("sqlite", "postgresql"):
+        for statement in create_statements(table.name, dialect):
+            event.listen(table, "after_create", DDL(statement).execute_if(dialect=dialect))
+        for statement in drop_statements(table.name, dialect):
+            event.listen(table, "before_drop", DDL(statement).execute_if(dialect=dialect))
+
+
+def search_terms(query: str) -> List[str]:
+    """Plain word tokens of a user query, free of any query-syntax characters"""
+    return _TERM.findall(query.lower())
+
+
+def keyword_search_sql(table: str, dialect: str) -> str:
+    """
+    SQL returning (id, score) for the best full-text matches, best first
+
+    Binds :query (from match_query) and :limit.
+    """
+    columns = FULLTEXT_COLUMNS[table]
+    if dialect == "postgresql":
+        vector = _tsvector(columns)
+        return (
+            f"SELECT {table}.id, ts_rank_cd({vector}, q) AS score "
+            f"FROM {table}, to_tsquery('{TEXT_SEARCH_CONFIG}', :query) AS q "
+            f"WHERE {vector} @@ q ORDER BY score DESC LIMIT :limit"
+        )
+    fts = fts_table(table)
+    # bm25() is lower-is-better and weights every FTS column in order: the
+    # UNINDEXED id column first, then the title double the rest
+    weights = ", ".join(["0.0", "2.0"] + ["1.0"] * (len(columns) - 1))
+    return (
+        f"SELECT {table}.id, -bm25({fts}, {weights}) AS score "
+        f"FROM {fts} JOIN {table} ON {table}.id = {fts}.id "
+        f"WHERE {fts} MATCH :query ORDER BY score DESC LIMIT :limit"
+    )
+
+
+def match_query(terms: Sequence[str], dialect: str) -> str:
+    """Match any of the terms; rows matching more of them rank higher"""
+    if dialect == "postgresql":
+        return " | ".join(terms)
+    return " OR ".join(f'"{term}"' for term in terms)
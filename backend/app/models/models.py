@@ -2,9 +2,11 @@
 SQLAlchemy models for PocketGenie
 """
 
-from sqlalchemy import Column, String, Text, DateTime, Integer, Float, JSON, Boolean
-from sqlalchemy.sql import func
+from sqlalchemy import Column, String, Text, DateTime, Integer, Float, JSON, Boolean, Index
+from sqlalchemy.sql import false, func
 from app.core.database import Base
+from app.models.fulltext import register_fulltext
+from app.models.types import Vector
 import uuid
 
 
@@ -22,10 +24,31 @@ class Task(Base):
     tags = Column(JSON, default=list)  # List of tags
     completed = Column(Boolean, default=False)
     ai_priority_score = Column(Float, nullable=True)  # AI-generated priority
-    embedding = Column(JSON, nullable=True)  # Vector embedding for semantic search
+    embedding = Column(Vector(), nullable=True)  # Vector embedding for semantic search
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination orderings
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        Index("ix_tasks_due_date_id", "due_date", "id"),
+        # Completed tasks have no score, so this only covers open tasks
+        Index("ix_tasks_ai_priority_id", "ai_priority_score", "id"),
+        # Filtered listings
+        Index("ix_tasks_completed_created_at_id", "completed", "created_at", "id"),
+        Index("ix_tasks_category_created_at_id", "category", "created_at", "id"),
+        # Open tasks by due date (the mobile home screen); completed leads so
+        # the planner sees the equality match, the WHERE keeps it half-size
+        Index(
+            "ix_tasks_open_due_date",
+            "completed",
+            "due_date",
+            "id",
+            sqlite_where=completed == false(),
+            postgresql_where=completed == false(),
+        ),
+    )
+
     def __repr__(self):
         return f"<Task {self.id}: {self.title}>"
 
@@ -39,12 +62,28 @@ class Note(Base):
     title = Column(String(255), nullable=False)
     content = Column(Text, nullable=False)
     summary = Column(Text, nullable=True)  # AI-generated summary
+    summary_status = Column(String(20), default="pending")  # 'pending', 'ready', 'failed'
     category = Column(String(100), nullable=True)
     tags = Column(JSON, default=list)  # List of tags
-    embedding = Column(JSON, nullable=True)  # Vector embedding for semantic search
+    embedding = Column(Vector(), nullable=True)  # Vector embedding for semantic search
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # Keyset pagination ordering
+        Index("ix_notes_created_at_id", "created_at", "id"),
+        # Filtered listing
+        Index("ix_notes_category_created_at_id", "category", "created_at", "id"),
+        # Notes waiting for a summary, swept into the queue at startup
+        Index(
+            "ix_notes_summary_pending",
+            "summary_status",
+            "id",
+            sqlite_where=summary_status == "pending",
+            postgresql_where=summary_status == "pending",
+        ),
+    )
+
     def __repr__(self):
         return f"<Note {self.id}: {self.title}>"
 
@@ -66,19 +105,116 @@ class User(Base):
         return f"<User {self.username}>"
 
 
+class ContentChunk(Base):
+    """
+    Embedded window of a note's content or a task's description
+
+    Long text is split into overlapping windows that fit the embedding
+    model's input. Chunks are keyed by a hash of their text, so an edit only
+    adds and removes the windows that actually changed. New chunks are
+    stored without an embedding, which a background job fills in.
+    """
+
+    __tablename__ = "content_chunks"
+
+    entity_type = Column(String(50), primary_key=True)  # 'task' or 'note'
+    entity_id = Column(String, primary_key=True)
+    content_hash = Column(String(40), primary_key=True)  # sha1 of content
+    position = Column(Integer, nullable=False)  # Order within the entity's text
+    content = Column(Text, nullable=False)
+    embedding = Column(Vector(), nullable=True)  # NULL until embedded
+
+    __table_args__ = (
+        # Chunks waiting to be embedded; empty most of the time, so finding
+        # leftover work at startup costs nothing
+        Index(
+            "ix_content_chunks_pending",
+            "entity_type",
+            "entity_id",
+            "content_hash",
+            sqlite_where=embedding.is_(None),
+            postgresql_where=embedding.is_(None),
+        ),
+    )
+
+    def __repr__(self):
+        return f"<ContentChunk {self.entity_type}:{self.entity_id}#{self.position}>"
+
+
+class EntityFacet(Base):
+    """
+    A tag or the category of a task or note, one row per value
+
+    Inverted index for tag filters: the primary key leads with the value, so
+    the entities carrying a tag are one index range. Tags are stored
+    normalized (see facet_service.normalize_tag).
+    """
+
+    __tablename__ = "entity_facets"
+
+    entity_type = Column(String(50), primary_key=True)  # 'task' or 'note'
+    facet = Column(String(20), primary_key=True)  # 'tag' or 'category'
+    value = Column(String(100), primary_key=True)
+    entity_id = Column(String, primary_key=True)
+
+    __table_args__ = (
+        # Diffing an entity's facets when it is written
+        Index("ix_entity_facets_entity", "entity_type", "entity_id"),
+    )
+
+    def __repr__(self):
+        return f"<EntityFacet {self.entity_type}:{self.entity_id} {self.facet}={self.value}>"
+
+
+class FacetCount(Base):
+    """
+    Number of tasks or notes per tag and per category
+
+    Maintained in the same transaction as every write to entity_facets, so
+    facet counts are read from here instead of counted per request. Values
+    no longer in use keep a zero count.
+    """
+
+    __tablename__ = "facet_counts"
+
+    entity_type = Column(String(50), primary_key=True)
+    facet = Column(String(20), primary_key=True)
+    value = Column(String(100), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<FacetCount {self.entity_type} {self.facet}={self.value}: {self.count}>"
+
+
+# Keyword search indexes (FTS5 on SQLite, GIN on PostgreSQL)
+register_fulltext(Task.__table__)
+register_fulltext(Note.__table__)
+
+
 class DeviceSyncLog(Base):
-    """Device sync log for tracking multi-device synchronization"""
+    """
+    Change log for multi-device synchronization
+
+    Every task/note write appends a row. The autoincrementing id is the
+    change sequence number devices use as their sync cursor.
+    """
 
     __tablename__ = "device_sync_logs"
 
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    user_id = Column(String, nullable=False)
-    device_id = Column(String, nullable=False)
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String, nullable=True)
+    device_id = Column(String, nullable=True)  # Device that made the change, if known
     entity_type = Column(String(50), nullable=False)  # 'task' or 'note'
     entity_id = Column(String, nullable=False)
     action = Column(String(50), nullable=False)  # 'create', 'update', 'delete'
     synced_at = Column(DateTime, server_default=func.now())
 
+    __table_args__ = (
+        Index("ix_device_sync_logs_user_device", "user_id", "device_id"),
+        Index("ix_device_sync_logs_entity", "entity_type", "entity_id"),
+        # Never reuse sequence numbers, even after the newest rows are pruned
+        {"sqlite_autoincrement": True},
+    )
+
     def __repr__(self):
         return f"<DeviceSyncLog {self.id}>"
-
@@ -0,0 +1,58 @@
+"""
+Custom column types
+"""
+
+import numpy as np
+from sqlalchemy import LargeBinary
+from sqlalchemy.dialects.postgresql import BYTEA
+from sqlalchemy.types import TypeDecorator
+
+from app.core.config import settings
+
+
+def _use_pgvector(dialect) -> bool:
+    return dialect.name == "postgresql" and settings.PGVECTOR_ENABLED
+
+
+class Vector(TypeDecorator):
+    """
+    Embedding vector stored as packed float32
+
+    Stored as raw little-endian float32 bytes (BLOB on SQLite, bytea on
+    PostgreSQL), or as a native pgvector column when PGVECTOR_ENABLED is set.
+    Reads decode with np.frombuffer, so no per-element parsing or copying
+    happens; the returned arrays are read-only views over the fetched bytes.
+    """
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def __init__(self, dim: int = None):
+        super().__init__()
+        self.dim = dim or settings.EMBEDDING_DIM
+
+    def load_dialect_impl(self, dialect):
+        if _use_pgvector(dialect):
+            from pgvector.sqlalchemy import Vector as PGVector
+
+            return dialect.type_descriptor(PGVector(self.dim))
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(BYTEA())
+        return dialect.type_descriptor(LargeBinary())
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        array = np.asarray(value, dtype="<f4").reshape(-1)
+        if array.size == 0:
+            return None
+        if _use_pgvector(dialect):
+            return array
+        return array.tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if _use_pgvector(dialect):
+            return np.asarray(value, dtype=np.float32)
+        return np.frombuffer(value, dtype="<f4")
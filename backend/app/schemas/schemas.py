@@ -3,8 +3,9 @@ Pydantic schemas for request/response validation
 """
 
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 from datetime import datetime
+from app.core.config import settings
 
 
 class TaskBase(BaseModel):
@@ -78,6 +79,7 @@ class NoteResponse(NoteBase):
 
     id: str
     summary: Optional[str] = None
+    summary_status: Optional[str] = None
     created_at: datetime
     updated_at: datetime
 
@@ -85,6 +87,90 @@ class NoteResponse(NoteBase):
         from_attributes = True
 
 
+class NoteSummaryResponse(BaseModel):
+    """Schema for note summary status"""
+
+    note_id: str
+    summary_status: str  # 'pending', 'ready' or 'failed'
+    summary: Optional[str] = None
+
+
+class BulkCreateRequest(BaseModel):
+    """Schema for bulk task/note creation"""
+
+    # Items are validated one by one so a bad item doesn't reject the batch
+    items: List[Dict[str, Any]] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class BulkItemResult(BaseModel):
+    """Outcome of one item in a bulk request"""
+
+    index: int
+    id: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkCreateResponse(BaseModel):
+    """Schema for bulk creation response"""
+
+    created: int
+    failed: int
+    results: List[BulkItemResult]
+
+
+class SyncChange(BaseModel):
+    """One entity's latest change since a sync cursor"""
+
+    seq: int
+    entity_type: str  # 'task' or 'note'
+    entity_id: str
+    action: str  # 'create', 'update' or 'delete'
+    task: Optional[TaskResponse] = None  # Current state, absent for deletes
+    note: Optional[NoteResponse] = None
+
+
+class SyncChangesResponse(BaseModel):
+    """Schema for delta sync response"""
+
+    changes: List[SyncChange]
+    cursor: int  # Pass back as `since` on the next sync
+    has_more: bool
+
+
+class SyncMutation(BaseModel):
+    """One queued offline change"""
+
+    entity_type: str = Field(..., pattern="^(task|note)$")
+    action: str = Field(..., pattern="^(create|update|delete)$")
+    entity_id: Optional[str] = None  # Required unless creating
+    data: Dict[str, Any] = Field(default_factory=dict)  # Create/update fields
+    base_updated_at: Optional[datetime] = None  # Server updated_at the device last saw
+
+
+class SyncPushRequest(BaseModel):
+    """Schema for pushing a device's offline queue"""
+
+    device_id: str = Field(..., min_length=1)
+    mutations: List[SyncMutation] = Field(..., min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+
+class SyncMutationResult(BaseModel):
+    """Outcome of one pushed mutation"""
+
+    index: int
+    entity_id: Optional[str] = None
+    status: str  # 'applied', 'conflict' or 'error'
+    error: Optional[str] = None
+    task: Optional[TaskResponse] = None  # Server state after the push, absent for deletes
+    note: Optional[NoteResponse] = None
+
+
+class SyncPushResponse(BaseModel):
+    """Schema for push sync response"""
+
+    results: List[SyncMutationResult]
+
+
 class SummarizeRequest(BaseModel):
     """Schema for summarization request"""
 
@@ -99,6 +185,14 @@ class SummarizeResponse(BaseModel):
     bullet_points: List[str]
 
 
+class SummarizeStreamEvent(BaseModel):
+    """One line of a streamed summary"""
+
+    event: str  # 'token', 'summary', 'bullet' or 'done'
+    text: Optional[str] = None  # Generated text ('token'), or the parsed line
+    result: Optional[SummarizeResponse] = None  # Final summary ('done')
+
+
 class PrioritizeRequest(BaseModel):
     """Schema for task prioritization request"""
 
@@ -119,6 +213,7 @@ class SemanticSearchRequest(BaseModel):
     query: str = Field(..., min_length=1)
     entity_type: str = Field(default="all")  # 'task', 'note', or 'all'
     limit: int = Field(default=10, ge=1, le=100)
+    mode: str = Field(default="hybrid", pattern="^(hybrid|semantic|keyword)$")
 
 
 class SemanticSearchResult(BaseModel):
@@ -127,7 +222,8 @@ class SemanticSearchResult(BaseModel):
     entity_type: str  # 'task' or 'note'
     entity_id: str
     title: str
-    similarity_score: float
+    similarity_score: float  # Cosine similarity to the query (0 for keyword-only matches)
+    score: float = 0.0  # Fused rank score the results are ordered by
     content: Optional[str] = None
 
 
@@ -137,3 +233,33 @@ class SemanticSearchResponse(BaseModel):
     results: List[SemanticSearchResult]
     query: str
 
+
+class Suggestion(BaseModel):
+    """Schema for a type-ahead suggestion"""
+
+    kind: str  # 'task', 'note', 'category' or 'tag'
+    text: str
+    entity_id: Optional[str] = None  # Set for task and note titles
+    count: int = 1  # Tasks and notes using a category or tag
+
+
+class SuggestResponse(BaseModel):
+    """Schema for type-ahead suggestions"""
+
+    suggestions: List[Suggestion]
+    query: str
+
+
+class FacetValue(BaseModel):
+    """Schema for a tag or category and how many items use it"""
+
+    value: str
+    count: int
+
+
+class FacetsResponse(BaseModel):
+    """Schema for tag and category counts"""
+
+    entity_type: str
+    tags: List[FacetValue]
+    categories: List[FacetValue]
@@ -2,21 +2,89 @@
 AI service for LLM integration and task prioritization
 """
 
-import requests
-from typing import List, Optional
+import asyncio
+import numpy as np
+from typing import AsyncIterator, List, Optional, Tuple
+from app.core.cache import TieredCache, content_hash
 from app.core.config import settings
 from app.schemas.schemas import (
     SummarizeResponse,
+    SummarizeStreamEvent,
     PrioritizeResponse,
     TaskResponse,
 )
+from app.services.chunk_service import split_sections
+from app.services.llm_client import CircuitOpenError, LLMClient, llm_client
+from app.services.priority_service import task_scores
+
+# LLM summaries keyed by content hash; fallback summaries are never cached
+summary_cache = TieredCache(
+    "summaries",
+    maxsize=settings.SUMMARY_CACHE_SIZE,
+    ttl=settings.SUMMARY_CACHE_TTL_SECONDS,
+    serialize=lambda result: result.model_dump_json().encode("utf-8"),
+    deserialize=SummarizeResponse.model_validate_json,
+)
+
+# Summaries of single sections of long content, keyed by section hash, so
+# editing one part of a long note only re-summarizes that section
+section_summary_cache = TieredCache(
+    "section_summaries",
+    maxsize=settings.SECTION_SUMMARY_CACHE_SIZE,
+    ttl=settings.SUMMARY_CACHE_TTL_SECONDS,
+    serialize=lambda summary: summary.encode("utf-8"),
+    deserialize=lambda data: data.decode("utf-8"),
+)
+
+# Rounds of section summarization before the final summary, at most
+MAX_REDUCE_ROUNDS = 3
+
+
+BULLET_MARKERS = ("-", "•", "*")
+
+
+class SummaryParser:
+    """
+    Split LLM output into a summary line and bullet points as it arrives
+
+    The first non-empty line is the summary; later lines starting with a
+    bullet marker are points. Only the current unfinished line is buffered.
+    """
+
+    def __init__(self):
+        self.summary: Optional[str] = None
+        self.bullet_points: List[str] = []
+        self._partial = ""
+
+    def feed(self, text: str) -> List[Tuple[str, str]]:
+        """Add generated text; returns ('summary'|'bullet', text) for each completed line"""
+        *lines, self._partial = (self._partial + text).split("\n")
+        return [parsed for line in lines for parsed in self._parse_line(line)]
+
+    def close(self) -> List[Tuple[str, str]]:
+        """Parse the final line, which has no trailing newline"""
+        line, self._partial = self._partial, ""
+        return self._parse_line(line)
+
+    def _parse_line(self, line: str) -> List[Tuple[str, str]]:
+        line = line.strip()
+        if not line:
+            return []
+        if self.summary is None:
+            self.summary = line
+            return [("summary", line)]
+        if line.startswith(BULLET_MARKERS):
+            point = line.lstrip("-•* ")
+            self.bullet_points.append(point)
+            return [("bullet", point)]
+        return []
 
 
 class AIService:
     """Service for AI/LLM operations"""
 
-    def __init__(self):
-        self.zephyr_url = settings.ZEPHYR_API_URL
+    def __init__(self, client: LLMClient = None):
+        self.llm = client or llm_client
 
     async def summarize(self, content: str, max_points: int = 5) -> SummarizeResponse:
         """
@@ -29,47 +97,155 @@ class AIService:
         Returns:
             SummarizeResponse with summary and bullet points
         """
-        prompt = f"""Summarize the following content into {max_points} concise bullet points highlighting key information and tasks:
-
-{content}
-
-Provide the summary as a single paragraph, then list the bullet points."""
+        cache_key = content_hash(str(max_points), content)
+        cached = await summary_cache.get(cache_key)
+        if cached is not None:
+            return cached
 
+        from_llm = False
         try:
             # Try to call Z.ai server
-            response = requests.post(
-                f"{self.zephyr_url}/v1/completions",
-                json={
-                    "prompt": prompt,
-                    "max_tokens": 500,
-                    "temperature": 0.7,
-                },
-                timeout=30,
-            )
-            response.raise_for_status()
-            result = response.json()
-            text = result.get("choices", [{}])[0].get("text", "")
+            prompt = await self._build_summary_prompt(content, max_points)
+            text = await self.llm.complete(prompt, max_tokens=500, temperature=0.7)
+            from_llm = True
+        except CircuitOpenError:
+            # Backend known to be down: don't wait on it
+            text = self._simple_summarize(content, max_points)
         except Exception as e:
             # Fallback: simple summarization
             print(f"Warning: Could not reach Z.ai server: {e}")
             text = self._simple_summarize(content, max_points)
 
-        # Parse response into summary and bullet points
-        lines = text.strip().split("\n")
-        summary = lines[0] if lines else content[:200]
+        parser = SummaryParser()
+        parser.feed(text)
+        parser.close()
+        result = self._summary_result(parser, content, max_points)
+        if from_llm:
+            await summary_cache.set(cache_key, result)
+        return result
 
-        bullet_points = []
-        for line in lines[1:]:
-            line = line.strip()
-            if line and (line.startswith("-") or line.startswith("•") or line.startswith("*")):
-                bullet_points.append(line.lstrip("-•* "))
+    async def summarize_stream(
+        self, content: str, max_points: int = 5
+    ) -> AsyncIterator[SummarizeStreamEvent]:
+        """
+        Summarize content, yielding tokens and parsed lines as the LLM generates them
+
+        Generation stops as soon as max_points bullet points have arrived.
+        Closing the iterator (e.g. when the client disconnects) closes the
+        upstream LLM request.
+
+        Yields:
+            'token' events with raw text, 'summary' and 'bullet' events for
+            each parsed line, then a 'done' event with the full result
+        """
+        cache_key = content_hash(str(max_points), content)
+        cached = await summary_cache.get(cache_key)
+        if cached is not None:
+            yield SummarizeStreamEvent(event="summary", text=cached.summary)
+            for point in cached.bullet_points:
+                yield SummarizeStreamEvent(event="bullet", text=point)
+            yield SummarizeStreamEvent(event="done", result=cached)
+            return
+
+        parser = SummaryParser()
+        from_llm = True
+        stream = None
+        try:
+            prompt = await self._build_summary_prompt(content, max_points)
+            stream = self.llm.stream(prompt, max_tokens=500, temperature=0.7)
+            async for fragment in stream:
+                yield SummarizeStreamEvent(event="token", text=fragment)
+                for event, text in parser.feed(fragment):
+                    yield SummarizeStreamEvent(event=event, text=text)
+                if len(parser.bullet_points) >= max_points:
+                    break
+        except CircuitOpenError:
+            from_llm = False
+        except Exception as e:
+            print(f"Warning: Could not reach Z.ai server: {e}")
+            from_llm = False
+        finally:
+            if stream is not None:
+                await stream.aclose()
+
+        parsed = parser.close()
+        if not from_llm and parser.summary is None:
+            parsed += parser.feed(self._simple_summarize(content, max_points)) + parser.close()
+        for event, text in parsed:
+            yield SummarizeStreamEvent(event=event, text=text)
+
+        result = self._summary_result(parser, content, max_points)
+        for point in result.bullet_points[len(parser.bullet_points):]:
+            yield SummarizeStreamEvent(event="bullet", text=point)
+        if from_llm:
+            await summary_cache.set(cache_key, result)
+        yield SummarizeStreamEvent(event="done", result=result)
+
+    async def _build_summary_prompt(self, content: str, max_points: int) -> str:
+        """
+        Prompt for the final summary
+
+        Content longer than SUMMARY_MAP_REDUCE_WORDS is first condensed
+        (map): each section is summarized separately, in parallel, and the
+        section summaries are joined. This repeats while the result is still
+        too long, then the final prompt combines them (reduce).
+        """
+        sections = 0
+        for _ in range(MAX_REDUCE_ROUNDS):
+            words = len(content.split())
+            if words <= settings.SUMMARY_MAP_REDUCE_WORDS:
+                break
+            summaries = await self._summarize_sections(content)
+            condensed = "\n\n".join(summaries)
+            if len(condensed.split()) >= words:
+                break
+            content, sections = condensed, len(summaries)
+
+        if not sections:
+            return f"""Summarize the following content into {max_points} concise bullet points highlighting key information and tasks:
+
+{content}
 
+Provide the summary as a single paragraph, then list the bullet points."""
+
+        return f"""The following are summaries of {sections} consecutive sections of a longer note. Combine them into {max_points} concise bullet points highlighting key information and tasks:
+
+{content}
+
+Provide the summary as a single paragraph, then list the bullet points."""
+
+    async def _summarize_sections(self, content: str) -> List[str]:
+        """Summarize each section of content, at most SUMMARY_MAP_CONCURRENCY at a time"""
+        semaphore = asyncio.Semaphore(settings.SUMMARY_MAP_CONCURRENCY)
+
+        async def summarize_section(section: str) -> str:
+            key = content_hash("section", section)
+            cached = await section_summary_cache.get(key)
+            if cached is not None:
+                return cached
+            prompt = f"""Summarize this section of a longer note in a few sentences, keeping names, dates, numbers and action items:
+
+{section}"""
+            async with semaphore:
+                summary = await self.llm.complete(prompt, max_tokens=200, temperature=0.3)
+            summary = summary.strip()
+            await section_summary_cache.set(key, summary)
+            return summary
+
+        sections = split_sections(content, settings.SUMMARY_SECTION_WORDS)
+        return list(await asyncio.gather(*(summarize_section(s) for s in sections)))
+
+    def _summary_result(
+        self, parser: SummaryParser, content: str, max_points: int
+    ) -> SummarizeResponse:
+        """Build the response from parsed output, filling in missing parts from the content"""
+        bullet_points = parser.bullet_points
         # Ensure we have bullet points
         if not bullet_points:
             bullet_points = [content[i : i + 100] for i in range(0, min(len(content), 500), 100)][:max_points]
 
         return SummarizeResponse(
-            summary=summary,
+            summary=parser.summary or content[:200],
             bullet_points=bullet_points[:max_points],
         )
 
@@ -112,32 +288,17 @@ Provide your analysis and recommendation."""
 
         try:
             # Try to call Z.ai server
-            response = requests.post(
-                f"{self.zephyr_url}/v1/completions",
-                json={
-                    "prompt": prompt,
-                    "max_tokens": 500,
-                    "temperature": 0.7,
-                },
-                timeout=30,
-            )
-            response.raise_for_status()
-            result = response.json()
-            reasoning = result.get("choices", [{}])[0].get("text", "")
+            reasoning = await self.llm.complete(prompt, max_tokens=500, temperature=0.7)
+        except CircuitOpenError:
+            reasoning = "Ranked by due date, priority and time since last update"
         except Exception as e:
             # Fallback: simple prioritization
             print(f"Warning: Could not reach Z.ai server: {e}")
-            reasoning = "Prioritized by due date and priority level"
-
-        # Sort tasks by priority and due date
-        prioritized = sorted(
-            tasks,
-            key=lambda t: (
-                t.due_date is None,  # Tasks with due dates first
-                t.due_date or "",  # Then by due date
-                -t.priority,  # Then by priority (descending)
-            ),
-        )
+            reasoning = "Ranked by due date, priority and time since last update"
+
+        # Most urgent first, scored the same way as the stored task ranking
+        scores = task_scores(tasks)
+        prioritized = [tasks[i] for i in np.argsort(-scores, kind="stable")]
 
         next_best = prioritized[0] if prioritized else None
 
@@ -0,0 +1,242 @@
+"""
+Chunked embeddings for long note content and task descriptions
+"""
+
+import hashlib
+import re
+import zlib
+from sqlalchemy import delete, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.models.models import ContentChunk, Note, Task
+from app.services.embedding_service import EmbeddingService
+from app.services.vector_index import chunk_indexes, chunk_key
+
+# Text column chunked for each entity type
+CHUNKED_COLUMNS = {"task": Task.description, "note": Note.content}
+
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+# About one paragraph in this many ends a section (see split_sections)
+SECTION_BOUNDARY_MODULUS = 4
+
+
+def split_chunks(
+    text: Optional[str], size: Optional[int] = None, overlap: Optional[int] = None
+) -> List[str]:
+    """
+    Split text into overlapping windows of at most `size` words
+
+    Paragraphs are windowed separately, so editing one paragraph leaves the
+    windows of every other paragraph byte-for-byte unchanged.
+    """
+    size = size or settings.CHUNK_SIZE_WORDS
+    overlap = settings.CHUNK_OVERLAP_WORDS if overlap is None else overlap
+    step = max(size - overlap, 1)
+
+    chunks = []
+    for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+        words = paragraph.split()
+        for start in range(0, len(words), step):
+            chunks.append(" ".join(words[start : start + size]))
+            if start + size >= len(words):
+                break
+    return chunks
+
+
+def split_sections(text: Optional[str], target_words: int) -> List[str]:
+    """
+    Split text into runs of whole paragraphs of roughly target_words each
+
+    A section may end after a paragraph only if that paragraph's own hash
+    selects it as a boundary (and the section holds half the target), or
+    once the section reaches the target. Boundaries therefore depend on
+    paragraph content rather than offsets: editing one paragraph changes
+    its own section, and sections re-align at the next boundary after it.
+    Over-long paragraphs are cut into target-sized windows first.
+    """
+    sections, current, words = [], [], 0
+    for paragraph in _PARAGRAPH_BREAK.split(text or ""):
+        for piece in split_chunks(paragraph, target_words, 0):
+            current.append(piece)
+            words += len(piece.split())
+            boundary = zlib.crc32(piece.encode("utf-8")) % SECTION_BOUNDARY_MODULUS == 0
+            if words >= target_words or (boundary and words * 2 >= target_words):
+                sections.append("\n\n".join(current))
+                current, words = [], 0
+    if current:
+        sections.append("\n\n".join(current))
+    return sections
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ChunkChanges:
+    """Chunk index updates to apply once the transaction that made them commits"""
+
+    def __init__(self, entity_type: str):
+        self.entity_type = entity_type
+        self.removed: List[str] = []
+        # Entities with new chunks that still need embedding
+        self.pending: List[str] = []
+
+    def apply(self):
+        """Drop vanished chunks from the index and schedule embedding of new ones"""
+        index = chunk_indexes[self.entity_type]
+        for key in self.removed:
+            index.remove(key)
+        if self.pending:
+            # Imported here: the pipeline's summarizer depends on this module
+            from app.services.summary_pipeline import summary_pipeline
+
+            summary_pipeline.enqueue_chunks(self.entity_type, self.pending)
+
+
+class ChunkService:
+    """Service keeping content chunks in step with entity text"""
+
+    def __init__(self):
+        self.embedding_service = EmbeddingService()
+
+    async def rechunk(
+        self,
+        db: AsyncSession,
+        entity_type: str,
+        texts: Dict[str, Optional[str]],
+        created: bool = False,
+    ) -> ChunkChanges:
+        """
+        Bring the chunks of some entities in line with their current text
+
+        Chunks whose text is unchanged keep their stored embedding and only
+        vanished ones are deleted. New windows are stored without an
+        embedding, so writes never wait on the model: apply() schedules
+        embed_pending() for them. Pass None as the text of a deleted entity.
+        Changes are added to the caller's session; call apply() on the
+        result after committing.
+
+        Args:
+            texts: entity_id -> current text
+            created: The entities are new, so there are no chunks to look up
+        """
+        changes = ChunkChanges(entity_type)
+        if not texts:
+            return changes
+
+        existing: Dict[Tuple[str, str], ContentChunk] = {}
+        if not created:
+            rows = await db.scalars(
+                select(ContentChunk).where(
+                    ContentChunk.entity_type == entity_type,
+                    ContentChunk.entity_id.in_(list(texts)),
+                )
+            )
+            existing = {(chunk.entity_id, chunk.content_hash): chunk for chunk in rows}
+
+        # Identical windows within one entity are stored once
+        wanted: Dict[Tuple[str, str], Tuple[int, str]] = {}
+        for entity_id, text in texts.items():
+            for position, content in enumerate(split_chunks(text)):
+                wanted.setdefault((entity_id, chunk_hash(content)), (position, content))
+
+        stale = [key for key in existing if key not in wanted]
+        if stale:
+            await db.execute(
+                delete(ContentChunk).where(
+                    ContentChunk.entity_type == entity_type,
+                    tuple_(ContentChunk.entity_id, ContentChunk.content_hash).in_(stale),
+                )
+            )
+            for key in stale:
+                db.expunge(existing.pop(key))
+            changes.removed = [chunk_key(*key) for key in stale]
+
+        for key, chunk in existing.items():
+            chunk.position = wanted[key][0]
+
+        new_keys = [key for key in wanted if key not in existing]
+        if new_keys:
+            await db.execute(
+                insert(ContentChunk),
+                [
+                    {
+                        "entity_type": entity_type,
+                        "entity_id": entity_id,
+                        "content_hash": content_hash,
+                        "position": wanted[(entity_id, content_hash)][0],
+                        "content": wanted[(entity_id, content_hash)][1],
+                        "embedding": None,
+                    }
+                    for entity_id, content_hash in new_keys
+                ],
+            )
+            changes.pending = list(dict.fromkeys(entity_id for entity_id, _ in new_keys))
+        return changes
+
+    async def embed_pending(
+        self,
+        db: AsyncSession,
+        entity_type: str,
+        entity_ids: Optional[List[str]] = None,
+        batch_size: int = 100,
+    ) -> int:
+        """
+        Embed stored chunks that have no embedding yet and add them to the index
+
+        Chunks deleted or already embedded while the model ran are skipped.
+        No connection is held while embedding.
+
+        Args:
+            entity_ids: Only embed chunks of these entities (default: all)
+
+        Returns:
+            Number of chunks embedded
+        """
+        total, after = 0, ("", "")
+        while True:
+            query = (
+                select(ContentChunk.entity_id, ContentChunk.content_hash, ContentChunk.content)
+                .where(
+                    ContentChunk.entity_type == entity_type,
+                    ContentChunk.embedding.is_(None),
+                    tuple_(ContentChunk.entity_id, ContentChunk.content_hash) > after,
+                )
+                .order_by(ContentChunk.entity_id, ContentChunk.content_hash)
+                .limit(batch_size)
+            )
+            if entity_ids is not None:
+                query = query.where(ContentChunk.entity_id.in_(entity_ids))
+            rows = (await db.execute(query)).all()
+            await db.rollback()
+            if not rows:
+                return total
+
+            embeddings = await self.embedding_service.get_embeddings_batch(
+                [content for _, _, content in rows]
+            )
+            stored = []
+            for (entity_id, content_hash, _), embedding in zip(rows, embeddings):
+                result = await db.execute(
+                    update(ContentChunk)
+                    .where(
+                        ContentChunk.entity_type == entity_type,
+                        ContentChunk.entity_id == entity_id,
+                        ContentChunk.content_hash == content_hash,
+                        ContentChunk.embedding.is_(None),
+                    )
+                    .values(embedding=embedding)
+                )
+                if result.rowcount:
+                    stored.append((chunk_key(entity_id, content_hash), embedding))
+            await db.commit()
+
+            index = chunk_indexes[entity_type]
+            for key, embedding in stored:
+                index.upsert(key, embedding)
+            total += len(stored)
+            after = tuple(rows[-1][:2])
+
+
+chunk_service = ChunkService()
@@ -0,0 +1,107 @@
+"""
+Micro-batching queue for embedding inference
+"""
+
+import asyncio
+import weakref
+from concurrent.futures import Executor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class _PendingBatch:
+    """Requests waiting to be flushed on one event loop"""
+
+    def __init__(self):
+        self.items: List[Tuple[str, asyncio.Future]] = []
+        self.timer: Optional[asyncio.TimerHandle] = None
+
+
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text requests into one encode call
+
+    Requests are collected until either max_batch_size texts are waiting or
+    max_wait_ms has passed since the first one arrived, then the whole batch
+    is encoded in the executor so the event loop is never blocked by a
+    forward pass.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        executor: Executor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.encode = encode
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._pending: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _PendingBatch]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._stats: Dict[str, int] = {"requests": 0, "batches": 0, "texts": 0}
+
+    async def submit(self, text: str) -> np.ndarray:
+        """Queue one text and wait for its embedding"""
+        loop = asyncio.get_running_loop()
+        pending = self._pending.get(loop)
+        if pending is None:
+            pending = self._pending[loop] = _PendingBatch()
+
+        future = loop.create_future()
+        pending.items.append((text, future))
+        self._stats["requests"] += 1
+
+        if len(pending.items) >= self.max_batch_size:
+            self._flush(loop)
+        elif pending.timer is None:
+            pending.timer = loop.call_later(self.max_wait, self._flush, loop)
+
+        return await future
+
+    async def run(self, texts: Sequence[str]) -> np.ndarray:
+        """Encode an already-batched list of texts in the executor"""
+        loop = asyncio.get_running_loop()
+        self._stats["batches"] += 1
+        self._stats["texts"] += len(texts)
+        return await loop.run_in_executor(self.executor, self.encode, list(texts))
+
+    def _flush(self, loop: asyncio.AbstractEventLoop):
+        pending = self._pending.get(loop)
+        if pending is None or not pending.items:
+            return
+
+        if pending.timer is not None:
+            pending.timer.cancel()
+            pending.timer = None
+        items, pending.items = pending.items, []
+
+        # Skip requests whose callers have gone away
+        items = [(text, future) for text, future in items if not future.done()]
+        if not items:
+            return
+
+        task = loop.create_task(self.run([text for text, _ in items]))
+        task.add_done_callback(lambda done: self._resolve(done, items))
+
+    @staticmethod
+    def _resolve(done: asyncio.Task, items: List[Tuple[str, asyncio.Future]]):
+        error = done.exception() if not done.cancelled() else asyncio.CancelledError()
+        for i, (_, future) in enumerate(items):
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(done.result()[i])
+
+    def stats(self) -> Dict[str, float]:
+        """Request and batch counters"""
+        batches = self._stats["batches"]
+        return {
+            **self._stats,
+            "avg_batch_size": round(self._stats["texts"] / batches, 2) if batches else 0.0,
+        }
@@ -2,17 +2,117 @@
 Embedding service for generating vector embeddings
 """
 
-from sentence_transformers import SentenceTransformer
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from app.core.cache import TieredCache, content_hash
 from app.core.config import settings
-from typing import List
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.model_registry import model_registry
+from typing import List, Tuple
+
+
+def _load_sentence_transformer():
+    """Load the configured Sentence Transformers model"""
+    # Imported lazily so importing the API modules doesn't pull in torch
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(settings.EMBEDDING_MODEL)
+
+
+def _load_model():
+    """Load the configured model on the configured inference backend"""
+    if settings.EMBEDDING_BACKEND == "onnx":
+        try:
+            from app.services.onnx_encoder import load_onnx_encoder
+
+            return load_onnx_encoder()
+        except ImportError as e:
+            print(f"Warning: ONNX Runtime unavailable ({e}), falling back to PyTorch")
+    return _load_sentence_transformer()
+
+
+def _model_key() -> str:
+    """Registry and cache key; backends produce slightly different vectors"""
+    if settings.EMBEDDING_BACKEND == "onnx":
+        variant = "onnx-int8" if settings.EMBEDDING_ONNX_QUANTIZE else "onnx"
+        return f"{settings.EMBEDDING_MODEL}:{variant}"
+    return settings.EMBEDDING_MODEL
+
+
+def _encode_batch(texts: List[str]):
+    """Run one forward pass for a batch of texts (called in the executor)"""
+    model = model_registry.get(_model_key(), _load_model)
+    return model.encode(texts, convert_to_tensor=False)
+
+
+# Inference runs off the event loop; torch parallelizes within each batch,
+# so a single worker avoids threads competing for the same cores
+_executor = ThreadPoolExecutor(
+    max_workers=settings.EMBEDDING_WORKERS, thread_name_prefix="embedding"
+)
+embedding_batcher = EmbeddingBatcher(
+    _encode_batch,
+    _executor,
+    max_batch_size=settings.EMBEDDING_BATCH_SIZE,
+    max_wait_ms=settings.EMBEDDING_BATCH_WAIT_MS,
+)
+
+# Embeddings keyed by model + text hash, so identical text is encoded once
+embedding_cache = TieredCache(
+    "embeddings",
+    maxsize=settings.EMBEDDING_CACHE_SIZE,
+    ttl=settings.EMBEDDING_CACHE_TTL_SECONDS,
+    serialize=lambda vector: np.asarray(vector, dtype="<f4").tobytes(),
+    deserialize=lambda raw: np.frombuffer(raw, dtype="<f4"),
+)
+
+
+def _cache_key(text: str) -> str:
+    return content_hash(_model_key(), text)
+
+
+def quantize_int8(embeddings) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric int8 quantization with one scale per vector
+
+    Returns:
+        (codes, scales) with embeddings ~= codes * scales[:, None]
+    """
+    vectors = np.atleast_2d(np.asarray(embeddings, dtype=np.float32))
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(embeddings) -> np.ndarray:
+    """One sign bit per dimension, packed eight to a byte"""
+    return np.packbits(np.atleast_2d(np.asarray(embeddings)) > 0, axis=1)
+
+
+_POPCOUNT = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+
+def hamming_distances(codes: np.ndarray, query_code: np.ndarray) -> np.ndarray:
+    """Number of differing bits between each packed code and one packed query code"""
+    return _POPCOUNT[np.bitwise_xor(codes, query_code)].sum(axis=1, dtype=np.int32)
 
 
 class EmbeddingService:
     """Service for generating embeddings using Sentence Transformers"""
 
     def __init__(self):
-        """Initialize the embedding model"""
-        self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
+        """Initialize the service (the model itself is loaded on first use)"""
+        self.model_name = settings.EMBEDDING_MODEL
+
+    @property
+    def model(self):
+        """Shared model instance from the process-wide registry"""
+        return model_registry.get(_model_key(), _load_model)
+
+    def warmup(self):
+        """Load the model and run a dummy forward pass"""
+        self.model.encode("warmup", convert_to_tensor=False)
 
     async def get_embedding(self, text: str) -> List[float]:
         """
@@ -27,7 +127,11 @@ class EmbeddingService:
         if not text or not text.strip():
             return []
 
-        embedding = self.model.encode(text, convert_to_tensor=False)
+        key = _cache_key(text)
+        embedding = await embedding_cache.get(key)
+        if embedding is None:
+            embedding = await embedding_batcher.submit(text)
+            await embedding_cache.set(key, embedding)
         return embedding.tolist()
 
     async def get_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
@@ -43,8 +147,20 @@ class EmbeddingService:
         if not texts:
             return []
 
-        embeddings = self.model.encode(texts, convert_to_tensor=False)
-        return [emb.tolist() for emb in embeddings]
+        keys = [_cache_key(text) for text in texts]
+        cached = await embedding_cache.get_many(keys)
+
+        # Only encode texts we haven't seen, once each
+        missing = list(dict.fromkeys(key for key in keys if key not in cached))
+        if missing:
+            texts_by_key = dict(zip(keys, texts))
+            encoded = dict(
+                zip(missing, await embedding_batcher.run([texts_by_key[key] for key in missing]))
+            )
+            cached.update(encoded)
+            await embedding_cache.set_many(encoded)
+
+        return [cached[key].tolist() for key in keys]
 
     async def similarity(self, embedding1: List[float], embedding2: List[float]) -> float:
         """
@@ -0,0 +1,166 @@
+"""
+Tag filters and facet counts for tasks and notes
+
+Task.tags and Note.tags are JSON arrays, which no index can search. Every
+write therefore also keeps entity_facets (one row per tag or category of an
+entity, keyed by value so filtering by a tag is an index range) and
+facet_counts (entities per value) in step, in the writer's transaction.
+"""
+
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.models import EntityFacet, FacetCount
+
+FACET_TAG = "tag"
+FACET_CATEGORY = "category"
+FACETS = (FACET_TAG, FACET_CATEGORY)
+# Entity columns the facets are derived from
+FACETED_FIELDS = {"category", "tags"}
+
+# Dialects with INSERT ... ON CONFLICT DO UPDATE for adjusting counts
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+# Rows per multi-VALUES upsert, well under SQLite's bound parameter limit
+COUNT_UPSERT_BATCH_SIZE = 200
+
+
+def normalize_tag(tag) -> Optional[str]:
+    """Stored and matched form of a tag: trimmed and case-folded, None if blank"""
+    if not isinstance(tag, str):
+        return None
+    return " ".join(tag.split()).casefold()[:100] or None
+
+
+def entity_facets(category: Optional[str], tags: Optional[Sequence]) -> Set[Tuple[str, str]]:
+    """(facet, value) pairs of an entity with this category and these tags"""
+    facets = {(FACET_TAG, tag) for tag in map(normalize_tag, tags or []) if tag}
+    if category:
+        facets.add((FACET_CATEGORY, category))
+    return facets
+
+
+def tag_filter(model, entity_type: str, tags: Sequence[str]):
+    """WHERE clauses keeping only entities that have every one of the tags"""
+    return [
+        model.id.in_(
+            select(EntityFacet.entity_id).where(
+                EntityFacet.entity_type == entity_type,
+                EntityFacet.facet == FACET_TAG,
+                EntityFacet.value == tag,
+            )
+        )
+        for tag in dict.fromkeys(filter(None, map(normalize_tag, tags)))
+    ]
+
+
+class FacetService:
+    """Service keeping the tag index and facet counts in step with entities"""
+
+    async def refacet(
+        self,
+        db: AsyncSession,
+        entity_type: str,
+        values: Dict[str, Optional[Tuple[Optional[str], Optional[Sequence]]]],
+        created: bool = False,
+    ):
+        """
+        Bring the facets of some entities in line with their category and tags
+
+        Only facets that were added or removed are written, and the counts
+        of their values are adjusted by the difference. Pass None for a
+        deleted entity. Changes are added to the caller's session.
+
+        Args:
+            values: entity_id -> (category, tags)
+            created: The entities are new, so there are no facets to look up
+        """
+        if not values:
+            return
+
+        existing: Set[Tuple[str, str, str]] = set()
+        if not created:
+            rows = await db.execute(
+                select(EntityFacet.entity_id, EntityFacet.facet, EntityFacet.value).where(
+                    EntityFacet.entity_type == entity_type,
+                    EntityFacet.entity_id.in_(list(values)),
+                )
+            )
+            existing = {tuple(row) for row in rows}
+
+        wanted = {
+            (entity_id, facet, value)
+            for entity_id, fields in values.items()
+            if fields is not None
+            for facet, value in entity_facets(*fields)
+        }
+
+        stale = existing - wanted
+        if stale:
+            await db.execute(
+                delete(EntityFacet).where(
+                    EntityFacet.entity_type == entity_type,
+                    tuple_(EntityFacet.entity_id, EntityFacet.facet, EntityFacet.value).in_(
+                        list(stale)
+                    ),
+                )
+            )
+        new = wanted - existing
+        if new:
+            await db.execute(
+                insert(EntityFacet),
+                [
+                    {"entity_type": entity_type, "entity_id": e, "facet": f, "value": v}
+                    for e, f, v in new
+                ],
+            )
+
+        deltas = Counter((facet, value) for _, facet, value in new)
+        deltas.subtract((facet, value) for _, facet, value in stale)
+        await self._adjust_counts(db, entity_type, {k: d for k, d in deltas.items() if d})
+
+    async def _adjust_counts(
+        self, db: AsyncSession, entity_type: str, deltas: Dict[Tuple[str, str], int]
+    ):
+        """Add deltas to facet counts with atomic upserts"""
+        if not deltas:
+            return
+        rows = [
+            {"entity_type": entity_type, "facet": facet, "value": value, "count": delta}
+            for (facet, value), delta in sorted(deltas.items())
+        ]
+        upsert = _UPSERT_INSERTS[db.get_bind().dialect.name]
+        for start in range(0, len(rows), COUNT_UPSERT_BATCH_SIZE):
+            statement = upsert(FacetCount).values(rows[start : start + COUNT_UPSERT_BATCH_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=[FacetCount.entity_type, FacetCount.facet, FacetCount.value],
+                set_={"count": FacetCount.count + statement.excluded["count"]},
+            )
+            await db.execute(statement)
+
+    async def counts(
+        self, db: AsyncSession, entity_types: Sequence[str], limit: int
+    ) -> Dict[str, List[Tuple[str, int]]]:
+        """Most used values of each facet as (value, count), summed over entity types"""
+        total = func.sum(FacetCount.count).label("total")
+        result = {}
+        for facet in FACETS:
+            rows = await db.execute(
+                select(FacetCount.value, total)
+                .where(
+                    FacetCount.entity_type.in_(list(entity_types)),
+                    FacetCount.facet == facet,
+                    FacetCount.count > 0,
+                )
+                .group_by(FacetCount.value)
+                .order_by(total.desc(), FacetCount.value)
+                .limit(limit)
+            )
+            result[facet] = [(value, int(count)) for value, count in rows]
+        return result
+
+
+facet_service = FacetService()
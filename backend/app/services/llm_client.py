@@ -0,0 +1,326 @@
+"""
+Async HTTP client for the Z.ai LLM backend
+"""
+
+import asyncio
+import json
+import random
+import time
+import weakref
+from typing import Any, AsyncIterator, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+class LLMUnavailableError(Exception):
+    """Raised when the LLM backend cannot serve a request"""
+
+
+class CircuitOpenError(LLMUnavailableError):
+    """Raised without calling the backend while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker
+
+    After failure_threshold consecutive failures the circuit opens and calls
+    fail fast for reset_seconds. Then a single trial call is let through
+    (half-open); success closes the circuit, failure re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_seconds:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        """Whether a call may be attempted right now"""
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+    def release_trial(self):
+        """Let the next call be the trial when this one ended without an outcome"""
+        self._trial_in_flight = False
+
+
+class _LoopState:
+    """Connection pool and concurrency limit bound to one event loop"""
+
+    def __init__(self, client: httpx.AsyncClient, max_concurrency: int):
+        self.client = client
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+
+class LLMClient:
+    """Keep-alive, connection-pooled client with deadlines, retries and a circuit breaker"""
+
+    RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        base_url: str = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.base_url = base_url or settings.ZEPHYR_API_URL
+        self.transport = transport
+        self.breaker = CircuitBreaker(
+            settings.LLM_CIRCUIT_FAILURE_THRESHOLD,
+            settings.LLM_CIRCUIT_RESET_SECONDS,
+        )
+        self._states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _LoopState]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _state(self) -> _LoopState:
+        loop = asyncio.get_running_loop()
+        state = self._states.get(loop)
+        if state is None:
+            client = httpx.AsyncClient(
+                base_url=self.base_url,
+                transport=self.transport,
+                timeout=httpx.Timeout(
+                    settings.LLM_TIMEOUT_SECONDS,
+                    connect=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+                ),
+                limits=httpx.Limits(
+                    max_connections=settings.LLM_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+                ),
+            )
+            state = self._states[loop] = _LoopState(client, settings.LLM_MAX_CONCURRENCY)
+        return state
+
+    async def complete(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+        deadline: float = None,
+    ) -> str:
+        """
+        Request a completion from the LLM backend
+
+        Args:
+            prompt: Prompt text
+            max_tokens: Maximum tokens to generate
+            temperature: Sampling temperature
+            deadline: Overall time budget in seconds, including retries
+
+        Returns:
+            Generated text
+
+        Raises:
+            CircuitOpenError: The backend is known to be down
+            LLMUnavailableError: All attempts failed or the deadline passed
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM backend circuit is open")
+        trial = self.breaker.state == "half-open"
+        try:
+            return await self._complete(
+                {"prompt": prompt, "max_tokens": max_tokens, "temperature": temperature},
+                deadline or settings.LLM_TIMEOUT_SECONDS,
+            )
+        finally:
+            # Outcomes are recorded right before returning or raising, so this
+            # only frees a trial that was cancelled or saw no backend response
+            if trial:
+                self.breaker.release_trial()
+
+    async def _complete(self, payload: Dict[str, Any], deadline: float) -> str:
+        state = self._state()
+        loop = asyncio.get_running_loop()
+        expires_at = loop.time() + deadline
+        last_error: Exception = None
+
+        for attempt in range(settings.LLM_MAX_RETRIES + 1):
+            remaining = expires_at - loop.time()
+            if remaining <= 0:
+                break
+            await self._acquire_slot(state, remaining)
+            try:
+                try:
+                    response = await asyncio.wait_for(
+                        state.client.post("/v1/completions", json=payload),
+                        timeout=expires_at - loop.time(),
+                    )
+                finally:
+                    state.semaphore.release()
+                response.raise_for_status()
+                result = self._parse(response.json())
+                self.breaker.record_success()
+                return result
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in self.RETRYABLE_STATUS:
+                    # The backend is up, it just rejected this request
+                    self.breaker.record_success()
+                    raise LLMUnavailableError(f"LLM backend rejected request: {e}") from e
+                last_error = e
+            except (httpx.TransportError, asyncio.TimeoutError, ValueError) as e:
+                last_error = e
+
+            if attempt < settings.LLM_MAX_RETRIES:
+                # Full jitter keeps retrying workers from synchronizing
+                backoff = random.uniform(0, settings.LLM_RETRY_BACKOFF_SECONDS * 2**attempt)
+                await asyncio.sleep(min(backoff, max(expires_at - loop.time(), 0)))
+
+        self.breaker.record_failure()
+        raise LLMUnavailableError(f"LLM backend request failed: {last_error!r}")
+
+    async def stream(
+        self,
+        prompt: str,
+        max_tokens: int = 500,
+        temperature: float = 0.7,
+    ) -> AsyncIterator[str]:
+        """
+        Stream a completion from the LLM backend as it is generated
+
+        Failures before the first fragment are retried like complete(); once
+        text has been yielded an error ends the stream. Closing the iterator
+        early, or cancelling the task consuming it, closes the upstream
+        response so the backend stops generating.
+
+        A concurrency slot is held until the first fragment arrives, so a
+        slow reader doesn't keep other calls waiting; open streams are still
+        bounded by the connection pool. Waiting for a slot is bounded by
+        LLM_TIMEOUT_SECONDS.
+
+        Yields:
+            Text fragments in order
+
+        Raises:
+            CircuitOpenError: The backend is known to be down
+            LLMUnavailableError: All attempts failed, or the stream broke off
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError("LLM backend circuit is open")
+        trial = self.breaker.state == "half-open"
+
+        payload = {
+            "prompt": prompt,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }
+        state = self._state()
+        last_error: Exception = None
+        started = False
+
+        try:
+            for attempt in range(settings.LLM_MAX_RETRIES + 1):
+                await self._acquire_slot(state, settings.LLM_TIMEOUT_SECONDS)
+                holding_slot = True
+                try:
+                    async with state.client.stream(
+                        "POST", "/v1/completions", json=payload
+                    ) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            data = line[len("data:"):] if line.startswith("data:") else line
+                            data = data.strip()
+                            if not data:
+                                continue
+                            if data == "[DONE]":
+                                break
+                            text = self._parse(json.loads(data))
+                            if not started:
+                                started = True
+                                self.breaker.record_success()
+                                holding_slot = False
+                                state.semaphore.release()
+                            if text:
+                                yield text
+                    if not started:
+                        self.breaker.record_success()
+                    return
+                except httpx.HTTPStatusError as e:
+                    if e.response.status_code not in self.RETRYABLE_STATUS:
+                        self.breaker.record_success()
+                        raise LLMUnavailableError(f"LLM backend rejected request: {e}") from e
+                    last_error = e
+                except (httpx.TransportError, ValueError) as e:
+                    if started:
+                        raise LLMUnavailableError(f"LLM stream broke off: {e!r}") from e
+                    last_error = e
+                finally:
+                    if holding_slot:
+                        state.semaphore.release()
+
+                if attempt < settings.LLM_MAX_RETRIES:
+                    await asyncio.sleep(
+                        random.uniform(0, settings.LLM_RETRY_BACKOFF_SECONDS * 2**attempt)
+                    )
+
+            self.breaker.record_failure()
+            raise LLMUnavailableError(f"LLM backend request failed: {last_error!r}")
+        finally:
+            # Once text has arrived the outcome is recorded and the trial is over
+            if trial and not started:
+                self.breaker.release_trial()
+
+    @staticmethod
+    async def _acquire_slot(state: _LoopState, timeout: float):
+        """Wait for a concurrency slot, failing fast once the time budget is spent"""
+        try:
+            await asyncio.wait_for(state.semaphore.acquire(), timeout=timeout)
+        except asyncio.TimeoutError as e:
+            raise LLMUnavailableError("No LLM request slot freed up within the deadline") from e
+
+    @staticmethod
+    def _parse(result: Any) -> str:
+        """Text of a completion or stream chunk, ValueError if it is malformed"""
+        choices = result.get("choices") if isinstance(result, dict) else None
+        if not isinstance(choices, list) or not choices or not isinstance(choices[0], dict):
+            raise ValueError(f"Malformed LLM response: {str(result)[:200]}")
+        text = choices[0].get("text", "")
+        if not isinstance(text, str):
+            raise ValueError(f"Malformed LLM response text: {text!r}")
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        """Circuit breaker state"""
+        return {
+            "circuit": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+        }
+
+    async def aclose(self):
+        """Close the connection pool for the running loop"""
+        loop = asyncio.get_running_loop()
+        state = self._states.pop(loop, None)
+        if state is not None:
+            await state.client.aclose()
+
+
+# Shared client for the whole process
+llm_client = LLMClient()
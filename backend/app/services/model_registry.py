@@ -0,0 +1,92 @@
+"""
+Process-wide registry for ML models shared across services
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict
+
+
+def _resident_bytes() -> int:
+    """Current resident set size of this process (0 if unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def _parameter_bytes(model: Any) -> int:
+    """Size of a torch model's parameters and buffers (0 for other models)"""
+    total = 0
+    for attr in ("parameters", "buffers"):
+        tensors = getattr(model, attr, None)
+        if callable(tensors):
+            total += sum(t.numel() * t.element_size() for t in tensors())
+    return total
+
+
+class ModelRegistry:
+    """Loads each model at most once per process and shares it across services"""
+
+    def __init__(self):
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, loader: Callable[[], Any]) -> Any:
+        """
+        Return the model registered under name, loading it on first use
+
+        Args:
+            name: Registry key (usually the model identifier)
+            loader: Zero-argument callable that builds the model
+
+        Returns:
+            The shared model instance
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            # Another thread may have finished loading while we waited
+            if name in self._models:
+                return self._models[name]
+
+            rss_before = _resident_bytes()
+            start = time.perf_counter()
+            model = loader()
+            load_seconds = time.perf_counter() - start
+
+            self._models[name] = model
+            self._stats[name] = {
+                "load_seconds": round(load_seconds, 3),
+                "parameter_bytes": _parameter_bytes(model),
+                "rss_delta_bytes": max(_resident_bytes() - rss_before, 0),
+            }
+            print(f"📦 Loaded model {name} in {load_seconds:.2f}s")
+            return model
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether a model has already been loaded"""
+        return name in self._models
+
+    def stats(self) -> Dict[str, Any]:
+        """Load time and memory footprint for every loaded model"""
+        return {
+            "loaded": list(self._models),
+            "process_rss_bytes": _resident_bytes(),
+            "models": dict(self._stats),
+        }
+
+    def clear(self):
+        """Drop all loaded models (mainly for tests)"""
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+
+# Shared registry for the whole process
+model_registry = ModelRegistry()
@@ -2,12 +2,31 @@
 Note service for business logic
 """
 
-from sqlalchemy.orm import Session
+import asyncio
+import uuid
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.bulk import iter_ndjson, validate_items
+from app.core.config import settings
+from app.core.pagination import paginate
 from app.models.models import Note
-from app.schemas.schemas import NoteCreate, NoteUpdate
+from app.schemas.schemas import BulkItemResult, NoteCreate, NoteResponse, NoteUpdate
+from app.services.chunk_service import chunk_service
 from app.services.embedding_service import EmbeddingService
-from app.services.ai_service import AIService
-from typing import Optional, List
+from app.services.facet_service import FACETED_FIELDS, facet_service, tag_filter
+from app.services.summary_pipeline import SUMMARY_PENDING, summary_pipeline
+from app.services.sync_service import (
+    SYNC_CREATE,
+    SYNC_DELETE,
+    SYNC_UPDATE,
+    record_change,
+    record_changes,
+)
+from app.services.suggest_index import SUGGESTED_FIELDS, suggest_index
+from app.services.vector_index import vector_indexes
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+
+SUMMARY_POLL_INTERVAL = 0.25  # Seconds between checks while long-polling a summary
 
 
 class NoteService:
@@ -15,92 +34,208 @@ class NoteService:
 
     def __init__(self):
         self.embedding_service = EmbeddingService()
-        self.ai_service = AIService()
 
-    async def create_note(self, db: Session, note: NoteCreate) -> Note:
+    async def create_note(
+        self, db: AsyncSession, note: NoteCreate, device_id: Optional[str] = None
+    ) -> Note:
         """Create a new note"""
         # Generate embedding for semantic search
         embedding = await self.embedding_service.get_embedding(note.title)
 
-        # Generate AI summary
-        try:
-            summary_result = await self.ai_service.summarize(note.content, max_points=5)
-            summary = summary_result.summary
-        except Exception:
-            summary = None
-
         db_note = Note(
+            id=str(uuid.uuid4()),
             title=note.title,
             content=note.content,
-            summary=summary,
+            summary_status=SUMMARY_PENDING,
             category=note.category,
             tags=note.tags,
             embedding=embedding,
         )
         db.add(db_note)
-        db.commit()
-        db.refresh(db_note)
+        chunks = await chunk_service.rechunk(
+            db, "note", {db_note.id: note.content}, created=True
+        )
+        await facet_service.refacet(
+            db, "note", {db_note.id: (note.category, note.tags)}, created=True
+        )
+        record_change(db, "note", db_note.id, SYNC_CREATE, device_id)
+        await db.commit()
+        await db.refresh(db_note)
+        vector_indexes["note"].upsert(db_note.id, embedding)
+        chunks.apply()
+        suggest_index.upsert("note", db_note.id, db_note.title, db_note.category, db_note.tags)
+
+        # AI summary is generated in the background
+        summary_pipeline.enqueue(db_note.id)
         return db_note
 
+    async def bulk_create_notes(
+        self, db: AsyncSession, items: List[Dict[str, Any]], device_id: Optional[str] = None
+    ) -> List[BulkItemResult]:
+        """
+        Create many notes with one embedding batch and one INSERT
+
+        Invalid items are reported in the results and skipped; the rest are
+        committed together and queued for background summarization.
+        """
+        valid, errors = validate_items(NoteCreate, items)
+        embeddings = await self.embedding_service.get_embeddings_batch(
+            [note.title for _, note in valid]
+        )
+
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "title": note.title,
+                "content": note.content,
+                "summary_status": SUMMARY_PENDING,
+                "category": note.category,
+                "tags": note.tags,
+                "embedding": embedding,
+            }
+            for (_, note), embedding in zip(valid, embeddings)
+        ]
+        if rows:
+            await db.execute(insert(Note), rows)
+            chunks = await chunk_service.rechunk(
+                db, "note", {row["id"]: row["content"] for row in rows}, created=True
+            )
+            await facet_service.refacet(
+                db,
+                "note",
+                {row["id"]: (row["category"], row["tags"]) for row in rows},
+                created=True,
+            )
+            await record_changes(db, "note", [row["id"] for row in rows], SYNC_CREATE, device_id)
+            await db.commit()
+            chunks.apply()
+            for row in rows:
+                vector_indexes["note"].upsert(row["id"], row["embedding"])
+                suggest_index.upsert(
+                    "note", row["id"], row["title"], row["category"], row["tags"]
+                )
+                summary_pipeline.enqueue(row["id"])
+
+        ids = {index: row["id"] for (index, _), row in zip(valid, rows)}
+        return [
+            BulkItemResult(index=index, id=ids.get(index), error=errors.get(index))
+            for index in range(len(items))
+        ]
+
+    def export_notes(
+        self, db: AsyncSession, category: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Stream notes as NDJSON in creation order"""
+        query = select(Note)
+        if category:
+            query = query.where(Note.category == category)
+        return iter_ndjson(
+            db,
+            query, Note.created_at, Note.id, NoteResponse, settings.EXPORT_BATCH_SIZE
+        )
+
     async def list_notes(
         self,
-        db: Session,
+        db: AsyncSession,
         skip: int = 0,
         limit: int = 10,
         category: Optional[str] = None,
-    ) -> List[Note]:
-        """List notes with optional filtering"""
-        query = db.query(Note)
+        cursor: Optional[str] = None,
+        tags: Optional[List[str]] = None,
+    ) -> Tuple[List[Note], Optional[str]]:
+        """
+        List notes with optional filtering, returning the page and next cursor
+
+        With several tags, only notes carrying all of them are listed.
+        """
+        query = select(Note)
 
         if category:
-            query = query.filter(Note.category == category)
+            query = query.where(Note.category == category)
+
+        if tags:
+            query = query.where(*tag_filter(Note, "note", tags))
 
-        return query.offset(skip).limit(limit).all()
+        return await paginate(
+            db,
+            query, Note.created_at, Note.id, "created_at", limit, cursor, skip, nullable=False
+        )
 
-    async def get_note(self, db: Session, note_id: str) -> Optional[Note]:
+    async def get_note(self, db: AsyncSession, note_id: str) -> Optional[Note]:
         """Get a specific note"""
-        return db.query(Note).filter(Note.id == note_id).first()
+        return await db.get(Note, note_id)
+
+    async def get_summary(
+        self, db: AsyncSession, note_id: str, wait: float = 0
+    ) -> Optional[Note]:
+        """Get a note, waiting up to `wait` seconds for a pending summary"""
+        db_note = await db.get(Note, note_id)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + wait
+        while db_note and db_note.summary_status == SUMMARY_PENDING and loop.time() < deadline:
+            await asyncio.sleep(min(SUMMARY_POLL_INTERVAL, deadline - loop.time()))
+            await db.refresh(db_note)
+        return db_note
 
     async def update_note(
-        self, db: Session, note_id: str, note_update: NoteUpdate
+        self,
+        db: AsyncSession,
+        note_id: str,
+        note_update: NoteUpdate,
+        device_id: Optional[str] = None,
     ) -> Optional[Note]:
         """Update a note"""
-        db_note = db.query(Note).filter(Note.id == note_id).first()
+        db_note = await db.get(Note, note_id)
         if not db_note:
             return None
 
         update_data = note_update.model_dump(exclude_unset=True)
 
-        # Regenerate embedding if title or content changed
-        if "title" in update_data or "content" in update_data:
-            title = update_data.get("title", db_note.title)
-            embedding = await self.embedding_service.get_embedding(title)
+        # Regenerate embedding only if the embedded text actually changed
+        if "title" in update_data and update_data["title"] != db_note.title:
+            embedding = await self.embedding_service.get_embedding(update_data["title"])
             update_data["embedding"] = embedding
 
-            # Regenerate summary if content changed
-            if "content" in update_data:
-                try:
-                    summary_result = await self.ai_service.summarize(
-                        update_data["content"], max_points=5
-                    )
-                    update_data["summary"] = summary_result.summary
-                except Exception:
-                    pass
+        # Regenerate summary in the background and re-embed the changed
+        # windows of the content if it changed
+        chunks = None
+        if "content" in update_data and update_data["content"] != db_note.content:
+            update_data["summary_status"] = SUMMARY_PENDING
+            chunks = await chunk_service.rechunk(db, "note", {note_id: update_data["content"]})
 
         for field, value in update_data.items():
             setattr(db_note, field, value)
-
-        db.commit()
-        db.refresh(db_note)
+        if update_data.keys() & FACETED_FIELDS:
+            await facet_service.refacet(db, "note", {note_id: (db_note.category, db_note.tags)})
+
+        record_change(db, "note", note_id, SYNC_UPDATE, device_id)
+        await db.commit()
+        await db.refresh(db_note)
+        if "embedding" in update_data:
+            vector_indexes["note"].upsert(db_note.id, update_data["embedding"])
+        if update_data.keys() & SUGGESTED_FIELDS:
+            suggest_index.upsert("note", db_note.id, db_note.title, db_note.category, db_note.tags)
+        if chunks:
+            chunks.apply()
+        if "summary_status" in update_data:
+            summary_pipeline.enqueue(db_note.id)
         return db_note
 
-    async def delete_note(self, db: Session, note_id: str) -> bool:
+    async def delete_note(
+        self, db: AsyncSession, note_id: str, device_id: Optional[str] = None
+    ) -> bool:
         """Delete a note"""
-        db_note = db.query(Note).filter(Note.id == note_id).first()
+        db_note = await db.get(Note, note_id)
         if not db_note:
             return False
 
-        db.delete(db_note)
-        db.commit()
+        await db.delete(db_note)
+        chunks = await chunk_service.rechunk(db, "note", {note_id: None})
+        await facet_service.refacet(db, "note", {note_id: None})
+        record_change(db, "note", note_id, SYNC_DELETE, device_id)
+        await db.commit()
+        vector_indexes["note"].remove(note_id)
+        suggest_index.remove("note", note_id)
+        chunks.apply()
         return True
 
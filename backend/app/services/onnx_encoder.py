@@ -0,0 +1,173 @@
+"""
+Sentence embeddings on ONNX Runtime instead of PyTorch
+
+The transformer of a sentence-transformers model is exported to ONNX once
+(this step needs torch) together with its tokenizer and pooling settings.
+Serving from the export only needs onnxruntime and tokenizers: the graph
+runs with all ONNX Runtime graph optimizations, optionally from a copy with
+dynamically int8-quantized weights.
+"""
+
+import inspect
+import json
+import os
+from typing import List, Union
+
+import numpy as np
+
+from app.core.config import settings
+
+MODEL_FILE = "model.onnx"
+QUANTIZED_MODEL_FILE = "model.int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "encoder.json"
+
+
+def model_dir(model_name: str) -> str:
+    """Directory holding the ONNX export of a model under EMBEDDING_ONNX_PATH"""
+    return os.path.join(settings.EMBEDDING_ONNX_PATH, model_name.replace("/", "--"))
+
+
+def export_model(model_name: str, directory: str):
+    """Export a sentence-transformers model for OnnxEncoder (requires torch)"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize, Pooling
+
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0]
+    pooling = next(module for module in model if isinstance(module, Pooling))
+    tokenizer = transformer.tokenizer
+    os.makedirs(directory, exist_ok=True)
+    tokenizer.save_pretrained(directory)
+
+    sample = tokenizer(["export"], return_tensors="pt")
+    input_names = [
+        name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample
+    ]
+    axes = {0: "batch", 1: "sequence"}
+    options = {}
+    if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+        # Newer torch defaults to the dynamo exporter, which needs onnxscript
+        options["dynamo"] = False
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer.auto_model.eval(),
+            tuple(sample[name] for name in input_names),
+            os.path.join(directory, MODEL_FILE),
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: axes for name in input_names + ["last_hidden_state"]},
+            opset_version=14,
+            **options,
+        )
+
+    if pooling.pooling_mode_cls_token:
+        mode = "cls"
+    elif pooling.pooling_mode_max_tokens:
+        mode = "max"
+    else:
+        mode = "mean"
+    config = {
+        "model": model_name,
+        "dim": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "pooling": mode,
+        "normalize": any(isinstance(module, Normalize) for module in model),
+    }
+    with open(os.path.join(directory, CONFIG_FILE), "w") as f:
+        json.dump(config, f, indent=2)
+
+
+def quantize_model(directory: str):
+    """Write a copy of an export with dynamically int8-quantized weights"""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    quantize_dynamic(
+        os.path.join(directory, MODEL_FILE),
+        os.path.join(directory, QUANTIZED_MODEL_FILE),
+        weight_type=QuantType.QInt8,
+    )
+
+
+class OnnxEncoder:
+    """Drop-in for SentenceTransformer.encode() backed by an ONNX Runtime session"""
+
+    def __init__(self, directory: str, quantized: bool = False, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(directory, CONFIG_FILE)) as f:
+            self.config = json.load(f)
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(directory, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"]
+        )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        model_file = QUANTIZED_MODEL_FILE if quantized else MODEL_FILE
+        self.session = ort.InferenceSession(
+            os.path.join(directory, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dim"]
+
+    def encode(self, texts: Union[str, List[str]], convert_to_tensor: bool = False, **kwargs):
+        """Embed one text (1-D array) or a list of texts (2-D array)"""
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.zeros((0, self.config["dim"]), dtype=np.float32)
+
+        encodings = self.tokenizer.encode_batch(batch)
+        mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {
+            "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+            "attention_mask": mask,
+            "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+        }
+        feeds = {name: value for name, value in feeds.items() if name in self.input_names}
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+        if self.config["pooling"] == "cls":
+            embeddings = hidden[:, 0]
+        elif self.config["pooling"] == "max":
+            embeddings = np.where(mask[:, :, None] > 0, hidden, -1e9).max(axis=1)
+        else:
+            weights = mask[:, :, None].astype(np.float32)
+            embeddings = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        if self.config["normalize"]:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+
+        embeddings = embeddings.astype(np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load_onnx_encoder() -> OnnxEncoder:
+    """
+    Load the configured model on ONNX Runtime
+
+    Exports (and quantizes) it on first use if EMBEDDING_ONNX_PATH has no
+    export yet; exporting needs torch, later starts do not.
+    """
+    # Fail before a costly export if the runtime itself is missing
+    import onnxruntime  # noqa: F401
+
+    directory = model_dir(settings.EMBEDDING_MODEL)
+    if not os.path.exists(os.path.join(directory, CONFIG_FILE)):
+        print(f"Exporting {settings.EMBEDDING_MODEL} to ONNX in {directory}")
+        export_model(settings.EMBEDDING_MODEL, directory)
+    quantized = settings.EMBEDDING_ONNX_QUANTIZE
+    if quantized and not os.path.exists(os.path.join(directory, QUANTIZED_MODEL_FILE)):
+        quantize_model(directory)
+    return OnnxEncoder(directory, quantized=quantized, threads=settings.EMBEDDING_ONNX_THREADS)
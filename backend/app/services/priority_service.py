@@ -0,0 +1,259 @@
+"""
+Server-side task prioritization
+
+Every open task has an urgency score built from due-date proximity, priority
+and staleness, computed with numpy over whole arrays of tasks. The score is
+stored in tasks.ai_priority_score whenever a task is written, and refreshed
+for all open tasks periodically because deadlines draw nearer and untouched
+tasks go stale without any write. Listing by that column is then an index
+range scan. Completed tasks have no score.
+
+Similarity to the user's current focus depends on the request, so it is not
+stored: a focus query re-ranks the open tasks at request time.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from typing import List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import Float, bindparam, false, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.pagination import paginate
+from app.models.models import Task
+from app.services.embedding_service import EmbeddingService
+
+DUE_WEIGHT = 0.5
+PRIORITY_WEIGHT = 0.3
+STALENESS_WEIGHT = 0.2
+FOCUS_WEIGHT = 0.3
+# A task due in this many hours scores half as urgent as one due now or overdue
+DUE_HALF_SCORE_HOURS = 48.0
+# Days untouched after which a task has ~63% of the full staleness score
+STALENESS_DAYS = 14.0
+MAX_PRIORITY = 3
+# Stored scores are only rewritten when they moved by more than this
+SCORE_EPSILON = 1e-3
+
+_tasks = Task.__table__
+# Skips tasks written since their score was read: the writer stored a fresh
+# score. updated_at is set to itself so the column's onupdate doesn't fire.
+_RESCORE = (
+    _tasks.update()
+    .where(
+        _tasks.c.id == bindparam("task_id"),
+        _tasks.c.ai_priority_score.is_not_distinct_from(bindparam("old_score", type_=Float)),
+    )
+    .values(ai_priority_score=bindparam("new_score", type_=Float), updated_at=_tasks.c.updated_at)
+)
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _hours_until(due_dates: Sequence[Optional[datetime]], now: datetime) -> np.ndarray:
+    return np.array(
+        [
+            (_naive_utc(due) - now).total_seconds() / 3600 if due is not None else np.nan
+            for due in due_dates
+        ],
+        dtype=np.float64,
+    )
+
+
+def _days_since(times: Sequence[Optional[datetime]], now: datetime) -> np.ndarray:
+    return np.array(
+        [(now - _naive_utc(t)).total_seconds() / 86400 if t is not None else 0.0 for t in times],
+        dtype=np.float64,
+    )
+
+
+def urgency_scores(
+    due_hours: np.ndarray,
+    priorities: np.ndarray,
+    idle_days: np.ndarray,
+    focus_similarity: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """
+    Urgency of many tasks at once; higher is more urgent
+
+    Args:
+        due_hours: Hours until each task is due (negative if overdue, NaN if no due date)
+        priorities: Task priority levels (0-3)
+        idle_days: Days since each task was last changed
+        focus_similarity: Cosine similarity of each task to the current focus
+    """
+    due_hours = np.asarray(due_hours, dtype=np.float64)
+    remaining = np.clip(np.nan_to_num(due_hours), 0.0, None)
+    due = np.where(
+        np.isnan(due_hours), 0.0, DUE_HALF_SCORE_HOURS / (DUE_HALF_SCORE_HOURS + remaining)
+    )
+    priority = np.clip(np.asarray(priorities, dtype=np.float64), 0, MAX_PRIORITY) / MAX_PRIORITY
+    idle_days = np.clip(np.asarray(idle_days, dtype=np.float64), 0.0, None)
+    staleness = 1.0 - np.exp(-idle_days / STALENESS_DAYS)
+
+    scores = DUE_WEIGHT * due + PRIORITY_WEIGHT * priority + STALENESS_WEIGHT * staleness
+    if focus_similarity is not None:
+        scores += FOCUS_WEIGHT * np.clip(np.asarray(focus_similarity, dtype=np.float64), 0.0, 1.0)
+    return scores
+
+
+def task_scores(
+    tasks: Sequence,
+    now: Optional[datetime] = None,
+    focus_similarity: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Current urgency of tasks (anything with due_date, priority and updated_at)"""
+    now = now or datetime.utcnow()
+    return urgency_scores(
+        _hours_until([t.due_date for t in tasks], now),
+        np.array([t.priority or 0 for t in tasks]),
+        _days_since([t.updated_at for t in tasks], now),
+        focus_similarity,
+    )
+
+
+def written_scores(
+    due_dates: Sequence[Optional[datetime]],
+    priorities: Sequence[Optional[int]],
+    completed: Optional[Sequence[bool]] = None,
+) -> List[Optional[float]]:
+    """Scores to store for tasks being written now (so not stale); None when completed"""
+    now = datetime.utcnow()
+    scores = urgency_scores(
+        _hours_until(due_dates, now),
+        np.array([p or 0 for p in priorities]),
+        np.zeros(len(due_dates)),
+    )
+    completed = completed or [False] * len(due_dates)
+    return [None if done else float(score) for score, done in zip(scores, completed)]
+
+
+def score_written_task(task: Task):
+    """Set the stored score of a task that is being created or changed"""
+    task.ai_priority_score = written_scores([task.due_date], [task.priority], [task.completed])[0]
+
+
+class PriorityService:
+    """Service ranking open tasks by urgency"""
+
+    def __init__(self):
+        self.embedding_service = EmbeddingService()
+
+    async def rescore(self, db: AsyncSession, batch_size: int = 500) -> int:
+        """
+        Recompute the stored score of every open task
+
+        Only scores that moved are written back, one executemany per batch.
+        updated_at is left as it was: rescoring is not an edit, so it must
+        not reset staleness or make devices see a sync conflict.
+
+        Returns:
+            Number of tasks whose score changed
+        """
+        now = datetime.utcnow()
+        changed, last_id = 0, ""
+        while True:
+            rows = (
+                await db.execute(
+                    select(
+                        Task.id,
+                        Task.due_date,
+                        Task.priority,
+                        Task.updated_at,
+                        Task.ai_priority_score,
+                    )
+                    .where(Task.completed == false(), Task.id > last_id)
+                    .order_by(Task.id)
+                    .limit(batch_size)
+                )
+            ).all()
+            if not rows:
+                return changed
+
+            scores = task_scores(rows, now)
+            stored = np.array(
+                [np.nan if r.ai_priority_score is None else r.ai_priority_score for r in rows]
+            )
+            moved = np.flatnonzero(~(np.abs(scores - stored) <= SCORE_EPSILON))
+            if moved.size:
+                await db.execute(
+                    _RESCORE,
+                    [
+                        {
+                            "task_id": rows[i].id,
+                            "old_score": rows[i].ai_priority_score,
+                            "new_score": float(scores[i]),
+                        }
+                        for i in moved
+                    ],
+                )
+                await db.commit()
+                changed += int(moved.size)
+            last_id = rows[-1].id
+
+    async def run(self):
+        """Rescore open tasks at startup and then every PRIORITY_RESCORE_SECONDS"""
+        while True:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await self.rescore(db)
+            except Exception as e:
+                print(f"Warning: Task rescoring failed: {e}")
+            if settings.PRIORITY_RESCORE_SECONDS <= 0:
+                return
+            await asyncio.sleep(settings.PRIORITY_RESCORE_SECONDS)
+
+    async def rank_open_tasks(
+        self, db: AsyncSession, limit: int, focus: Optional[str] = None
+    ) -> List[Task]:
+        """
+        The most urgent open tasks
+
+        Without a focus this reads the stored scores in index order. With a
+        focus, every open task is re-scored with its similarity to the focus
+        text in one vectorized pass.
+        """
+        if not focus:
+            tasks, _ = await paginate(
+                db,
+                select(Task).where(Task.completed == false()),
+                Task.ai_priority_score,
+                Task.id,
+                "ai_priority",
+                limit,
+                descending=True,
+            )
+            return tasks
+
+        rows = (
+            await db.execute(
+                select(Task.id, Task.due_date, Task.priority, Task.updated_at, Task.embedding)
+                .where(Task.completed == false())
+            )
+        ).all()
+        if not rows:
+            return []
+
+        query = np.asarray(await self.embedding_service.get_embedding(focus), dtype=np.float32)
+        matrix = np.zeros((len(rows), query.size), dtype=np.float32)
+        for i, row in enumerate(rows):
+            if row.embedding is not None and len(row.embedding) == query.size:
+                matrix[i] = row.embedding
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        similarity = np.divide(matrix @ query, norms, out=np.zeros(len(rows)), where=norms > 0)
+
+        scores = task_scores(rows, focus_similarity=similarity)
+        top = [rows[i].id for i in np.argsort(-scores, kind="stable")[:limit]]
+        tasks = {task.id: task for task in await db.scalars(select(Task).where(Task.id.in_(top)))}
+        return [tasks[task_id] for task_id in top if task_id in tasks]
+
+
+priority_service = PriorityService()
@@ -0,0 +1,82 @@
+"""
+Caches in front of semantic search
+
+Mobile clients repeat a handful of queries and type-ahead sends prefix after
+prefix, so SearchService keeps two in-process caches:
+
+- query embeddings, keyed on the normalized query text, so a repeated query
+  skips the model forward pass;
+- whole result lists, keyed on the normalized query, the search parameters
+  and a state token. The token holds the version of every vector store the
+  search read and a write generation per entity type. Every task/note write
+  is recorded in the sync log (record_change), which marks its session. The
+  generation is bumped when that session commits, so a cached result is
+  never served after a commit that could change it. Searches that started
+  before the commit were keyed on the old generation and can't be found.
+
+Writes made by other workers reach this worker's vector stores only when
+they are rebuilt, which changes their version. SEARCH_RESULT_CACHE_TTL_SECONDS
+bounds how long a result may miss another worker's keyword-visible change.
+"""
+
+from collections import defaultdict
+from typing import Dict, Hashable, Iterable, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core.cache import TieredCache
+from app.core.config import settings
+from app.services.vector_index import chunk_indexes, vector_indexes
+
+# Session.info key collecting the entity types written in the open transaction
+_CHANGED = "search_cache_changed"
+
+_generations: Dict[str, int] = defaultdict(int)
+
+# Local tier only: results depend on this worker's index state
+query_embedding_cache = TieredCache("query_embeddings", maxsize=settings.SEARCH_QUERY_CACHE_SIZE)
+search_result_cache = TieredCache(
+    "search_results",
+    maxsize=settings.SEARCH_RESULT_CACHE_SIZE,
+    ttl=settings.SEARCH_RESULT_CACHE_TTL_SECONDS,
+)
+
+
+def normalize_query(query: str) -> str:
+    """
+    Cache key form of a query: case-folded with whitespace collapsed
+
+    The default embedding model lowercases its input and keyword search is
+    case-insensitive, so this doesn't change what the query matches.
+    """
+    return " ".join(query.split()).casefold()
+
+
+def mark_changed(db, entity_type: str):
+    """Invalidate cached results for an entity type once db commits"""
+    db.info.setdefault(_CHANGED, set()).add(entity_type)
+
+
+def state_token(entity_types: Iterable[str]) -> Tuple[Hashable, ...]:
+    """Everything a search over these entity types depends on besides its arguments"""
+    return tuple(
+        (
+            entity_type,
+            _generations[entity_type],
+            vector_indexes[entity_type].version,
+            chunk_indexes[entity_type].version,
+        )
+        for entity_type in entity_types
+    )
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_generations(session):
+    for entity_type in session.info.pop(_CHANGED, ()):
+        _generations[entity_type] += 1
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop(_CHANGED, None)
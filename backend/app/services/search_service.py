@@ -1,87 +1,336 @@
 """
-Search service for semantic search
+Search service for hybrid keyword + semantic search
 """
 
-from sqlalchemy.orm import Session
-from typing import List
-from app.models.models import Task, Note
-from app.schemas.schemas import SemanticSearchResult
+import asyncio
+from collections import defaultdict
+import numpy as np
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Sequence, Tuple
+from app.core.config import settings
+from app.models.fulltext import keyword_search_sql, match_query, search_terms
+from app.models.models import ContentChunk, Task, Note
+from app.schemas.schemas import SemanticSearchResult, Suggestion
 from app.services.embedding_service import EmbeddingService
+from app.services.search_cache import (
+    normalize_query,
+    query_embedding_cache,
+    search_result_cache,
+    state_token,
+)
+from app.services.suggest_index import suggest_index
+from app.services.vector_index import chunk_entity_id, chunk_indexes, chunk_key, vector_indexes
+from app.services.vector_store import SOURCE_CHUNK, SOURCE_TITLE, VectorStore
+
+ENTITY_MODELS = {"task": Task, "note": Note}
+FULLTEXT_DIALECTS = ("sqlite", "postgresql")
+# Chunk hits fetched per wanted entity, since one long text can own several
+CHUNK_OVERFETCH = 4
+
+SEARCH_HYBRID = "hybrid"
+SEARCH_SEMANTIC = "semantic"
+SEARCH_KEYWORD = "keyword"
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int) -> Dict[str, float]:
+    """
+    Fuse ranked id lists: each list adds 1 / (k + rank) to every id it contains
+
+    Only ranks are used, so retrievers with incomparable scores (BM25 and
+    cosine similarity) can be combined without normalizing them.
+    """
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, entity_id in enumerate(ranking, start=1):
+            scores[entity_id] += 1.0 / (k + rank)
+    return scores
+
+
+async def _call(store: VectorStore, method, *args):
+    """Call a vector store method, off the event loop if the store does network I/O"""
+    if store.blocking:
+        return await asyncio.get_running_loop().run_in_executor(None, method, *args)
+    return method(*args)
 
 
 class SearchService:
-    """Service for semantic search operations"""
+    """Service for search operations"""
 
     def __init__(self):
         self.embedding_service = EmbeddingService()
 
+    async def _get_index(self, db: AsyncSession, entity_type: str) -> VectorStore:
+        """Return the vector store for an entity type, (re)building it if needed"""
+        index = vector_indexes[entity_type]
+        if index.is_stale():
+            model = ENTITY_MODELS[entity_type]
+            rows = await db.execute(
+                select(model.id, model.embedding).where(model.embedding.isnot(None))
+            )
+            await _call(index, index.build, rows.all())
+        return index
+
+    async def _get_chunk_index(self, db: AsyncSession, entity_type: str) -> VectorStore:
+        """Return the content chunk vector store for an entity type"""
+        index = chunk_indexes[entity_type]
+        if index.is_stale():
+            rows = await db.execute(
+                select(ContentChunk.entity_id, ContentChunk.content_hash, ContentChunk.embedding)
+                .where(ContentChunk.entity_type == entity_type)
+                .where(ContentChunk.embedding.isnot(None))
+            )
+            items = [
+                (chunk_key(entity_id, content_hash), embedding)
+                for entity_id, content_hash, embedding in rows
+            ]
+            await _call(index, index.build, items)
+        return index
+
+    async def _vector_hits(
+        self, db: AsyncSession, entity_type: str, query_embedding, limit: int
+    ) -> List[Tuple[str, float]]:
+        """
+        Entities most similar to the query as (id, similarity), best first
+
+        An entity's similarity is the best of its title and its content chunks,
+        so a match deep inside a long note counts as much as a title match.
+        """
+        threshold = settings.SEARCH_SIMILARITY_THRESHOLD
+        index = await self._get_index(db, entity_type)
+        best = dict(
+            await self._search_store(
+                db, index, entity_type, SOURCE_TITLE, query_embedding, limit, threshold
+            )
+        )
+
+        chunks = await self._get_chunk_index(db, entity_type)
+        chunk_hits = await self._search_store(
+            db,
+            chunks,
+            entity_type,
+            SOURCE_CHUNK,
+            query_embedding,
+            limit * CHUNK_OVERFETCH,
+            threshold,
+        )
+        for key, similarity in chunk_hits:
+            entity_id = chunk_entity_id(key)
+            if similarity > best.get(entity_id, -1.0):
+                best[entity_id] = similarity
+
+        return sorted(best.items(), key=lambda hit: hit[1], reverse=True)[:limit]
+
+    async def _search_store(
+        self,
+        db: AsyncSession,
+        store: VectorStore,
+        entity_type: str,
+        source: str,
+        query_embedding,
+        limit: int,
+        threshold: float,
+    ) -> List[Tuple[str, float]]:
+        """
+        Search one vector store as (key, cosine similarity), best first
+
+        Quantized stores only estimate similarity from their codes, so they
+        are asked for rescore_factor times more candidates, which are then
+        rescored exactly against the embeddings stored in the database
+        (loaded by primary key).
+        """
+        if not store.approximate:
+            return await _call(store, store.search, query_embedding, limit, threshold)
+
+        candidates = await _call(
+            store, store.search, query_embedding, limit * store.rescore_factor
+        )
+        if not candidates:
+            return []
+        keys, embeddings = await self._stored_embeddings(
+            db, entity_type, source, [key for key, _ in candidates]
+        )
+        if not keys:
+            return []
+
+        matrix = np.stack([np.asarray(e, dtype=np.float32) for e in embeddings])
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        scores = np.divide(matrix @ query, norms, out=np.zeros(len(keys)), where=norms > 0)
+        hits = [(key, float(score)) for key, score in zip(keys, scores) if score > threshold]
+        return sorted(hits, key=lambda hit: hit[1], reverse=True)[:limit]
+
+    async def _stored_embeddings(
+        self, db: AsyncSession, entity_type: str, source: str, keys: List[str]
+    ) -> Tuple[List[str], list]:
+        """Full-precision embeddings of vector store keys, as (keys, embeddings)"""
+        if source == SOURCE_CHUNK:
+            # A primary-key prefix search; rows of other chunks of the same
+            # entities are dropped below
+            wanted = set(keys)
+            rows = await db.execute(
+                select(ContentChunk.entity_id, ContentChunk.content_hash, ContentChunk.embedding)
+                .where(ContentChunk.entity_type == entity_type)
+                .where(ContentChunk.entity_id.in_({chunk_entity_id(key) for key in keys}))
+            )
+            rows = [(chunk_key(entity_id, h), e) for entity_id, h, e in rows if e is not None]
+            rows = [(key, e) for key, e in rows if key in wanted]
+        else:
+            model = ENTITY_MODELS[entity_type]
+            rows = await db.execute(select(model.id, model.embedding).where(model.id.in_(keys)))
+            rows = [(key, e) for key, e in rows if e is not None]
+        return [key for key, _ in rows], [embedding for _, embedding in rows]
+
+    async def _query_embedding(self, query: str) -> List[float]:
+        """Embedding of a normalized query, from the query cache when possible"""
+        embedding = await query_embedding_cache.get(query)
+        if embedding is None:
+            embedding = await self.embedding_service.get_embedding(query)
+            await query_embedding_cache.set(query, embedding)
+        return embedding
+
+    async def warmup(self, queries: Sequence[str]):
+        """Precompute the embeddings of common queries in one batch"""
+        queries = list(dict.fromkeys(normalize_query(q) for q in queries if q.strip()))
+        embeddings = await self.embedding_service.get_embeddings_batch(queries)
+        await query_embedding_cache.set_many(dict(zip(queries, embeddings)))
+
+    async def _keyword_hits(
+        self, db: AsyncSession, entity_type: str, query: str, limit: int
+    ) -> List[Tuple[str, float]]:
+        """Best full-text matches for an entity type as (id, score), best first"""
+        terms = search_terms(query)
+        dialect = db.get_bind().dialect.name
+        if not terms or dialect not in FULLTEXT_DIALECTS:
+            return []
+        table = ENTITY_MODELS[entity_type].__tablename__
+        statement = text(keyword_search_sql(table, dialect)).bindparams(
+            bindparam("query", match_query(terms, dialect)), bindparam("limit", limit)
+        )
+        return [(row.id, row.score) for row in await db.execute(statement)]
+
     async def semantic_search(
         self,
-        db: Session,
+        db: AsyncSession,
         query: str,
         entity_type: str = "all",
         limit: int = 10,
+        mode: str = SEARCH_HYBRID,
     ) -> List[SemanticSearchResult]:
         """
-        Perform semantic search across tasks and notes
-        
+        Search tasks and notes by meaning, by keyword, or both
+
+        In hybrid mode the top candidates of the full-text index (BM25 on
+        SQLite) and of the vector index are fused by reciprocal rank, so exact
+        terms such as ticket numbers or names rank first even when their
+        embedding is not close to the query's. Only the final `limit` rows
+        are loaded from the database.
+
+        Queries are normalized (see normalize_query) and whole result lists
+        are cached until a task/note write commits or a vector store used by
+        the search changes (see search_cache).
+
         Args:
             db: Database session
             query: Search query
             entity_type: 'task', 'note', or 'all'
             limit: Maximum results
-            
+            mode: 'hybrid', 'semantic' (vector only), or 'keyword' (full-text only)
+
         Returns:
-            List of search results sorted by similarity
+            List of search results sorted by score
         """
-        # Generate embedding for query
-        query_embedding = await self.embedding_service.get_embedding(query)
+        query = normalize_query(query)
+        entity_types = [t for t in ENTITY_MODELS if entity_type in (t, "all")]
+        if mode != SEARCH_KEYWORD:
+            # Rebuild stale stores first, so the key holds the versions searched
+            for kind in entity_types:
+                await self._get_index(db, kind)
+                await self._get_chunk_index(db, kind)
+        # Taken before searching: a write committed meanwhile changes the key
+        key = (query, entity_type, limit, mode, state_token(entity_types))
+        results = await search_result_cache.get(key)
+        if results is None:
+            results = await self._search(db, query, entity_types, limit, mode)
+            await search_result_cache.set(key, results)
+        return list(results)
 
-        if not query_embedding:
-            return []
+    async def _search(
+        self, db: AsyncSession, query: str, entity_types: List[str], limit: int, mode: str
+    ) -> List[SemanticSearchResult]:
+        candidates = max(limit, settings.SEARCH_CANDIDATES)
+
+        query_embedding = None
+        if mode != SEARCH_KEYWORD:
+            query_embedding = await self._query_embedding(query)
+            if not query_embedding and mode == SEARCH_SEMANTIC:
+                return []
+
+        ranked: List[Tuple[float, str, str]] = []
+        similarities: Dict[Tuple[str, str], float] = {}
+        for kind in entity_types:
+            vector_hits = []
+            if query_embedding:
+                vector_hits = await self._vector_hits(db, kind, query_embedding, candidates)
+                similarities.update(((kind, i), s) for i, s in vector_hits)
+
+            if mode == SEARCH_SEMANTIC:
+                scores = dict(vector_hits)
+            elif mode == SEARCH_KEYWORD:
+                scores = dict(await self._keyword_hits(db, kind, query, candidates))
+            else:
+                keyword_hits = await self._keyword_hits(db, kind, query, candidates)
+                scores = reciprocal_rank_fusion(
+                    [[i for i, _ in keyword_hits], [i for i, _ in vector_hits]],
+                    settings.SEARCH_RRF_K,
+                )
+            ranked.extend((score, kind, entity_id) for entity_id, score in scores.items())
+
+        ranked.sort(key=lambda hit: hit[0], reverse=True)
+        ranked = ranked[:limit]
+
+        rows = {}
+        for kind in entity_types:
+            hits = [(entity_id, score) for score, k, entity_id in ranked if k == kind]
+            rows[kind] = await self._fetch(db, ENTITY_MODELS[kind], hits)
 
         results = []
+        for score, kind, entity_id in ranked:
+            entity = rows[kind].get(entity_id)
+            if entity is None:
+                continue
+            content = entity.description if kind == "task" else entity.content[:200]
+            results.append(
+                SemanticSearchResult(
+                    entity_type=kind,
+                    entity_id=entity.id,
+                    title=entity.title,
+                    similarity_score=similarities.get((kind, entity_id), 0.0),
+                    score=score,
+                    content=content,
+                )
+            )
+        return results
 
-        # Search tasks
-        if entity_type in ["task", "all"]:
-            tasks = db.query(Task).all()
-            for task in tasks:
-                if task.embedding:
-                    similarity = await self.embedding_service.similarity(
-                        query_embedding, task.embedding
-                    )
-                    if similarity > 0.3:  # Threshold
-                        results.append(
-                            SemanticSearchResult(
-                                entity_type="task",
-                                entity_id=task.id,
-                                title=task.title,
-                                similarity_score=similarity,
-                                content=task.description,
-                            )
-                        )
-
-        # Search notes
-        if entity_type in ["note", "all"]:
-            notes = db.query(Note).all()
-            for note in notes:
-                if note.embedding:
-                    similarity = await self.embedding_service.similarity(
-                        query_embedding, note.embedding
-                    )
-                    if similarity > 0.3:  # Threshold
-                        results.append(
-                            SemanticSearchResult(
-                                entity_type="note",
-                                entity_id=note.id,
-                                title=note.title,
-                                similarity_score=similarity,
-                                content=note.content[:200],  # Truncate for response
-                            )
-                        )
-
-        # Sort by similarity score (descending)
-        results.sort(key=lambda x: x.similarity_score, reverse=True)
-
-        return results[:limit]
+    async def suggest(self, db: AsyncSession, query: str, limit: int = 10) -> List[Suggestion]:
+        """
+        Type-ahead suggestions from task/note titles, categories and tags
+
+        Served from the in-memory prefix index (see suggest_index), which is
+        only loaded from the database on first use and on refresh.
+        """
+        if suggest_index.is_stale():
+            items = []
+            for entity_type, model in ENTITY_MODELS.items():
+                rows = await db.execute(select(model.id, model.title, model.category, model.tags))
+                items.extend((entity_type, *row) for row in rows)
+            suggest_index.build(items)
+        return [Suggestion(**match._asdict()) for match in suggest_index.suggest(query, limit)]
 
+    async def _fetch(self, db: AsyncSession, model, hits) -> dict:
+        """Load only the rows for the top-k hits"""
+        if not hits:
+            return {}
+        ids = [entity_id for entity_id, _ in hits]
+        rows = await db.scalars(select(model).where(model.id.in_(ids)))
+        return {row.id: row for row in rows}
@@ -0,0 +1,228 @@
+"""
+In-memory prefix index for type-ahead suggestions
+
+Task and note titles, categories and tags are kept in two sorted arrays:
+their normalized text, and (word token, ref) pairs. Suggestions starting with
+the typed text, and those with a word starting with the last typed word, are
+then contiguous bisect ranges read in order, so a query costs a binary search
+plus the results it returns. Writes insert or delete single array items;
+nothing touches the embedding model.
+"""
+
+import bisect
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+SUGGEST_CATEGORY = "category"
+SUGGEST_TAG = "tag"
+
+# Entity columns the index is built from
+SUGGESTED_FIELDS = {"title", "category", "tags"}
+
+# Index entries examined per query, which bounds the cost of a one-letter prefix
+SUGGEST_SCAN_LIMIT = 2000
+
+_WORD = re.compile(r"\w+")
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """Case-folded word tokens of a title, category, tag or query"""
+    return _WORD.findall((text or "").casefold())
+
+
+class SuggestMatch(NamedTuple):
+    kind: str  # 'task', 'note', 'category' or 'tag'
+    text: str
+    entity_id: Optional[str]  # For task and note titles
+    count: int  # Items using a category or tag; 1 for titles
+
+
+class _Entry:
+    """One suggestion and how many indexed entities contribute it"""
+
+    __slots__ = ("kind", "text", "entity_id", "normalized", "tokens", "count")
+
+    def __init__(self, kind: str, text: str, entity_id: Optional[str]):
+        self.kind = kind
+        self.text = text
+        self.entity_id = entity_id
+        tokens = tokenize(text)
+        self.normalized = " ".join(tokens)
+        self.tokens = frozenset(tokens)
+        self.count = 0
+
+
+class SuggestIndex:
+    """
+    Sorted prefix arrays over task/note titles, categories and tags
+
+    Categories and tags are one suggestion each, counted across every task
+    and note using them. Like the local vector indexes it is per process,
+    built from the database on first use and rebuilt every
+    SUGGEST_REFRESH_SECONDS to pick up other workers' writes.
+    """
+
+    def __init__(self):
+        self.loaded = False
+        self.loaded_at = 0.0
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._texts: List[Tuple[str, str]] = []
+        self._keys: List[Tuple[str, str]] = []
+        self._entries: Dict[str, _Entry] = {}
+        # (entity_type, id) -> refs of the suggestions the entity contributes
+        self._entities: Dict[Tuple[str, str], List[str]] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        """Drop the contents so the index is rebuilt on next use"""
+        with self._lock:
+            self._reset()
+            self.loaded = False
+
+    def is_stale(self) -> bool:
+        """Whether the index needs build() from the database"""
+        if not self.loaded:
+            return True
+        refresh = settings.SUGGEST_REFRESH_SECONDS
+        return refresh > 0 and time.monotonic() - self.loaded_at > refresh
+
+    @staticmethod
+    def _refs(
+        entity_type: str, entity_id: str, title: str, category: Optional[str], tags
+    ) -> List[Tuple[str, str, str, Optional[str]]]:
+        """(ref, kind, text, entity_id) of every suggestion an entity contributes"""
+        refs = [(f"{entity_type}:{entity_id}", entity_type, title or "", entity_id)]
+        if category and tokenize(category):
+            refs.append(
+                (f"{SUGGEST_CATEGORY}:{category.casefold()}", SUGGEST_CATEGORY, category, None)
+            )
+        unique_tags = {}
+        for tag in tags or []:
+            if isinstance(tag, str) and tokenize(tag):
+                unique_tags.setdefault(tag.casefold(), tag)
+        refs.extend(
+            (f"{SUGGEST_TAG}:{key}", SUGGEST_TAG, tag, None) for key, tag in unique_tags.items()
+        )
+        return refs
+
+    def _add(self, entity_type: str, entity_id: str, title, category, tags) -> List[str]:
+        """Count the entity's suggestions, returning the refs that are new"""
+        refs = self._refs(entity_type, entity_id, title, category, tags)
+        new = []
+        for ref, kind, text, ref_entity_id in refs:
+            entry = self._entries.get(ref)
+            if entry is None:
+                entry = self._entries[ref] = _Entry(kind, text, ref_entity_id)
+                new.append(ref)
+            entry.count += 1
+        self._entities[(entity_type, entity_id)] = [ref for ref, _, _, _ in refs]
+        return new
+
+    def _items(self, refs: Iterable[str]):
+        """(texts, keys) array items of some refs"""
+        texts, keys = [], []
+        for ref in refs:
+            entry = self._entries[ref]
+            texts.append((entry.normalized, ref))
+            keys.extend((token, ref) for token in entry.tokens)
+        return texts, keys
+
+    @staticmethod
+    def _delete(array: List[Tuple[str, str]], item: Tuple[str, str]):
+        position = bisect.bisect_left(array, item)
+        if position < len(array) and array[position] == item:
+            del array[position]
+
+    def _remove(self, entity_type: str, entity_id: str):
+        for ref in self._entities.pop((entity_type, entity_id), []):
+            entry = self._entries[ref]
+            entry.count -= 1
+            if entry.count:
+                continue
+            self._delete(self._texts, (entry.normalized, ref))
+            for token in entry.tokens:
+                self._delete(self._keys, (token, ref))
+            del self._entries[ref]
+
+    def build(self, items: Iterable[Tuple[str, str, str, Optional[str], Sequence[str]]]):
+        """Replace the contents with (entity_type, id, title, category, tags) rows"""
+        with self._lock:
+            self._reset()
+            for entity_type, entity_id, title, category, tags in items:
+                self._add(entity_type, entity_id, title, category, tags)
+            texts, keys = self._items(self._entries)
+            self._texts, self._keys = sorted(texts), sorted(keys)
+            self.loaded = True
+            self.loaded_at = time.monotonic()
+
+    def upsert(
+        self,
+        entity_type: str,
+        entity_id: str,
+        title: str,
+        category: Optional[str],
+        tags: Optional[Sequence[str]],
+    ):
+        """Index the current title, category and tags of a task or note"""
+        with self._lock:
+            self._remove(entity_type, entity_id)
+            texts, keys = self._items(self._add(entity_type, entity_id, title, category, tags))
+            for text in texts:
+                bisect.insort(self._texts, text)
+            for key in keys:
+                bisect.insort(self._keys, key)
+
+    def remove(self, entity_type: str, entity_id: str):
+        """Drop a deleted task or note"""
+        with self._lock:
+            self._remove(entity_type, entity_id)
+
+    def suggest(self, query: str, limit: int) -> List[SuggestMatch]:
+        """
+        Suggestions for a partially typed query, best first
+
+        Suggestions starting with the query come first, then those with a
+        word starting with the last query word whose other words include
+        every earlier query word; each group in alphabetical order.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        prefix, words = tokens[-1], set(tokens[:-1])
+        normalized = " ".join(tokens)
+
+        found: Dict[str, _Entry] = {}
+        with self._lock:
+            position = bisect.bisect_left(self._texts, (normalized,))
+            for text, ref in self._texts[position : position + limit]:
+                if not text.startswith(normalized):
+                    break
+                found[ref] = self._entries[ref]
+
+            position = bisect.bisect_left(self._keys, (prefix,))
+            end = position + SUGGEST_SCAN_LIMIT
+            while len(found) < limit and position < min(end, len(self._keys)):
+                token, ref = self._keys[position]
+                if not token.startswith(prefix):
+                    break
+                entry = self._entries[ref]
+                if ref not in found and words <= entry.tokens:
+                    found[ref] = entry
+                position += 1
+
+        return [
+            SuggestMatch(entry.kind, entry.text, entry.entity_id, entry.count)
+            for entry in found.values()
+        ]
+
+
+suggest_index = SuggestIndex()
@@ -0,0 +1,205 @@
+"""
+Background pipeline for note summarization and content chunk embedding
+"""
+
+import asyncio
+import logging
+from functools import partial
+from typing import Awaitable, Callable, Iterable, List, Optional, Set
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import Note
+from app.services.ai_service import AIService
+from app.services.chunk_service import chunk_service
+from app.services.sync_service import SYNC_UPDATE, record_change
+
+SUMMARY_PENDING = "pending"
+SUMMARY_READY = "ready"
+SUMMARY_FAILED = "failed"
+
+# Bounded so a broker that is down fails over to the local queue quickly
+CELERY_RETRY_POLICY = {
+    "max_retries": 2,
+    "interval_start": 0,
+    "interval_step": 0.2,
+    "interval_max": 0.5,
+}
+
+logger = logging.getLogger(__name__)
+
+
+def _publish_summary(note_id: str):
+    from app.worker import summarize_note
+
+    summarize_note.apply_async((note_id,), retry=True, retry_policy=CELERY_RETRY_POLICY)
+
+
+class SummaryPipeline:
+    """
+    Summarizes notes and embeds content chunks outside the request that wrote them
+
+    Notes are committed with summary_status='pending' and their ids are
+    enqueued here. With SUMMARY_QUEUE='celery' summaries go to the Celery
+    worker (app.worker); otherwise, or if the broker is unreachable, they run
+    on an in-process asyncio queue consumed by workers started in the app
+    lifespan. Chunk embedding always runs in-process, since it fills this
+    worker's in-memory chunk index.
+
+    Queued jobs are lost on restart, but both kinds of work are stored as
+    pending, so the lifespan sweeps them back into the queue at startup.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+        ai_service: AIService = None,
+    ):
+        self.session_factory = session_factory
+        self.ai_service = ai_service or AIService()
+        self._queue: Optional[asyncio.Queue] = None  # (job, description) pairs
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: Set[asyncio.Task] = set()
+        self._detached: Set[asyncio.Task] = set()
+
+    async def start(self, workers: int = None):
+        """Start in-process workers on the running loop"""
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        for _ in range(settings.SUMMARY_WORKERS if workers is None else workers):
+            self._workers.add(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        """Cancel in-process workers"""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._queue = None
+        self._loop = None
+
+    def enqueue(self, note_id: str):
+        """Schedule summarization of a note"""
+        if settings.SUMMARY_QUEUE == "celery":
+            # Publishing blocks on broker connects and retries: keep it off the loop
+            published = asyncio.get_running_loop().run_in_executor(
+                None, _publish_summary, note_id
+            )
+            published.add_done_callback(partial(self._published, note_id))
+            return
+        self._submit_summary(note_id)
+
+    def _published(self, note_id: str, published: asyncio.Future):
+        # A cancelled publish (loop shutting down) is left to the startup sweep
+        error = None if published.cancelled() else published.exception()
+        if error is not None:
+            logger.warning("Could not enqueue summary to Celery, running locally: %s", error)
+            self._submit_summary(note_id)
+
+    def _submit_summary(self, note_id: str):
+        self._submit(partial(self.process, note_id), f"Summary job for note {note_id}")
+
+    def enqueue_chunks(self, entity_type: str, entity_ids: Optional[Iterable[str]] = None):
+        """
+        Schedule embedding of the pending content chunks of some entities (default: all)
+
+        Pending chunks are stored, so without in-process workers (lifespan
+        not run) they are left for the sweep at the next start instead.
+        """
+        ids = None if entity_ids is None else list(entity_ids)
+        self._submit(
+            partial(self.embed_chunks, entity_type, ids),
+            f"Chunk embedding for {entity_type}s",
+            detach=False,
+        )
+
+    def enqueue_pending(self):
+        """Schedule summaries of every note still pending, e.g. after a restart"""
+        self._submit(self._enqueue_pending, "Pending summary sweep", detach=False)
+
+    async def _enqueue_pending(self, batch_size: int = 500):
+        after = ""
+        while True:
+            async with self.session_factory() as db:
+                note_ids = list(
+                    await db.scalars(
+                        select(Note.id)
+                        .where(Note.summary_status == SUMMARY_PENDING, Note.id > after)
+                        .order_by(Note.id)
+                        .limit(batch_size)
+                    )
+                )
+            for note_id in note_ids:
+                self.enqueue(note_id)
+            if len(note_ids) < batch_size:
+                return
+            after = note_ids[-1]
+
+    def _submit(self, job: Callable[[], Awaitable], description: str, detach: bool = True):
+        loop = asyncio.get_running_loop()
+        if self._queue is not None and self._loop is loop:
+            self._queue.put_nowait((job, description))
+        elif detach:
+            # No workers on this loop (e.g. lifespan not run): run detached
+            task = loop.create_task(job())
+            self._detached.add(task)
+            task.add_done_callback(self._detached.discard)
+
+    async def _worker(self):
+        while True:
+            job, description = await self._queue.get()
+            try:
+                await job()
+            except Exception as e:
+                logger.warning("%s failed: %s", description, e)
+            finally:
+                self._queue.task_done()
+
+    async def embed_chunks(self, entity_type: str, entity_ids: Optional[List[str]] = None):
+        """Embed pending content chunks and add them to the chunk index"""
+        async with self.session_factory() as db:
+            await chunk_service.embed_pending(db, entity_type, entity_ids)
+
+    async def process(self, note_id: str):
+        """Summarize a note and store the result"""
+        async with self.session_factory() as db:
+            note = await db.get(Note, note_id)
+            if not note:
+                return
+            content = note.content
+            # Don't hold a connection while waiting on the LLM
+            await db.rollback()
+
+            try:
+                result = await self.ai_service.summarize(content, max_points=5)
+                summary, status = result.summary, SUMMARY_READY
+            except Exception as e:
+                logger.warning("Could not summarize note %s: %s", note_id, e)
+                summary, status = None, SUMMARY_FAILED
+
+            # Skipped if the note was edited or deleted while we were waiting.
+            # updated_at is set to itself so the column's onupdate doesn't
+            # fire: a summary isn't an edit, and bumping it would make devices
+            # pushing with the base_updated_at they synced see a conflict.
+            written = await db.execute(
+                update(Note)
+                .where(Note.id == note_id, Note.content == content)
+                .values(summary=summary, summary_status=status, updated_at=Note.updated_at)
+            )
+            if not written.rowcount:
+                return
+
+            # Devices pick up the summary on their next delta sync
+            record_change(db, "note", note_id, SYNC_UPDATE)
+            await db.commit()
+
+    def pending(self) -> int:
+        """Number of summary and chunk jobs waiting in the in-process queue"""
+        return self._queue.qsize() if self._queue is not None else 0
+
+
+# Shared pipeline for the whole process
+summary_pipeline = SummaryPipeline()
@@ -0,0 +1,413 @@
+"""
+Sync service for incremental multi-device synchronization
+"""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.core.bulk import validation_message
+from app.core.config import settings
+from app.models.models import DeviceSyncLog, Note, Task
+from app.schemas.schemas import (
+    NoteCreate,
+    NoteResponse,
+    NoteUpdate,
+    SyncChange,
+    SyncMutation,
+    SyncMutationResult,
+    TaskCreate,
+    TaskResponse,
+    TaskUpdate,
+)
+from app.services.chunk_service import CHUNKED_COLUMNS, chunk_service
+from app.services.embedding_service import EmbeddingService
+from app.services.facet_service import facet_service
+from app.services.priority_service import score_written_task
+from app.services.search_cache import mark_changed
+from app.services.suggest_index import suggest_index
+from app.services.vector_index import vector_indexes
+
+SYNC_CREATE = "create"
+SYNC_UPDATE = "update"
+SYNC_DELETE = "delete"
+
+PUSH_APPLIED = "applied"
+PUSH_CONFLICT = "conflict"
+PUSH_ERROR = "error"
+
+ENTITY_MODELS = {"task": Task, "note": Note}
+ENTITY_SCHEMAS = {"task": TaskResponse, "note": NoteResponse}
+CREATE_SCHEMAS = {"task": TaskCreate, "note": NoteCreate}
+UPDATE_SCHEMAS = {"task": TaskUpdate, "note": NoteUpdate}
+
+
+def _as_naive_utc(value: datetime) -> datetime:
+    """Timestamps are stored as naive UTC"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def record_change(
+    db: AsyncSession,
+    entity_type: str,
+    entity_id: str,
+    action: str,
+    device_id: Optional[str] = None,
+):
+    """
+    Append a change to the sync log
+
+    The row is added to the caller's session, so it commits (or rolls back)
+    together with the write it describes. Cached search results for the
+    entity type are dropped when it commits.
+    """
+    mark_changed(db, entity_type)
+    db.add(
+        DeviceSyncLog(
+            device_id=device_id,
+            entity_type=entity_type,
+            entity_id=entity_id,
+            action=action,
+        )
+    )
+
+
+async def record_changes(
+    db: AsyncSession,
+    entity_type: str,
+    entity_ids: Iterable[str],
+    action: str,
+    device_id: Optional[str] = None,
+):
+    """Append one change per entity with a single INSERT"""
+    mark_changed(db, entity_type)
+    rows = [
+        {
+            "device_id": device_id,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "action": action,
+        }
+        for entity_id in entity_ids
+    ]
+    if rows:
+        await db.execute(insert(DeviceSyncLog), rows)
+
+
+def settled_entries(
+    entries: List[DeviceSyncLog], since: int, now: datetime, settle_seconds: float
+) -> List[DeviceSyncLog]:
+    """
+    The leading log entries that no uncommitted entry can still precede
+
+    PostgreSQL draws sequence numbers at insert but shows rows at commit, so
+    a reader can see entry 7 before a concurrent transaction commits entry
+    6; a cursor moved past 7 would skip 6 for good. A gap in the numbers is
+    such an in-flight write or a rolled back one, so the entries stop at a
+    gap until the entry after it is `settle_seconds` old, by when the write
+    holding the missing number has committed or failed.
+    """
+    settle = timedelta(seconds=settle_seconds)
+    previous = since
+    for index, entry in enumerate(entries):
+        if entry.id != previous + 1 and entry.synced_at and now - entry.synced_at < settle:
+            return entries[:index]
+        previous = entry.id
+    return entries
+
+
+class SyncService:
+    """Service for delta sync operations"""
+
+    def __init__(self):
+        self.embedding_service = EmbeddingService()
+
+    async def get_changes(
+        self,
+        db: AsyncSession,
+        since: int = 0,
+        device_id: Optional[str] = None,
+        limit: int = 500,
+    ) -> Tuple[List[SyncChange], int, bool]:
+        """
+        Get the latest change to each entity after a sync cursor
+
+        Reads at most `limit` log entries past `since` (a primary-key range
+        scan), keeps only the newest entry per entity, and loads the current
+        state of the surviving entities. Entities created after the cursor
+        are reported as creates, or not at all if already deleted again.
+        Entities whose newest change came from `device_id` are skipped since
+        that device already has them.
+
+        SQLite commits one writer at a time, in sequence order. Elsewhere
+        the cursor only advances to a settled watermark (settled_entries),
+        so recent changes past a gap arrive on a later call.
+
+        Returns:
+            (changes, cursor, has_more) where cursor is the sequence number
+            to pass as `since` next time
+        """
+        entries = list(
+            await db.scalars(
+                select(DeviceSyncLog)
+                .where(DeviceSyncLog.id > since)
+                .order_by(DeviceSyncLog.id.asc())
+                .limit(limit + 1)
+            )
+        )
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+        if db.get_bind().dialect.name != "sqlite":
+            settled = settled_entries(
+                entries,
+                since,
+                await db.scalar(select(func.localtimestamp())),
+                settings.SYNC_GAP_SETTLE_SECONDS,
+            )
+            if len(settled) < len(entries):
+                entries, has_more = settled, False
+        cursor = entries[-1].id if entries else since
+
+        latest: Dict[Tuple[str, str], DeviceSyncLog] = {}
+        created = set()
+        for entry in entries:
+            key = (entry.entity_type, entry.entity_id)
+            if key not in latest and entry.action == SYNC_CREATE:
+                created.add(key)
+            latest[key] = entry
+        if device_id:
+            latest = {key: e for key, e in latest.items() if e.device_id != device_id}
+
+        entities = {}
+        for entity_type, model in ENTITY_MODELS.items():
+            ids = [
+                entity_id
+                for (kind, entity_id), entry in latest.items()
+                if kind == entity_type and entry.action != SYNC_DELETE
+            ]
+            if ids:
+                for entity in await db.scalars(select(model).where(model.id.in_(ids))):
+                    entities[(entity_type, entity.id)] = entity
+
+        changes = []
+        for key, entry in sorted(latest.items(), key=lambda item: item[1].id):
+            entity_type, entity_id = key
+            entity = entities.get(key)
+            if entity is None and key in created:
+                # Created and deleted since the cursor: the device never saw it
+                continue
+            change = SyncChange(
+                seq=entry.id,
+                entity_type=entity_type,
+                entity_id=entity_id,
+                action=SYNC_CREATE if key in created else entry.action,
+            )
+            if entity is None:
+                # Deleted, possibly by a change past this page
+                change.action = SYNC_DELETE
+            else:
+                setattr(change, entity_type, ENTITY_SCHEMAS[entity_type].model_validate(entity))
+            changes.append(change)
+
+        return changes, cursor, has_more
+
+    async def push(
+        self, db: AsyncSession, device_id: str, mutations: List[SyncMutation]
+    ) -> List[SyncMutationResult]:
+        """
+        Apply a device's queued mutations in order, in a single transaction
+
+        Every referenced entity is loaded with one query per entity type and
+        all changed titles are embedded in one batch. A mutation carrying
+        base_updated_at is rejected as a conflict if the entity changed on
+        the server after that time; without it the last writer wins.
+        Creates with an id that already exists are applied as updates, and
+        deletes of missing entities succeed, so a retried push is harmless.
+
+        Returns:
+            One result per mutation, with the entity's state after the push
+        """
+        # Imported here: the summary pipeline records its own sync changes
+        from app.services.summary_pipeline import SUMMARY_PENDING, summary_pipeline
+
+        entities = {}
+        for entity_type, model in ENTITY_MODELS.items():
+            ids = {m.entity_id for m in mutations if m.entity_type == entity_type and m.entity_id}
+            if ids:
+                for entity in await db.scalars(select(model).where(model.id.in_(ids))):
+                    entities[(entity_type, entity.id)] = entity
+
+        results = []
+        log_rows = []
+        to_embed = set()
+        to_chunk = set()
+        to_summarize = set()
+        deleted = set()
+
+        for index, mutation in enumerate(mutations):
+            entity_type = mutation.entity_type
+            result = SyncMutationResult(
+                index=index, entity_id=mutation.entity_id, status=PUSH_APPLIED
+            )
+            results.append(result)
+
+            if mutation.action != SYNC_CREATE and not mutation.entity_id:
+                result.status, result.error = PUSH_ERROR, "entity_id is required"
+                continue
+
+            key = (entity_type, mutation.entity_id)
+            entity = entities.get(key)
+
+            if (
+                entity is not None
+                and mutation.base_updated_at is not None
+                and entity.updated_at is not None
+                and entity.updated_at > _as_naive_utc(mutation.base_updated_at)
+            ):
+                result.status, result.error = PUSH_CONFLICT, "Changed on the server"
+                continue
+
+            if mutation.action == SYNC_DELETE:
+                if entity is not None:
+                    if entity in db.new:
+                        db.expunge(entity)
+                    else:
+                        await db.delete(entity)
+                    del entities[key]
+                    deleted.add(key)
+                    to_chunk.add(key)
+                    log_rows.append((entity_type, mutation.entity_id, SYNC_DELETE))
+                continue
+
+            if mutation.action == SYNC_UPDATE and entity is None:
+                result.status, result.error = PUSH_CONFLICT, f"{entity_type} not found"
+                continue
+
+            schema = CREATE_SCHEMAS if mutation.action == SYNC_CREATE else UPDATE_SCHEMAS
+            try:
+                fields = schema[entity_type].model_validate(mutation.data)
+            except ValidationError as e:
+                result.status, result.error = PUSH_ERROR, validation_message(e)
+                continue
+            fields = fields.model_dump(exclude_unset=entity is not None)
+
+            action = SYNC_UPDATE
+            if entity is None:
+                entity_id = mutation.entity_id or str(uuid.uuid4())
+                key = (entity_type, entity_id)
+                entity = ENTITY_MODELS[entity_type](id=entity_id)
+                db.add(entity)
+                entities[key] = entity
+                deleted.discard(key)
+                result.entity_id = entity_id
+                action = SYNC_CREATE
+
+            if "title" in fields and (action == SYNC_CREATE or fields["title"] != entity.title):
+                to_embed.add(key)
+            text_column = CHUNKED_COLUMNS[entity_type].key
+            if text_column in fields and (
+                action == SYNC_CREATE or fields[text_column] != getattr(entity, text_column)
+            ):
+                to_chunk.add(key)
+            if entity_type == "note" and "content" in fields and (
+                action == SYNC_CREATE or fields["content"] != entity.content
+            ):
+                fields["summary_status"] = SUMMARY_PENDING
+                to_summarize.add(key)
+
+            for field, value in fields.items():
+                setattr(entity, field, value)
+            if entity_type == "task":
+                score_written_task(entity)
+            log_rows.append((entity_type, entity.id, action))
+
+        # Embed the final title of every entity that still exists, once each
+        embed_keys = [key for key in to_embed if key in entities]
+        embeddings = await self.embedding_service.get_embeddings_batch(
+            [entities[key].title for key in embed_keys]
+        )
+        for key, embedding in zip(embed_keys, embeddings):
+            entities[key].embedding = embedding
+
+        # Re-chunk the final text of changed entities (None for deleted ones)
+        chunk_changes = []
+        for entity_type in ENTITY_MODELS:
+            text_column = CHUNKED_COLUMNS[entity_type].key
+            texts = {
+                key[1]: getattr(entities[key], text_column) if key in entities else None
+                for key in to_chunk
+                if key[0] == entity_type
+            }
+            chunk_changes.append(await chunk_service.rechunk(db, entity_type, texts))
+
+        # Re-facet every written entity with its final category and tags
+        written = {(entity_type, entity_id) for entity_type, entity_id, _ in log_rows}
+        for entity_type in ENTITY_MODELS:
+            facets = {}
+            for key in written:
+                if key[0] == entity_type:
+                    entity = entities.get(key)
+                    facets[key[1]] = None if entity is None else (entity.category, entity.tags)
+            await facet_service.refacet(db, entity_type, facets)
+
+        if log_rows:
+            for entity_type in {entity_type for entity_type, _, _ in log_rows}:
+                mark_changed(db, entity_type)
+            await db.execute(
+                insert(DeviceSyncLog),
+                [
+                    {
+                        "device_id": device_id,
+                        "entity_type": entity_type,
+                        "entity_id": entity_id,
+                        "action": action,
+                    }
+                    for entity_type, entity_id, action in log_rows
+                ],
+            )
+        await db.commit()
+
+        for (entity_type, entity_id), embedding in zip(embed_keys, embeddings):
+            vector_indexes[entity_type].upsert(entity_id, embedding)
+        for entity_type, entity_id in deleted:
+            vector_indexes[entity_type].remove(entity_id)
+        for entity_type, entity_id in written:
+            entity = entities.get((entity_type, entity_id))
+            if entity is None:
+                suggest_index.remove(entity_type, entity_id)
+            else:
+                suggest_index.upsert(
+                    entity_type, entity_id, entity.title, entity.category, entity.tags
+                )
+        for changes in chunk_changes:
+            changes.apply()
+        for entity_type, entity_id in to_summarize:
+            if (entity_type, entity_id) in entities:
+                summary_pipeline.enqueue(entity_id)
+
+        # Return the committed state with one query per entity type
+        for entity_type, model in ENTITY_MODELS.items():
+            ids = {
+                r.entity_id
+                for r, m in zip(results, mutations)
+                if m.entity_type == entity_type and r.status != PUSH_ERROR and r.entity_id
+            }
+            if not ids:
+                continue
+            # populate_existing: server-generated updated_at was expired by the flush
+            committed = await db.scalars(
+                select(model).where(model.id.in_(ids)).execution_options(populate_existing=True)
+            )
+            states = {
+                entity.id: ENTITY_SCHEMAS[entity_type].model_validate(entity)
+                for entity in committed
+            }
+            for r, m in zip(results, mutations):
+                if m.entity_type == entity_type and r.entity_id in states:
+                    setattr(r, entity_type, states[r.entity_id])
+
+        return results
@@ -2,12 +2,37 @@
 Task service for business logic
 """
 
-from sqlalchemy.orm import Session
-from sqlalchemy import and_
+import uuid
+from sqlalchemy import false, insert, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.bulk import iter_ndjson, validate_items
+from app.core.config import settings
+from app.core.pagination import paginate
 from app.models.models import Task
-from app.schemas.schemas import TaskCreate, TaskUpdate
+from app.schemas.schemas import BulkItemResult, TaskCreate, TaskResponse, TaskUpdate
+from app.services.chunk_service import chunk_service
 from app.services.embedding_service import EmbeddingService
-from typing import Optional, List
+from app.services.facet_service import FACETED_FIELDS, facet_service, tag_filter
+from app.services.priority_service import score_written_task, written_scores
+from app.services.sync_service import (
+    SYNC_CREATE,
+    SYNC_DELETE,
+    SYNC_UPDATE,
+    record_change,
+    record_changes,
+)
+from app.services.suggest_index import SUGGESTED_FIELDS, suggest_index
+from app.services.vector_index import vector_indexes
+from typing import Any, AsyncIterator, Dict, Optional, List, Tuple
+
+# Orderings supported by list_tasks, each backed by a (column, id) index
+TASK_ORDERS = {
+    "created_at": Task.created_at,
+    "due_date": Task.due_date,
+    "ai_priority": Task.ai_priority_score,
+}
+# Orderings listed largest first (most urgent first for ai_priority)
+DESCENDING_ORDERS = {"ai_priority"}
 
 
 class TaskService:
@@ -16,12 +41,15 @@ class TaskService:
     def __init__(self):
         self.embedding_service = EmbeddingService()
 
-    async def create_task(self, db: Session, task: TaskCreate) -> Task:
+    async def create_task(
+        self, db: AsyncSession, task: TaskCreate, device_id: Optional[str] = None
+    ) -> Task:
         """Create a new task"""
         # Generate embedding for semantic search
         embedding = await self.embedding_service.get_embedding(task.title)
 
         db_task = Task(
+            id=str(uuid.uuid4()),
             title=task.title,
             description=task.description,
             due_date=task.due_date,
@@ -30,75 +58,211 @@ class TaskService:
             tags=task.tags,
             embedding=embedding,
         )
+        score_written_task(db_task)
         db.add(db_task)
-        db.commit()
-        db.refresh(db_task)
+        chunks = await chunk_service.rechunk(
+            db, "task", {db_task.id: task.description}, created=True
+        )
+        await facet_service.refacet(
+            db, "task", {db_task.id: (task.category, task.tags)}, created=True
+        )
+        record_change(db, "task", db_task.id, SYNC_CREATE, device_id)
+        await db.commit()
+        await db.refresh(db_task)
+        vector_indexes["task"].upsert(db_task.id, embedding)
+        chunks.apply()
+        suggest_index.upsert("task", db_task.id, db_task.title, db_task.category, db_task.tags)
         return db_task
 
+    async def bulk_create_tasks(
+        self, db: AsyncSession, items: List[Dict[str, Any]], device_id: Optional[str] = None
+    ) -> List[BulkItemResult]:
+        """
+        Create many tasks with one embedding batch and one INSERT
+
+        Invalid items are reported in the results and skipped; the rest are
+        committed together.
+        """
+        valid, errors = validate_items(TaskCreate, items)
+        embeddings = await self.embedding_service.get_embeddings_batch(
+            [task.title for _, task in valid]
+        )
+
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "title": task.title,
+                "description": task.description,
+                "due_date": task.due_date,
+                "priority": task.priority,
+                "category": task.category,
+                "tags": task.tags,
+                "embedding": embedding,
+            }
+            for (_, task), embedding in zip(valid, embeddings)
+        ]
+        scores = written_scores([r["due_date"] for r in rows], [r["priority"] for r in rows])
+        for row, score in zip(rows, scores):
+            row["ai_priority_score"] = score
+        if rows:
+            await db.execute(insert(Task), rows)
+            chunks = await chunk_service.rechunk(
+                db, "task", {row["id"]: row["description"] for row in rows}, created=True
+            )
+            await facet_service.refacet(
+                db,
+                "task",
+                {row["id"]: (row["category"], row["tags"]) for row in rows},
+                created=True,
+            )
+            await record_changes(db, "task", [row["id"] for row in rows], SYNC_CREATE, device_id)
+            await db.commit()
+            chunks.apply()
+            for row in rows:
+                vector_indexes["task"].upsert(row["id"], row["embedding"])
+                suggest_index.upsert(
+                    "task", row["id"], row["title"], row["category"], row["tags"]
+                )
+
+        ids = {index: row["id"] for (index, _), row in zip(valid, rows)}
+        return [
+            BulkItemResult(index=index, id=ids.get(index), error=errors.get(index))
+            for index in range(len(items))
+        ]
+
+    def export_tasks(
+        self,
+        db: AsyncSession,
+        completed: Optional[bool] = None,
+        category: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Stream tasks as NDJSON in creation order"""
+        query = select(Task)
+        if completed is not None:
+            query = query.where(Task.completed == (true() if completed else false()))
+        if category:
+            query = query.where(Task.category == category)
+        return iter_ndjson(
+            db,
+            query, Task.created_at, Task.id, TaskResponse, settings.EXPORT_BATCH_SIZE
+        )
+
     async def list_tasks(
         self,
-        db: Session,
+        db: AsyncSession,
         skip: int = 0,
         limit: int = 10,
         completed: Optional[bool] = None,
         category: Optional[str] = None,
-    ) -> List[Task]:
-        """List tasks with optional filtering"""
-        query = db.query(Task)
+        cursor: Optional[str] = None,
+        order: str = "created_at",
+        tags: Optional[List[str]] = None,
+    ) -> Tuple[List[Task], Optional[str]]:
+        """
+        List tasks with optional filtering, returning the page and next cursor
+
+        With several tags, only tasks carrying all of them are listed.
+        """
+        query = select(Task)
 
         if completed is not None:
-            query = query.filter(Task.completed == completed)
+            # Literal true/false so the planner can match the partial open-tasks index
+            query = query.where(Task.completed == (true() if completed else false()))
 
         if category:
-            query = query.filter(Task.category == category)
+            query = query.where(Task.category == category)
 
-        return query.offset(skip).limit(limit).all()
+        if tags:
+            query = query.where(*tag_filter(Task, "task", tags))
 
-    async def get_task(self, db: Session, task_id: str) -> Optional[Task]:
+        return await paginate(
+            db,
+            query,
+            TASK_ORDERS[order],
+            Task.id,
+            order,
+            limit,
+            cursor,
+            skip,
+            nullable=order != "created_at",  # created_at always has a server default
+            descending=order in DESCENDING_ORDERS,
+        )
+
+    async def get_task(self, db: AsyncSession, task_id: str) -> Optional[Task]:
         """Get a specific task"""
-        return db.query(Task).filter(Task.id == task_id).first()
+        return await db.get(Task, task_id)
 
     async def update_task(
-        self, db: Session, task_id: str, task_update: TaskUpdate
+        self,
+        db: AsyncSession,
+        task_id: str,
+        task_update: TaskUpdate,
+        device_id: Optional[str] = None,
     ) -> Optional[Task]:
         """Update a task"""
-        db_task = db.query(Task).filter(Task.id == task_id).first()
+        db_task = await db.get(Task, task_id)
         if not db_task:
             return None
 
         update_data = task_update.model_dump(exclude_unset=True)
 
-        # Regenerate embedding if title or description changed
-        if "title" in update_data or "description" in update_data:
-            title = update_data.get("title", db_task.title)
-            embedding = await self.embedding_service.get_embedding(title)
+        # Regenerate embedding only if the embedded text actually changed
+        if "title" in update_data and update_data["title"] != db_task.title:
+            embedding = await self.embedding_service.get_embedding(update_data["title"])
             update_data["embedding"] = embedding
 
+        # Re-embed only the windows of the text that changed
+        chunks = None
+        if "description" in update_data and update_data["description"] != db_task.description:
+            chunks = await chunk_service.rechunk(db, "task", {task_id: update_data["description"]})
+
         for field, value in update_data.items():
             setattr(db_task, field, value)
+        if update_data.keys() & FACETED_FIELDS:
+            await facet_service.refacet(db, "task", {task_id: (db_task.category, db_task.tags)})
+        score_written_task(db_task)
 
-        db.commit()
-        db.refresh(db_task)
+        record_change(db, "task", task_id, SYNC_UPDATE, device_id)
+        await db.commit()
+        await db.refresh(db_task)
+        if "embedding" in update_data:
+            vector_indexes["task"].upsert(db_task.id, update_data["embedding"])
+        if update_data.keys() & SUGGESTED_FIELDS:
+            suggest_index.upsert("task", db_task.id, db_task.title, db_task.category, db_task.tags)
+        if chunks:
+            chunks.apply()
         return db_task
 
-    async def delete_task(self, db: Session, task_id: str) -> bool:
+    async def delete_task(
+        self, db: AsyncSession, task_id: str, device_id: Optional[str] = None
+    ) -> bool:
         """Delete a task"""
-        db_task = db.query(Task).filter(Task.id == task_id).first()
+        db_task = await db.get(Task, task_id)
         if not db_task:
             return False
 
-        db.delete(db_task)
-        db.commit()
+        await db.delete(db_task)
+        chunks = await chunk_service.rechunk(db, "task", {task_id: None})
+        await facet_service.refacet(db, "task", {task_id: None})
+        record_change(db, "task", task_id, SYNC_DELETE, device_id)
+        await db.commit()
+        vector_indexes["task"].remove(task_id)
+        suggest_index.remove("task", task_id)
+        chunks.apply()
         return True
 
-    async def complete_task(self, db: Session, task_id: str) -> Optional[Task]:
+    async def complete_task(
+        self, db: AsyncSession, task_id: str, device_id: Optional[str] = None
+    ) -> Optional[Task]:
         """Mark a task as completed"""
-        db_task = db.query(Task).filter(Task.id == task_id).first()
+        db_task = await db.get(Task, task_id)
         if not db_task:
             return None
 
         db_task.completed = True
-        db.commit()
-        db.refresh(db_task)
+        score_written_task(db_task)
+        record_change(db, "task", task_id, SYNC_UPDATE, device_id)
+        await db.commit()
+        await db.refresh(db_task)
         return db_task
 
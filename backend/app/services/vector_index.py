@@ -0,0 +1,480 @@
+"""
+In-memory vector index for semantic search
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.embedding_service import hamming_distances, quantize_binary, quantize_int8
+from app.services.vector_store import (
+    SOURCE_CHUNK,
+    SOURCE_TITLE,
+    MilvusVectorStore,
+    VectorStore,
+)
+
+
+def _normalize(vector) -> Optional[np.ndarray]:
+    """Convert to a unit-length float32 vector (None for empty/zero vectors)"""
+    if vector is None:
+        return None
+    arr = np.asarray(vector, dtype=np.float32).reshape(-1)
+    if arr.size == 0:
+        return None
+    norm = np.linalg.norm(arr)
+    if norm == 0:
+        return None
+    return arr / norm
+
+
+class _HNSWGraph:
+    """Approximate nearest neighbour graph backed by hnswlib"""
+
+    def __init__(self, dim: int, capacity: int):
+        import hnswlib
+
+        self.index = hnswlib.Index(space="ip", dim=dim)
+        self.index.init_index(
+            max_elements=max(capacity, 1024),
+            ef_construction=settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION,
+            M=settings.VECTOR_INDEX_HNSW_M,
+        )
+        self.index.set_ef(settings.VECTOR_INDEX_HNSW_EF_SEARCH)
+
+    def add(self, label: int, vector: np.ndarray):
+        if self.index.get_current_count() >= self.index.get_max_elements():
+            self.index.resize_index(self.index.get_max_elements() * 2)
+        # Re-adding an existing (or deleted) label updates it in place
+        self.index.add_items(vector[None, :], [label])
+
+    def remove(self, label: int):
+        self.index.mark_deleted(label)
+
+    def query(self, vector: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        labels, distances = self.index.knn_query(vector[None, :], k=k)
+        # Inner-product space returns 1 - dot
+        return labels[0], 1.0 - distances[0]
+
+
+class VectorIndex(VectorStore):
+    """
+    Contiguous float32 matrix of normalized embeddings for one entity type
+
+    Rows are kept packed: removing an entity moves the last row into the
+    freed slot, so a query is a single matrix-vector product over
+    ``matrix[:size]``. With mode='hnsw' (requires ``hnswlib``) queries go
+    through an approximate graph instead. QuantizedVectorIndex keeps
+    compressed codes in place of the float32 rows.
+
+    With a snapshot_path the index is written to disk by save() at shutdown
+    and read back on the next start instead of rebuilding from the database.
+    The snapshot is deleted once read, so after a crash the index is rebuilt
+    rather than restored from a snapshot that missed later writes.
+    """
+
+    def __init__(self, mode: str = "flat", snapshot_path: Optional[str] = None):
+        super().__init__()
+        self.mode = mode
+        self.snapshot_path = snapshot_path
+        self.loaded = False
+        self.loaded_at = 0.0
+        self._lock = threading.RLock()
+        self._reset()
+        if snapshot_path and os.path.exists(snapshot_path):
+            self._load_snapshot()
+
+    def _reset(self):
+        self._matrix: Optional[np.ndarray] = None
+        self._ids: List[str] = []
+        self._positions: Dict[str, int] = {}
+        self._graph: Optional[_HNSWGraph] = None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._positions
+
+    @property
+    def dim(self) -> Optional[int]:
+        return None if self._matrix is None else self._matrix.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        """Memory held by the stored vectors"""
+        return 0 if self._matrix is None else self._matrix[: len(self._ids)].nbytes
+
+    # Row storage; QuantizedVectorIndex overrides these to keep codes instead
+
+    def _capacity(self) -> int:
+        return 0 if self._matrix is None else self._matrix.shape[0]
+
+    def _allocate(self, dim: int, capacity: int):
+        self._matrix = np.empty((capacity, dim), dtype=np.float32)
+
+    def _grow(self, capacity: int):
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        grown[: len(self._ids)] = self._matrix[: len(self._ids)]
+        self._matrix = grown
+
+    def _store(self, position: int, vectors: np.ndarray):
+        """Write normalized vectors into consecutive rows starting at position"""
+        self._matrix[position : position + len(vectors)] = vectors
+
+    def _move(self, source: int, target: int):
+        self._matrix[target] = self._matrix[source]
+
+    def _scores(self, vector: np.ndarray, size: int) -> np.ndarray:
+        """Similarity of the query to each of the first size rows"""
+        return self._matrix[:size] @ vector
+
+    def _ensure_capacity(self, dim: int, needed: int):
+        if self.dim is None:
+            self._allocate(dim, max(needed, 64))
+            if self.mode == "hnsw":
+                self._graph = _HNSWGraph(dim, max(needed, 64))
+        elif needed > self._capacity():
+            self._grow(max(needed, self._capacity() * 2))
+
+    def _loaded(self):
+        self.loaded = True
+        self.loaded_at = time.monotonic()
+        self.changed()
+
+    def build(self, items: Iterable[Tuple[str, object]]):
+        """
+        Replace the index contents
+
+        Args:
+            items: (entity_id, embedding) pairs
+        """
+        ids = []
+        vectors = []
+        for entity_id, embedding in items:
+            vector = _normalize(embedding)
+            if vector is not None:
+                ids.append(entity_id)
+                vectors.append(vector)
+
+        with self._lock:
+            self._reset()
+            if vectors:
+                self._ensure_capacity(vectors[0].shape[0], len(vectors))
+                self._store(0, np.stack(vectors))
+                self._ids = ids
+                self._positions = {entity_id: i for i, entity_id in enumerate(ids)}
+                if self._graph is not None:
+                    for i, vector in enumerate(vectors):
+                        self._graph.add(i, vector)
+            self._loaded()
+
+    def upsert(self, entity_id: str, embedding):
+        """Insert or replace a single embedding"""
+        if not self.loaded:
+            # Nothing to keep in sync yet; the first search builds from the DB
+            return
+
+        vector = _normalize(embedding)
+        if vector is None:
+            self.remove(entity_id)
+            return
+
+        with self._lock:
+            if self.dim is not None and vector.shape[0] != self.dim:
+                # Embedding model changed; let the next search rebuild
+                self.loaded = False
+                return
+
+            position = self._positions.get(entity_id)
+            if position is None:
+                position = len(self._ids)
+                self._ensure_capacity(vector.shape[0], position + 1)
+                self._ids.append(entity_id)
+                self._positions[entity_id] = position
+            self._store(position, vector[None, :])
+            if self._graph is not None:
+                self._graph.add(position, vector)
+            self.changed()
+
+    def remove(self, entity_id: str):
+        """Remove an embedding if present"""
+        with self._lock:
+            position = self._positions.pop(entity_id, None)
+            if position is None:
+                return
+
+            last = len(self._ids) - 1
+            if position != last:
+                moved_id = self._ids[last]
+                self._move(last, position)
+                self._ids[position] = moved_id
+                self._positions[moved_id] = position
+                if self._graph is not None:
+                    self._graph.add(position, self._matrix[position])
+            self._ids.pop()
+            if self._graph is not None:
+                self._graph.remove(last)
+            self.changed()
+
+    def search(
+        self, query, limit: int, threshold: float = -1.0
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the most similar entities
+
+        Args:
+            query: Query embedding
+            limit: Maximum results
+            threshold: Minimum cosine similarity (exclusive)
+
+        Returns:
+            (entity_id, similarity) pairs sorted by similarity
+        """
+        vector = _normalize(query)
+        with self._lock:
+            size = len(self._ids)
+            if vector is None or size == 0 or vector.shape[0] != self.dim:
+                return []
+
+            k = min(limit, size)
+            if self._graph is not None:
+                positions, scores = self._graph.query(vector, k)
+            else:
+                all_scores = self._scores(vector, size)
+                if k < size:
+                    positions = np.argpartition(-all_scores, k - 1)[:k]
+                else:
+                    positions = np.arange(size)
+                positions = positions[np.argsort(-all_scores[positions])]
+                scores = all_scores[positions]
+
+            return [
+                (self._ids[position], float(score))
+                for position, score in zip(positions, scores)
+                if score > threshold
+            ]
+
+    def _snapshot_arrays(self, size: int) -> Dict[str, np.ndarray]:
+        if not size:
+            return {"matrix": np.empty((0, 0), dtype=np.float32)}
+        return {"matrix": self._matrix[:size]}
+
+    def _restore(self, ids: List[str], snapshot):
+        self.build(zip(ids, snapshot["matrix"]))
+
+    def save(self):
+        """Write a snapshot for the next start (no-op without a snapshot_path)"""
+        if not self.snapshot_path or not self.loaded:
+            return
+        with self._lock:
+            size = len(self._ids)
+            ids = np.array(self._ids, dtype=str)
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            partial = self.snapshot_path + ".partial"
+            with open(partial, "wb") as f:
+                np.savez(f, ids=ids, **self._snapshot_arrays(size))
+            os.replace(partial, self.snapshot_path)
+
+    def _load_snapshot(self):
+        try:
+            with np.load(self.snapshot_path) as snapshot:
+                self._restore(snapshot["ids"].tolist(), snapshot)
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable vector index snapshot: {e}")
+        finally:
+            os.remove(self.snapshot_path)
+
+    def is_stale(self) -> bool:
+        """Whether the index needs a rebuild from the database"""
+        if not self.loaded:
+            return True
+        refresh = settings.VECTOR_INDEX_REFRESH_SECONDS
+        return refresh > 0 and time.monotonic() - self.loaded_at > refresh
+
+
+class QuantizedVectorIndex(VectorIndex):
+    """
+    Flat index keeping compact codes instead of float32 rows
+
+    'int8' keeps one signed byte per dimension plus a per-row scale (about
+    4x smaller); 'binary' keeps one sign bit per dimension (32x smaller) and
+    ranks by Hamming distance. Either way search() only estimates cosine
+    similarity, so callers rescore the top candidates against the
+    full-precision embeddings (see SearchService).
+    """
+
+    approximate = True
+    # Rows dequantized per step while scanning int8 codes
+    SCAN_BLOCK_ROWS = 4096
+    # Oversampling at which the candidates held ~all of the exact top-k in
+    # benchmarks/vector_quantization.py; sign bits lose far more than int8
+    RESCORE_FACTORS = {"int8": 3, "binary": 10}
+
+    def __init__(self, method: str, snapshot_path: Optional[str] = None):
+        if method not in ("int8", "binary"):
+            raise ValueError(f"Unknown quantization: {method}")
+        self.method = method
+        super().__init__(mode="flat", snapshot_path=snapshot_path)
+
+    def _reset(self):
+        super()._reset()
+        self._dim: Optional[int] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+
+    @property
+    def dim(self) -> Optional[int]:
+        return self._dim
+
+    @property
+    def rescore_factor(self) -> int:
+        return settings.VECTOR_INDEX_RESCORE_FACTOR or self.RESCORE_FACTORS[self.method]
+
+    @property
+    def nbytes(self) -> int:
+        size = len(self._ids)
+        if self._codes is None:
+            return 0
+        scales = 0 if self._scales is None else self._scales[:size].nbytes
+        return self._codes[:size].nbytes + scales
+
+    def _capacity(self) -> int:
+        return 0 if self._codes is None else self._codes.shape[0]
+
+    def _allocate(self, dim: int, capacity: int):
+        self._dim = dim
+        if self.method == "int8":
+            self._codes = np.empty((capacity, dim), dtype=np.int8)
+            self._scales = np.empty(capacity, dtype=np.float32)
+        else:
+            self._codes = np.empty((capacity, (dim + 7) // 8), dtype=np.uint8)
+
+    def _grow(self, capacity: int):
+        size = len(self._ids)
+        codes = np.empty((capacity, self._codes.shape[1]), dtype=self._codes.dtype)
+        codes[:size] = self._codes[:size]
+        self._codes = codes
+        if self._scales is not None:
+            scales = np.empty(capacity, dtype=np.float32)
+            scales[:size] = self._scales[:size]
+            self._scales = scales
+
+    def _store(self, position: int, vectors: np.ndarray):
+        end = position + len(vectors)
+        if self.method == "int8":
+            self._codes[position:end], self._scales[position:end] = quantize_int8(vectors)
+        else:
+            self._codes[position:end] = quantize_binary(vectors)
+
+    def _move(self, source: int, target: int):
+        self._codes[target] = self._codes[source]
+        if self._scales is not None:
+            self._scales[target] = self._scales[source]
+
+    def _scores(self, vector: np.ndarray, size: int) -> np.ndarray:
+        if self.method == "binary":
+            distances = hamming_distances(self._codes[:size], quantize_binary(vector)[0])
+            # Angle estimate from the fraction of differing signs
+            return np.cos(np.pi * distances / self._dim)
+
+        scores = np.empty(size, dtype=np.float32)
+        for start in range(0, size, self.SCAN_BLOCK_ROWS):
+            end = min(start + self.SCAN_BLOCK_ROWS, size)
+            block = self._codes[start:end].astype(np.float32)
+            scores[start:end] = (block @ vector) * self._scales[start:end]
+        return scores
+
+    def _snapshot_arrays(self, size: int) -> Dict[str, np.ndarray]:
+        arrays = {"method": np.array(self.method), "dim": np.array(self._dim or 0)}
+        if size:
+            arrays["codes"] = self._codes[:size]
+            if self._scales is not None:
+                arrays["scales"] = self._scales[:size]
+        return arrays
+
+    def _restore(self, ids: List[str], snapshot):
+        if "method" not in snapshot or str(snapshot["method"]) != self.method:
+            raise ValueError("snapshot was written with a different quantization")
+        with self._lock:
+            self._reset()
+            if ids:
+                codes = snapshot["codes"]
+                self._allocate(int(snapshot["dim"]), len(ids))
+                self._codes[:] = codes
+                if self._scales is not None:
+                    self._scales[:] = snapshot["scales"]
+                self._ids = list(ids)
+                self._positions = {entity_id: i for i, entity_id in enumerate(ids)}
+            self._loaded()
+
+
+def _create_local_index(name: str) -> VectorIndex:
+    mode = settings.VECTOR_INDEX_MODE
+    if mode == "hnsw":
+        try:
+            import hnswlib  # noqa: F401
+        except ImportError:
+            print("Warning: hnswlib not installed, falling back to flat vector index")
+            mode = "flat"
+    snapshot_path = None
+    if settings.VECTOR_STORE_PATH:
+        snapshot_path = os.path.join(settings.VECTOR_STORE_PATH, f"{name}.npz")
+
+    quantization = settings.VECTOR_INDEX_QUANTIZATION
+    if quantization in ("int8", "binary"):
+        if mode == "flat":
+            return QuantizedVectorIndex(quantization, snapshot_path=snapshot_path)
+        print("Warning: Vector quantization only applies to the flat index, ignoring it")
+    return VectorIndex(mode=mode, snapshot_path=snapshot_path)
+
+
+def _create_index(entity_type: str, source: str = SOURCE_TITLE) -> VectorStore:
+    name = entity_type if source == SOURCE_TITLE else f"{entity_type}_{source}"
+    if settings.VECTOR_STORE == "milvus":
+        # Connects on first use, serving the local index while Milvus is down
+        return MilvusVectorStore(entity_type, source, fallback=_create_local_index(name))
+    return _create_local_index(name)
+
+
+# Per-process indexes, one per searchable entity type
+vector_indexes: Dict[str, VectorStore] = {
+    "task": _create_index("task"),
+    "note": _create_index("note"),
+}
+
+# Content chunk embeddings per entity type, keyed by chunk_key()
+chunk_indexes: Dict[str, VectorStore] = {
+    "task": _create_index("task", SOURCE_CHUNK),
+    "note": _create_index("note", SOURCE_CHUNK),
+}
+
+
+def chunk_key(entity_id: str, content_hash: str) -> str:
+    return f"{entity_id}:{content_hash}"
+
+
+def chunk_entity_id(key: str) -> str:
+    """Entity id of a chunk_key() (ids may contain ':', hashes never do)"""
+    return key.rpartition(":")[0]
+
+
+def reset_vector_indexes():
+    """Drop all in-memory indexes so they are rebuilt on next search"""
+    for indexes, source in ((vector_indexes, SOURCE_TITLE), (chunk_indexes, SOURCE_CHUNK)):
+        for entity_type in list(indexes):
+            indexes[entity_type] = _create_index(entity_type, source)
+
+
+def save_vector_indexes():
+    """Persist local index snapshots (called at shutdown)"""
+    for indexes in (vector_indexes, chunk_indexes):
+        for index in indexes.values():
+            try:
+                index.save()
+            except Exception as e:
+                print(f"Warning: Failed to save vector index: {e}")
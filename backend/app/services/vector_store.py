@@ -0,0 +1,305 @@
+"""
+Pluggable vector storage behind semantic search
+
+VectorIndex (vector_index.py) keeps each worker's embeddings in an in-process
+matrix rebuilt from the database, optionally snapshotted to disk across
+restarts. MilvusVectorStore keeps them in one Milvus collection shared by all
+workers, so the index is not bounded by a single worker's RAM.
+"""
+
+import itertools
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+SOURCE_TITLE = "title"
+SOURCE_CHUNK = "chunk"
+
+MILVUS_CONNECT_TIMEOUT_SECONDS = 5.0
+# Wait between connection attempts while Milvus is unreachable
+MILVUS_RETRY_SECONDS = 30.0
+MILVUS_BUILD_BATCH_SIZE = 1000
+
+# One counter for all stores, so a store that replaces another (after
+# reset_vector_indexes) never repeats one of its versions
+_versions = itertools.count(1)
+
+
+class VectorStore:
+    """Interface for the embeddings of one entity type (titles or content chunks)"""
+
+    # Calls do network I/O and should run off the event loop
+    blocking = False
+    # search() scores are estimates from compressed codes, to be rescored
+    # against the full-precision embeddings before use
+    approximate = False
+    # Candidates to fetch per wanted result when rescoring
+    rescore_factor = 1
+
+    def __init__(self):
+        # New on every local change, for caches keyed on index contents
+        self.version = next(_versions)
+
+    def changed(self):
+        """Give the store a new version after its contents changed"""
+        self.version = next(_versions)
+
+    def is_stale(self) -> bool:
+        """Whether the store needs build() from the database before searching"""
+        raise NotImplementedError
+
+    def build(self, items: Iterable[Tuple[str, object]]):
+        """Replace the store contents with (key, embedding) pairs"""
+        raise NotImplementedError
+
+    def upsert(self, key: str, embedding):
+        """Insert or replace a single embedding"""
+        raise NotImplementedError
+
+    def remove(self, key: str):
+        """Remove an embedding if present"""
+        raise NotImplementedError
+
+    def search(self, query, limit: int, threshold: float = -1.0) -> List[Tuple[str, float]]:
+        """(key, cosine similarity) pairs above threshold, most similar first"""
+        raise NotImplementedError
+
+    def save(self):
+        """Persist state before shutdown, if the store keeps any locally"""
+
+
+def _unit_vector(embedding) -> Optional[List[float]]:
+    if embedding is None:
+        return None
+    vector = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = np.linalg.norm(vector)
+    if vector.size == 0 or norm == 0:
+        return None
+    return (vector / norm).tolist()
+
+
+_milvus_lock = threading.Lock()
+_milvus_collection = None
+_milvus_failed_at: Optional[float] = None
+# Writes are applied in order on one thread so request handlers never wait on Milvus
+_milvus_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="milvus-writer")
+
+
+def milvus_collection():
+    """
+    Connect to Milvus and return the shared collection, creating it if needed
+
+    All entity types live in one collection; each store filters its searches
+    by the entity_type and source fields. After a failed attempt, raises
+    ConnectionError without trying again for MILVUS_RETRY_SECONDS.
+    """
+    global _milvus_collection, _milvus_failed_at
+    with _milvus_lock:
+        if _milvus_collection is not None:
+            return _milvus_collection
+        if _milvus_failed_at is not None:
+            if time.monotonic() - _milvus_failed_at < MILVUS_RETRY_SECONDS:
+                raise ConnectionError("Milvus unavailable, retrying later")
+        try:
+            _milvus_collection = _connect_milvus()
+        except Exception as e:
+            _milvus_failed_at = time.monotonic()
+            print(f"Warning: Milvus unavailable ({e}), using local vector indexes for now")
+            raise
+        _milvus_failed_at = None
+        return _milvus_collection
+
+
+def _connect_milvus():
+    from pymilvus import (
+        Collection,
+        CollectionSchema,
+        DataType,
+        FieldSchema,
+        connections,
+        utility,
+    )
+
+    connections.connect(
+        host=settings.MILVUS_HOST,
+        port=str(settings.MILVUS_PORT),
+        timeout=MILVUS_CONNECT_TIMEOUT_SECONDS,
+    )
+    name = settings.MILVUS_COLLECTION
+    if utility.has_collection(name):
+        collection = Collection(name)
+    else:
+        schema = CollectionSchema(
+            [
+                FieldSchema("pk", DataType.VARCHAR, is_primary=True, max_length=512),
+                FieldSchema("entity_type", DataType.VARCHAR, max_length=32),
+                FieldSchema("source", DataType.VARCHAR, max_length=16),
+                FieldSchema("key", DataType.VARCHAR, max_length=512),
+                FieldSchema("embedding", DataType.FLOAT_VECTOR, dim=settings.EMBEDDING_DIM),
+            ],
+            description="PocketGenie task/note embeddings",
+        )
+        collection = Collection(name, schema)
+        collection.create_index(
+            "embedding",
+            {
+                "index_type": "HNSW",
+                "metric_type": "IP",
+                "params": {
+                    "M": settings.VECTOR_INDEX_HNSW_M,
+                    "efConstruction": settings.VECTOR_INDEX_HNSW_EF_CONSTRUCTION,
+                },
+            },
+        )
+    collection.load()
+    return collection
+
+
+def _log_write_error(future):
+    error = future.exception()
+    if error is not None:
+        print(f"Warning: Milvus write failed: {error}")
+
+
+class MilvusVectorStore(VectorStore):
+    """
+    Embeddings of one entity type in the shared Milvus collection
+
+    Writes are queued to a background thread; searches are HNSW ANN queries
+    filtered to this store's entity type and source. The collection persists
+    and is shared, so it is only built from the database while still empty.
+
+    The connection is made on first use. Until Milvus is reachable the store
+    serves a local fallback index and retries every MILVUS_RETRY_SECONDS;
+    once connected after missing writes, it is rebuilt from the database.
+    """
+
+    blocking = True
+
+    def __init__(self, entity_type: str, source: str, fallback: VectorStore):
+        super().__init__()
+        self.entity_type = entity_type
+        self.source = source
+        self.fallback = fallback
+        self.collection = None
+        self._filter = f'entity_type == "{entity_type}" and source == "{source}"'
+        self._empty = True
+        self._missed_writes = False
+
+    def _connected(self) -> bool:
+        if self.collection is None:
+            try:
+                collection = milvus_collection()
+            except Exception:
+                return False
+            empty = not collection.query(expr=self._filter, output_fields=["pk"], limit=1)
+            self._empty = empty or self._missed_writes
+            self.collection = collection
+            self.changed()
+        return True
+
+    @property
+    def approximate(self) -> bool:
+        return self.collection is None and self.fallback.approximate
+
+    @property
+    def rescore_factor(self) -> int:
+        return self.fallback.rescore_factor if self.collection is None else 1
+
+    def _pk(self, key: str) -> str:
+        return f"{self.entity_type}:{self.source}:{key}"
+
+    def _rows(self, items: Iterable[Tuple[str, object]]) -> List[list]:
+        """Column-ordered insert data for the collection schema"""
+        rows = [(key, _unit_vector(embedding)) for key, embedding in items]
+        rows = [(key, vector) for key, vector in rows if vector is not None]
+        return [
+            [self._pk(key) for key, _ in rows],
+            [self.entity_type] * len(rows),
+            [self.source] * len(rows),
+            [key for key, _ in rows],
+            [vector for _, vector in rows],
+        ]
+
+    def _written(self, future):
+        # Only now can searches see the write: a version taken earlier would
+        # let a search in between cache pre-write results under it
+        self.changed()
+        _log_write_error(future)
+
+    def _write(self, apply, *args):
+        _milvus_writer.submit(apply, *args).add_done_callback(self._written)
+
+    def is_stale(self) -> bool:
+        if not self._connected():
+            return self.fallback.is_stale()
+        return self._empty
+
+    def build(self, items: Iterable[Tuple[str, object]]):
+        if not self._connected():
+            self.fallback.build(items)
+            self.changed()
+            return
+        self.collection.delete(self._filter)
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) >= MILVUS_BUILD_BATCH_SIZE:
+                self.collection.insert(self._rows(batch))
+                batch = []
+        if batch:
+            self.collection.insert(self._rows(batch))
+        self._empty = self._missed_writes = False
+        self.changed()
+
+    def upsert(self, key: str, embedding):
+        if self.collection is None:
+            self._missed_writes = True
+            self.fallback.upsert(key, embedding)
+            self.changed()
+        elif _unit_vector(embedding) is None:
+            self.remove(key)
+        else:
+            self._write(self.collection.upsert, self._rows([(key, embedding)]))
+
+    def remove(self, key: str):
+        if self.collection is None:
+            self._missed_writes = True
+            self.fallback.remove(key)
+            self.changed()
+        else:
+            self._write(self.collection.delete, f"pk in {json.dumps([self._pk(key)])}")
+
+    def save(self):
+        self.fallback.save()
+
+    def search(self, query, limit: int, threshold: float = -1.0) -> List[Tuple[str, float]]:
+        if not self._connected():
+            return self.fallback.search(query, limit, threshold)
+        vector = _unit_vector(query)
+        if vector is None:
+            return []
+        results = self.collection.search(
+            data=[vector],
+            anns_field="embedding",
+            param={
+                "metric_type": "IP",
+                "params": {"ef": max(settings.VECTOR_INDEX_HNSW_EF_SEARCH, limit)},
+            },
+            limit=limit,
+            expr=self._filter,
+            output_fields=["key"],
+            # Sees this worker's completed writes, which bumped the version
+            consistency_level="Session",
+        )
+        return [
+            (hit.entity.get("key"), float(hit.distance))
+            for hit in results[0]
+            if hit.distance > threshold
+        ]
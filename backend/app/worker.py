@@ -0,0 +1,30 @@
+"""
+Celery worker for background jobs
+
+Run with: celery -A app.worker worker --loglevel=info
+"""
+
+import asyncio
+
+from celery import Celery
+
+from app.core.config import settings
+from app.core.database import async_engine
+from app.services.summary_pipeline import summary_pipeline
+
+celery_app = Celery("pocketgenie", broker=settings.REDIS_URL, backend=settings.REDIS_URL)
+celery_app.conf.task_acks_late = True
+
+
+@celery_app.task(name="notes.summarize")
+def summarize_note(note_id: str):
+    """Summarize a note and store the result"""
+    asyncio.run(_summarize(note_id))
+
+
+async def _summarize(note_id: str):
+    try:
+        await summary_pipeline.process(note_id)
+    finally:
+        # Pooled connections belong to this task's event loop
+        await async_engine.dispose()
@@ -0,0 +1,130 @@
+"""
+Latency / throughput / agreement of the embedding inference backends
+
+Loads the configured EMBEDDING_MODEL on PyTorch (sentence-transformers), on
+ONNX Runtime and on ONNX Runtime with int8 weights, then measures the load
+time, single-text latency (the interactive path: one request's title or
+query), batch throughput (the bulk path: imports, chunk backfill) and the
+cosine similarity of each backend's embeddings to the PyTorch ones. The
+ONNX export is created under EMBEDDING_ONNX_PATH on the first run.
+
+Usage (from backend/):
+    python -m benchmarks.embedding_backends --texts 512 --batch-size 32
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.onnx_encoder import (
+    CONFIG_FILE,
+    QUANTIZED_MODEL_FILE,
+    OnnxEncoder,
+    export_model,
+    model_dir,
+    quantize_model,
+)
+
+_WORDS = (
+    "review quarterly report budget meeting notes call dentist groceries plan trip "
+    "deploy release fix login bug draft proposal email team schedule interview "
+    "renew passport pay invoice update roadmap write tests backup laptop"
+).split()
+
+
+def _texts(rng, count: int):
+    """Task- and note-like texts of 3 to 60 words"""
+    lengths = np.clip(rng.geometric(1 / 12, size=count) + 2, 3, 60)
+    return [" ".join(rng.choice(_WORDS, size=length)) for length in lengths]
+
+
+def _unit(embeddings) -> np.ndarray:
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def _load_backends(threads: int):
+    """(name, load seconds, model) for every backend that can run here"""
+    from sentence_transformers import SentenceTransformer
+
+    start = time.perf_counter()
+    model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    backends = [("torch", time.perf_counter() - start, model)]
+
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        print("onnxruntime is not installed; only PyTorch is measured")
+        return backends
+
+    directory = model_dir(settings.EMBEDDING_MODEL)
+    if not os.path.exists(os.path.join(directory, CONFIG_FILE)):
+        export_model(settings.EMBEDDING_MODEL, directory)
+    if not os.path.exists(os.path.join(directory, QUANTIZED_MODEL_FILE)):
+        quantize_model(directory)
+    for name, quantized in (("onnx", False), ("onnx-int8", True)):
+        start = time.perf_counter()
+        encoder = OnnxEncoder(directory, quantized=quantized, threads=threads)
+        backends.append((name, time.perf_counter() - start, encoder))
+    return backends
+
+
+def run(count: int, batch_size: int, singles: int, threads: int, seed: int):
+    rng = np.random.default_rng(seed)
+    texts = _texts(rng, count)
+    backends = _load_backends(threads)
+    reference = None
+
+    print(
+        f"{settings.EMBEDDING_MODEL}: {singles} single texts, "
+        f"{count} texts in batches of {batch_size}"
+    )
+    print(
+        f"{'backend':<10} {'load s':>7} {'p50 ms':>8} {'p95 ms':>8} {'texts/s':>8} "
+        f"{'min cos':>8} {'mean cos':>8}"
+    )
+    for name, load_seconds, model in backends:
+        model.encode(texts[:batch_size], convert_to_tensor=False)  # warm up
+
+        timings = []
+        for text in texts[:singles]:
+            start = time.perf_counter()
+            model.encode(text, convert_to_tensor=False)
+            timings.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        embeddings = np.concatenate(
+            [
+                np.atleast_2d(model.encode(texts[i : i + batch_size], convert_to_tensor=False))
+                for i in range(0, count, batch_size)
+            ]
+        )
+        throughput = count / (time.perf_counter() - start)
+
+        embeddings = _unit(embeddings)
+        if reference is None:
+            reference = embeddings
+        agreement = (embeddings * reference).sum(axis=1)
+        print(
+            f"{name:<10} {load_seconds:>7.2f} {np.percentile(timings, 50):>8.2f} "
+            f"{np.percentile(timings, 95):>8.2f} {throughput:>8.0f} "
+            f"{agreement.min():>8.4f} {agreement.mean():>8.4f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--texts", type=int, default=512, help="Texts for the batch run")
+    parser.add_argument("--batch-size", type=int, default=settings.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--singles", type=int, default=200, help="Texts encoded one at a time")
+    parser.add_argument("--threads", type=int, default=settings.EMBEDDING_ONNX_THREADS)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.texts, args.batch_size, args.singles, args.threads, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Build time / query latency / write latency of the type-ahead prefix index
+
+Builds SuggestIndex over synthetic task and note titles with categories and
+tags drawn from small vocabularies, then times suggest() for prefixes of
+1 to 6 characters taken from indexed words (what a user typing produces)
+and upsert() of single renamed titles (what every write pays).
+
+Usage (from backend/):
+    python -m benchmarks.suggest_index --count 200000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.services.suggest_index import SuggestIndex
+
+_WORDS = (
+    "review quarterly report budget meeting notes call dentist groceries plan trip "
+    "deploy release fix login bug draft proposal email team schedule interview "
+    "renew passport pay invoice update roadmap write tests backup laptop offsite "
+    "agenda hiring onboarding garden taxes insurance birthday gift flight hotel"
+).split()
+
+
+def _title(rng) -> str:
+    words = rng.choice(_WORDS, size=rng.integers(2, 7))
+    # Some unique words, like names and ticket numbers
+    return " ".join(words) + f" {rng.integers(100000):05d}"
+
+
+def run(count: int, queries: int, writes: int, limit: int, seed: int):
+    rng = np.random.default_rng(seed)
+    categories = [f"category{i}" for i in range(30)]
+    tags = [f"tag{i}" for i in range(300)]
+    items = [
+        (
+            "task" if i % 2 else "note",
+            f"id-{i}",
+            _title(rng),
+            categories[rng.integers(len(categories))],
+            list(rng.choice(tags, size=rng.integers(0, 4), replace=False)),
+        )
+        for i in range(count)
+    ]
+
+    index = SuggestIndex()
+    start = time.perf_counter()
+    index.build(items)
+    build_seconds = time.perf_counter() - start
+
+    timings = {}
+    for _ in range(queries):
+        word = _WORDS[rng.integers(len(_WORDS))]
+        length = int(rng.integers(1, 7))
+        start = time.perf_counter()
+        index.suggest(word[:length], limit)
+        timings.setdefault(min(length, len(word)), []).append(
+            (time.perf_counter() - start) * 1000
+        )
+
+    write_timings = []
+    for _ in range(writes):
+        entity_type, entity_id, _, category, item_tags = items[rng.integers(count)]
+        start = time.perf_counter()
+        index.upsert(entity_type, entity_id, _title(rng), category, item_tags)
+        write_timings.append((time.perf_counter() - start) * 1000)
+
+    print(f"{count} titles, {len(index)} suggestions, built in {build_seconds:.2f}s")
+    print(f"{'prefix':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for length in sorted(timings):
+        print(
+            f"{length:>6} {np.percentile(timings[length], 50):>8.3f} "
+            f"{np.percentile(timings[length], 95):>8.3f}"
+        )
+    print(
+        f"{'upsert':>6} {np.percentile(write_timings, 50):>8.3f} "
+        f"{np.percentile(write_timings, 95):>8.3f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Indexed tasks and notes")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.count, args.queries, args.writes, args.limit, args.seed)
+
+
+if __name__ == "__main__":
+    main()
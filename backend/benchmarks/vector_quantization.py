@@ -0,0 +1,94 @@
+"""
+Memory / recall / latency of quantized vector indexes against exact search
+
+Builds the flat float32 VectorIndex and the int8 and binary
+QuantizedVectorIndex over the same synthetic clustered embeddings, then
+runs the search path SearchService uses: code-ranked candidates rescored
+with full-precision vectors. Recall@k is measured against exact cosine
+search. The rescoring vectors are read from memory here; in the API they
+are a primary-key lookup in the database, which is not included in the
+latency.
+
+Usage (from backend/):
+    python -m benchmarks.vector_quantization --count 200000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_index import QuantizedVectorIndex, VectorIndex
+
+
+def _embeddings(rng, centers: np.ndarray, count: int) -> np.ndarray:
+    """Unit vectors grouped around topic centers, like sentence embeddings"""
+    vectors = centers[rng.integers(len(centers), size=count)]
+    vectors += rng.normal(size=(count, centers.shape[1])).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _rescore(matrix: np.ndarray, positions: dict, candidates, query, limit: int):
+    rows = np.array([positions[key] for key, _ in candidates])
+    scores = matrix[rows] @ query
+    order = np.argsort(-scores)[:limit]
+    return [candidates[i][0] for i in order]
+
+
+def run(count: int, dim: int, queries: int, limit: int, topics: int, seed: int):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim)).astype(np.float32)
+    matrix = _embeddings(rng, centers, count)
+    query_vectors = _embeddings(rng, centers, queries)
+    ids = [f"id-{i}" for i in range(count)]
+    positions = {key: i for i, key in enumerate(ids)}
+    exact = [set(np.argsort(-(matrix @ q))[:limit]) for q in query_vectors]
+    exact = [{ids[i] for i in top} for top in exact]
+
+    print(f"{count} vectors, dim {dim}, {queries} queries, recall@{limit}")
+    print(
+        f"{'index':<8} {'MB':>8} {'B/vec':>6} {'factor':>6} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'cand.':>6} {'recall':>6}"
+    )
+
+    indexes = [("float32", VectorIndex())] + [
+        (method, QuantizedVectorIndex(method)) for method in ("int8", "binary")
+    ]
+    for name, index in indexes:
+        index.build(zip(ids, matrix))
+        factor = index.rescore_factor
+        timings, candidate_hits, hits = [], 0, 0
+        for query, expected in zip(query_vectors, exact):
+            start = time.perf_counter()
+            candidates = index.search(query, limit * factor)
+            if index.approximate:
+                found = _rescore(matrix, positions, candidates, query, limit)
+            else:
+                found = [key for key, _ in candidates]
+            timings.append((time.perf_counter() - start) * 1000)
+            candidate_hits += len(expected & {key for key, _ in candidates})
+            hits += len(expected & set(found))
+
+        total = queries * limit
+        print(
+            f"{name:<8} {index.nbytes / 2**20:>8.1f} {index.nbytes / count:>6.0f} {factor:>6} "
+            f"{np.percentile(timings, 50):>8.2f} {np.percentile(timings, 95):>8.2f} "
+            f"{candidate_hits / total:>6.3f} {hits / total:>6.3f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--count", type=int, default=100_000, help="Indexed vectors")
+    parser.add_argument("--dim", type=int, default=settings.EMBEDDING_DIM)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10, help="k for recall@k")
+    parser.add_argument("--topics", type=int, default=1000, help="Clusters in the data")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    run(args.count, args.dim, args.queries, args.limit, args.topics, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,48 +2,72 @@
 Pytest configuration and fixtures
 """
 
+import asyncio
+from contextlib import asynccontextmanager
+
 import pytest
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 from app.core.database import Base
 from app.core.config import settings
 from app.main import app
 from fastapi.testclient import TestClient
 
 
-@pytest.fixture(scope="session")
+async def _create_schema(engine):
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+
+@pytest.fixture
 def db_engine():
-    """Create test database engine"""
-    engine = create_engine("sqlite:///:memory:")
-    Base.metadata.create_all(bind=engine)
+    """Create a fresh in-memory test database"""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    asyncio.run(_create_schema(engine))
     yield engine
-    Base.metadata.drop_all(bind=engine)
+    asyncio.run(engine.dispose())
 
 
-@pytest.fixture(scope="function")
+@pytest.fixture
 def db_session(db_engine):
     """Create test database session"""
-    connection = db_engine.connect()
-    transaction = connection.begin()
-    session = sessionmaker(autocommit=False, autoflush=False, bind=connection)()
-
+    session = AsyncSession(db_engine, expire_on_commit=False, autoflush=False)
     yield session
-
-    session.close()
-    transaction.rollback()
-    connection.close()
+    asyncio.run(session.close())
 
 
 @pytest.fixture
-def client(db_session):
+def client(db_engine, monkeypatch):
     """Create test client"""
+    session_factory = async_sessionmaker(db_engine, expire_on_commit=False, autoflush=False)
 
-    def override_get_db():
-        yield db_session
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
 
+    from app.core.cache import clear_caches
     from app.core.database import get_db
+    from app.services.suggest_index import suggest_index
+    from app.services.summary_pipeline import summary_pipeline
+    from app.services.vector_index import reset_vector_indexes
 
+    @asynccontextmanager
+    async def lifespan(app):
+        # Background jobs queue on the client's loop instead of running
+        # detached past it; the shared in-memory connection can't take
+        # concurrent work, so tests run the jobs they need themselves
+        await summary_pipeline.start(workers=0)
+        try:
+            yield
+        finally:
+            await summary_pipeline.stop()
+
+    # In-memory state must not outlive the per-test database
+    reset_vector_indexes()
+    suggest_index.clear()
+    clear_caches()
     app.dependency_overrides[get_db] = override_get_db
-    yield TestClient(app)
+    monkeypatch.setattr(app.router, "lifespan_context", lifespan)
+    with TestClient(app) as test_client:
+        yield test_client
     app.dependency_overrides.clear()
-
@@ -0,0 +1,290 @@
+"""
+Tests for AI endpoints and the LLM client
+"""
+
+import asyncio
+import json
+import httpx
+from app.services.ai_service import AIService
+from app.services.llm_client import LLMClient, LLMUnavailableError
+
+
+def _client(handler):
+    return LLMClient(base_url="http://llm.test", transport=httpx.MockTransport(handler))
+
+
+def test_llm_client_retries_transient_errors():
+    """Test that 5xx responses are retried before succeeding"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 2:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"choices": [{"text": "ok"}]})
+
+    client = _client(handler)
+    assert asyncio.run(client.complete("hi")) == "ok"
+    assert len(calls) == 2
+    assert client.stats()["circuit"] == "closed"
+
+
+def test_circuit_breaker_falls_back_to_simple_summary():
+    """Test that a down backend is short-circuited to the local summarizer"""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        raise httpx.ConnectError("connection refused")
+
+    client = _client(handler)
+    client.breaker.failure_threshold = 1
+    service = AIService(client)
+    content = "First. Second. Third point. Fourth point."
+
+    first = asyncio.run(service.summarize(content, max_points=2))
+    attempts = len(calls)
+    second = asyncio.run(service.summarize(content, max_points=2))
+
+    assert client.stats()["circuit"] == "open"
+    assert len(calls) == attempts  # No new requests once open
+    assert first == second
+    assert second.bullet_points == ["Third point", "Fourth point"]
+
+
+def test_circuit_breaker_trial_survives_cancellation_and_bad_payloads(monkeypatch):
+    """Test that a half-open trial always ends, and malformed replies count as failures"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    replies = []
+
+    async def handler(request):
+        reply = replies.pop(0)
+        if reply is None:
+            await asyncio.sleep(10)
+        return httpx.Response(200, json=reply)
+
+    client = _client(handler)
+    client.breaker.failure_threshold = 1
+    client.breaker.opened_at = 0.0  # Long past: the next call is the trial
+
+    async def cancel_trial():
+        call = asyncio.ensure_future(client.complete("hi"))
+        await asyncio.sleep(0.05)
+        call.cancel()
+        await asyncio.gather(call, return_exceptions=True)
+
+    replies.append(None)
+    asyncio.run(cancel_trial())
+    assert client.breaker.allow()  # The cancelled trial didn't wedge the circuit
+
+    client.breaker.record_failure()
+    client.breaker.opened_at = 0.0
+    for malformed in ({"choices": []}, ["not", "a", "dict"]):
+        replies.append(malformed)
+        try:
+            asyncio.run(client.complete("hi"))
+        except LLMUnavailableError:
+            pass
+        else:
+            raise AssertionError("malformed response accepted")
+        assert client.stats()["circuit"] == "open"
+        client.breaker.opened_at = 0.0
+
+    replies.append({"choices": [{"text": "ok"}]})
+    assert asyncio.run(client.complete("hi")) == "ok"
+    assert client.stats()["circuit"] == "closed"
+
+
+def test_waiting_for_a_request_slot_counts_against_the_deadline(monkeypatch):
+    """Test that a call queued behind busy slots gives up at its deadline"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "LLM_MAX_CONCURRENCY", 1)
+
+    async def handler(request):
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"choices": [{"text": "slow"}]})
+
+    client = _client(handler)
+
+    async def run():
+        busy = asyncio.ensure_future(client.complete("first", deadline=5))
+        await asyncio.sleep(0.05)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        try:
+            await client.complete("second", deadline=0.2)
+        except LLMUnavailableError:
+            waited = loop.time() - started
+        else:
+            raise AssertionError("queued call outlived its deadline")
+        return waited, await busy
+
+    waited, first = asyncio.run(run())
+    assert waited < 0.5
+    assert first == "slow"
+    assert client.stats()["consecutive_failures"] == 0  # Local queueing isn't a backend failure
+
+
+def _sse(*fragments):
+    lines = [f'data: {{"choices": [{{"text": {json.dumps(f)}}}]}}\n\n' for f in fragments]
+    return lines + ["data: [DONE]\n\n"]
+
+
+def test_summarize_stream_parses_lines_as_they_arrive():
+    """Test that lines are emitted as soon as complete and generation stops early"""
+    closed = []
+
+    async def body():
+        try:
+            for line in _sse("Weekly", " plan.\n- Ship", " v2\n", "- Fix bugs\n- Hire\n", "- More"):
+                yield line.encode()
+        finally:
+            closed.append(True)
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=body())
+
+    async def collect():
+        service = AIService(_client(handler))
+        return [event async for event in service.summarize_stream("notes", max_points=2)]
+
+    events = [(e.event, e.text) for e in asyncio.run(collect())]
+    assert events[:5] == [
+        ("token", "Weekly"),
+        ("token", " plan.\n- Ship"),
+        ("summary", "Weekly plan."),
+        ("token", " v2\n"),
+        ("bullet", "Ship v2"),
+    ]
+    # The second point completes the summary, so the rest is never read
+    assert ("token", "- More") not in events
+    assert closed == [True]
+    done = asyncio.run(collect())[-1]
+    assert done.event == "done"
+    assert done.result.bullet_points == ["Ship v2", "Fix bugs"]
+
+
+def test_summarize_stream_endpoint_falls_back_without_llm(client, monkeypatch):
+    """Test the NDJSON endpoint when the LLM backend is down"""
+    from app.api import ai
+
+    def handler(request):
+        raise httpx.ConnectError("connection refused")
+
+    llm = _client(handler)
+    llm.breaker.opened_at = float("inf")  # Open: no waiting on retries
+    monkeypatch.setattr(ai.ai_service, "llm", llm)
+
+    response = client.post(
+        "/api/v1/ai/summarize/stream",
+        json={"content": "First. Second. Third point. Fourth point.", "max_points": 2},
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    events = [json.loads(line) for line in response.text.splitlines()]
+    assert [e["event"] for e in events] == ["summary", "bullet", "bullet", "done"]
+    assert events[-1]["result"]["bullet_points"] == ["Third point", "Fourth point"]
+
+
+def test_long_content_is_summarized_by_section(monkeypatch):
+    """Test map-reduce summarization: bounded parallel section calls, cached per section"""
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "SUMMARY_MAP_REDUCE_WORDS", 60)
+    monkeypatch.setattr(settings, "SUMMARY_SECTION_WORDS", 30)
+    monkeypatch.setattr(settings, "SUMMARY_MAP_CONCURRENCY", 2)
+    section_calls, in_flight, peak = [], [0], [0]
+
+    async def handler(request):
+        prompt = json.loads(request.content)["prompt"]
+        if prompt.startswith("Summarize this section"):
+            section_calls.append(prompt)
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+            await asyncio.sleep(0.01)
+            in_flight[0] -= 1
+            return httpx.Response(200, json={"choices": [{"text": f"Part {len(section_calls)}"}]})
+        assert "summaries of" in prompt
+        return httpx.Response(200, json={"choices": [{"text": "Overall.\n- One\n- Two"}]})
+
+    paragraphs = [" ".join(f"p{i}w{j}" for j in range(20)) for i in range(8)]
+    service = AIService(_client(handler))
+
+    result = asyncio.run(service.summarize("\n\n".join(paragraphs), max_points=2))
+    assert result.bullet_points == ["One", "Two"]
+    assert len(section_calls) > 2
+    assert peak[0] == 2
+
+    calls = len(section_calls)
+    paragraphs[3] = "edited " + paragraphs[3]
+    asyncio.run(service.summarize("\n\n".join(paragraphs), max_points=2))
+    assert len(section_calls) == calls + 1
+
+
+def test_get_prioritize_ranks_stored_open_tasks(client):
+    """Test server-side prioritization with and without a focus"""
+    ids = {}
+    for title, priority in (
+        ("Quarterly tax filing", 1),
+        ("Buy groceries", 2),
+        ("Old finished chore", 3),
+    ):
+        task = client.post("/api/v1/tasks/", json={"title": title, "priority": priority}).json()
+        ids[title] = task["id"]
+    client.post(f"/api/v1/tasks/{ids['Old finished chore']}/complete")
+
+    response = client.get("/api/v1/ai/prioritize")
+    assert response.status_code == 200
+    data = response.json()
+    assert [t["id"] for t in data["prioritized_tasks"]] == [
+        ids["Buy groceries"],
+        ids["Quarterly tax filing"],
+    ]
+    assert data["next_best_action"]["id"] == ids["Buy groceries"]
+
+    data = client.get("/api/v1/ai/prioritize", params={"focus": "tax filing"}).json()
+    assert data["next_best_action"]["id"] == ids["Quarterly tax filing"]
+
+
+def test_post_prioritize_orders_uploaded_tasks_by_urgency(client, monkeypatch):
+    """Test that uploaded tasks are ranked by the stored-task urgency score"""
+    from datetime import datetime, timedelta
+    from app.api import ai
+
+    def handler(request):
+        raise httpx.ConnectError("connection refused")
+
+    llm = _client(handler)
+    llm.breaker.opened_at = float("inf")
+    monkeypatch.setattr(ai.ai_service, "llm", llm)
+
+    now = datetime.utcnow()
+    tasks = [
+        {"title": "Due next month", "priority": 0, "due_date": now + timedelta(days=30)},
+        {"title": "Important, undated", "priority": 3, "due_date": None},
+        {"title": "Minor, undated", "priority": 1, "due_date": None},
+        {"title": "Due soon", "priority": 0, "due_date": now + timedelta(hours=2)},
+    ]
+    payload = [
+        {
+            **task,
+            "id": str(i),
+            "completed": False,
+            "due_date": task["due_date"] and task["due_date"].isoformat(),
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+        }
+        for i, task in enumerate(tasks)
+    ]
+
+    data = client.post("/api/v1/ai/prioritize", json={"tasks": payload}).json()
+    assert [t["title"] for t in data["prioritized_tasks"]] == [
+        "Due soon",
+        "Important, undated",
+        "Minor, undated",
+        "Due next month",
+    ]
+    assert data["next_best_action"]["title"] == "Due soon"
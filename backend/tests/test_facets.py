@@ -0,0 +1,84 @@
+"""
+Tests for tag filters and facet counts
+"""
+
+
+def _facets(client, entity_type="all"):
+    response = client.get("/api/v1/facets/", params={"entity_type": entity_type})
+    assert response.status_code == 200
+    body = response.json()
+    return (
+        {f["value"]: f["count"] for f in body["tags"]},
+        {f["value"]: f["count"] for f in body["categories"]},
+    )
+
+
+def test_list_filters_by_all_tags(client):
+    """Test that tag filters match every tag, ignore case and paginate by cursor"""
+    client.post(
+        "/api/v1/tasks/bulk",
+        json={
+            "items": [
+                {"title": f"Both {i}", "tags": ["Urgent", "home"]} for i in range(5)
+            ]
+            + [{"title": "Urgent only", "tags": ["urgent"]}, {"title": "Untagged"}]
+        },
+    )
+    client.post("/api/v1/notes/", json={"title": "Note", "content": "c", "tags": ["urgent"]})
+
+    titles, cursor = [], None
+    while True:
+        params = {"tags": "URGENT, home", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/tasks/", params=params)
+        assert response.status_code == 200
+        titles += [task["title"] for task in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(titles) == [f"Both {i}" for i in range(5)]
+
+    response = client.get("/api/v1/tasks/", params={"tags": "urgent"})
+    assert len(response.json()) == 6
+    assert client.get("/api/v1/tasks/", params={"tags": "missing"}).json() == []
+    notes = client.get("/api/v1/notes/", params={"tags": "Urgent"}).json()
+    assert [note["title"] for note in notes] == ["Note"]
+
+
+def test_facet_counts_follow_writes(client):
+    """Test counts after creates, edits, deletes and pushed mutations"""
+    task = client.post(
+        "/api/v1/tasks/", json={"title": "A", "category": "work", "tags": ["red", "Blue"]}
+    ).json()
+    client.post("/api/v1/tasks/", json={"title": "B", "category": "work", "tags": ["blue"]})
+    note = client.post(
+        "/api/v1/notes/", json={"title": "N", "content": "c", "category": "work", "tags": ["red"]}
+    ).json()
+
+    assert _facets(client) == ({"blue": 2, "red": 2}, {"work": 3})
+    assert _facets(client, "task") == ({"blue": 2, "red": 1}, {"work": 2})
+
+    client.put(f"/api/v1/tasks/{task['id']}", json={"tags": ["green"], "category": "home"})
+    assert _facets(client, "task") == ({"blue": 1, "green": 1}, {"home": 1, "work": 1})
+    client.put(f"/api/v1/tasks/{task['id']}", json={"title": "Renamed"})
+    assert _facets(client, "task") == ({"blue": 1, "green": 1}, {"home": 1, "work": 1})
+
+    client.delete(f"/api/v1/tasks/{task['id']}")
+    assert _facets(client, "task") == ({"blue": 1}, {"work": 1})
+
+    client.post(
+        "/api/v1/sync/push",
+        json={
+            "device_id": "phone",
+            "mutations": [
+                {"entity_type": "note", "action": "update", "entity_id": note["id"],
+                 "data": {"tags": ["blue"]}},
+                {"entity_type": "note", "action": "create",
+                 "data": {"title": "M", "content": "c", "tags": ["blue", "red"]}},
+            ],
+        },
+    )
+    assert _facets(client, "note") == ({"blue": 2, "red": 1}, {"work": 1})
+    assert client.get("/api/v1/notes/", params={"tags": "blue,red"}).json()[0]["title"] == "M"
+    assert client.get("/api/v1/facets/", params={"entity_type": "x"}).status_code == 422
@@ -0,0 +1,225 @@
+"""
+Tests for the shared model registry and embedding inference
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.model_registry import ModelRegistry
+
+
+def test_model_loaded_once():
+    """Test that a model is only loaded once and shared"""
+    registry = ModelRegistry()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return object()
+
+    first = registry.get("dummy", loader)
+    second = registry.get("dummy", loader)
+
+    assert first is second
+    assert len(calls) == 1
+    assert registry.is_loaded("dummy")
+    assert "dummy" in registry.stats()["models"]
+
+
+def test_metrics_endpoint(client):
+    """Test that model stats are exposed"""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "models" in response.json()
+
+
+def test_batcher_coalesces_concurrent_requests():
+    """Test that concurrent single-text requests share one encode call"""
+    batches = []
+
+    def encode(texts):
+        batches.append(list(texts))
+        return np.array([[float(len(t))] for t in texts])
+
+    batcher = EmbeddingBatcher(encode, ThreadPoolExecutor(1), max_batch_size=8, max_wait_ms=20)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit("x" * n) for n in range(1, 6)))
+
+    results = asyncio.run(run())
+
+    assert batches == [["x", "xx", "xxx", "xxxx", "xxxxx"]]
+    assert [r[0] for r in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+    assert batcher.stats()["avg_batch_size"] == 5.0
+
+
+def test_embedding_cache_skips_repeated_text():
+    """Test that identical texts are only encoded once"""
+    from app.core.cache import cache_stats, clear_caches
+    from app.services.embedding_service import EmbeddingService, embedding_batcher
+
+    clear_caches()
+    service = EmbeddingService()
+    before = embedding_batcher.stats()["texts"]
+
+    async def run():
+        first = await service.get_embeddings_batch(["alpha", "beta", "alpha"])
+        second = await service.get_embedding("beta")
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first[0] == first[2]
+    assert second == first[1]
+    assert embedding_batcher.stats()["texts"] - before == 2
+    assert cache_stats()["embeddings"]["hits"] >= 1
+
+
+def test_onnx_backend_falls_back_to_pytorch(monkeypatch):
+    """Test that EMBEDDING_BACKEND=onnx without onnxruntime still serves embeddings"""
+    import sys
+    from app.core.config import settings
+    from app.services import embedding_service
+
+    monkeypatch.setattr(settings, "EMBEDDING_BACKEND", "onnx")
+    monkeypatch.setitem(sys.modules, "onnxruntime", None)
+    model = embedding_service._load_model()
+    assert model.encode(["fallback"], convert_to_tensor=False).shape == (1, settings.EMBEDDING_DIM)
+
+
+def test_onnx_backend_matches_pytorch(tmp_path):
+    """Test that ONNX Runtime embeddings agree with PyTorch by cosine similarity"""
+    pytest.importorskip("onnxruntime")
+    from sentence_transformers import SentenceTransformer
+    from app.core.config import settings
+    from app.services.onnx_encoder import OnnxEncoder, export_model, quantize_model
+
+    texts = [
+        "Buy groceries",
+        "Prepare the quarterly report for the finance team by Friday",
+        "Call the dentist",
+        "Meeting notes: discussed the roadmap, hiring plan and budget for next year",
+    ]
+    reference = SentenceTransformer(settings.EMBEDDING_MODEL).encode(texts)
+    reference /= np.linalg.norm(reference, axis=1, keepdims=True)
+
+    export_model(settings.EMBEDDING_MODEL, str(tmp_path))
+    quantize_model(str(tmp_path))
+    for quantized, min_cosine in ((False, 0.999), (True, 0.97)):
+        encoder = OnnxEncoder(str(tmp_path), quantized=quantized)
+        embeddings = encoder.encode(texts)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+        assert (embeddings * reference).sum(axis=1).min() >= min_cosine
+        assert encoder.encode(texts[0]).shape == (settings.EMBEDDING_DIM,)
+
+
+def test_lru_cache_evicts_least_recently_used():
+    """Test LRU eviction order"""
+    from app.core.cache import LRUCache
+
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_tiered_cache_batches_redis_round_trips():
+    """Test that get_many/set_many use one Redis round trip for all local misses"""
+    import asyncio
+    import pickle
+    from app.core.cache import TieredCache
+
+    class Pipeline:
+        def __init__(self, redis):
+            self.redis, self.commands = redis, []
+
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+        def set(self, key, value, ex=None):
+            self.commands.append((key, value))
+
+        async def execute(self):
+            self.redis.round_trips += 1
+            self.redis.data.update(self.commands)
+
+    class Redis:
+        def __init__(self):
+            self.data, self.round_trips = {}, 0
+
+        async def mget(self, keys):
+            self.round_trips += 1
+            return [self.data.get(key) for key in keys]
+
+        def pipeline(self, transaction=True):
+            return Pipeline(self)
+
+    redis = Redis()
+    cache = TieredCache("batched_test", 100, serialize=pickle.dumps, deserialize=pickle.loads)
+    cache.redis_enabled = True
+    cache._redis = lambda: redis
+
+    async def run():
+        await cache.set_many({f"k{i}": i for i in range(10)})
+        assert redis.round_trips == 1
+        cache.clear()
+        await cache.set("local", -1)
+        redis.round_trips = 0
+        found = await cache.get_many([f"k{i}" for i in range(12)] + ["local", "k1"])
+        assert redis.round_trips == 1
+        assert found == {**{f"k{i}": i for i in range(10)}, "local": -1}
+        # Redis hits were promoted to the local tier
+        await cache.get_many(["k0", "k9"])
+        assert redis.round_trips == 1
+
+    asyncio.run(run())
+    assert cache.stats()["redis_hits"] == 10
+
+
+def test_async_database_url():
+    """Test that DATABASE_URL is mapped onto the asyncio drivers"""
+    from app.core.database import async_database_url
+
+    assert async_database_url("sqlite:///./pocketgenie.db") == "sqlite+aiosqlite:///./pocketgenie.db"
+    assert (
+        async_database_url("postgresql+psycopg2://user:pw@db:5432/pocketgenie")
+        == "postgresql+asyncpg://user:pw@db:5432/pocketgenie"
+    )
+
+
+def test_sqlite_engine_profile(tmp_path):
+    """Test that file-backed SQLite engines get WAL pragmas and a metered pool"""
+    from sqlalchemy import text
+    from app.core.database import build_async_engine, pool_stats
+
+    engine = build_async_engine(f"sqlite:///{tmp_path / 'profile.db'}")
+
+    async def run():
+        async with engine.connect() as conn:
+            journal_mode = (await conn.execute(text("PRAGMA journal_mode"))).scalar()
+            synchronous = (await conn.execute(text("PRAGMA synchronous"))).scalar()
+            during = pool_stats(engine)
+        await engine.dispose()
+        return journal_mode, synchronous, during
+
+    journal_mode, synchronous, during = asyncio.run(run())
+    assert journal_mode == "wal"
+    assert synchronous == 1  # NORMAL
+    assert during["checked_out"] == 1
+    assert during["checkouts"] == 1
+    assert "wait_max_ms" in during
+
+
+def test_metrics_include_database_pool(client):
+    """Test that connection pool stats are exposed"""
+    assert "pool" in client.get("/metrics").json()["database"]
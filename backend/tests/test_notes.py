@@ -107,3 +107,162 @@ def test_delete_note(client):
     get_response = client.get(f"/api/v1/notes/{note_id}")
     assert get_response.status_code == 404
 
+
+def test_create_note_summarizes_in_background(client):
+    """Test that note creation returns before the summary is generated"""
+    response = client.post(
+        "/api/v1/notes/",
+        json={
+            "title": "Meeting",
+            "content": "Discussed roadmap. Agreed on dates. Ship beta. Write docs.",
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["summary_status"] == "pending"
+    assert data["summary"] is None
+
+    response = client.get(f"/api/v1/notes/{data['id']}/summary")
+    assert response.status_code == 200
+    assert response.json()["summary_status"] in ("pending", "ready")
+
+
+def test_summary_pipeline_stores_summary(db_session):
+    """Test that a summary job writes the summary and marks it ready"""
+    import asyncio
+    import httpx
+    from app.models.models import Note
+    from app.services.ai_service import AIService
+    from app.services.llm_client import LLMClient
+    from app.services.summary_pipeline import SummaryPipeline
+
+    llm = LLMClient(
+        base_url="http://llm.test",
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(
+                200, json={"choices": [{"text": "Short summary\n- Point one"}]}
+            )
+        ),
+    )
+    pipeline = SummaryPipeline(session_factory=lambda: db_session, ai_service=AIService(llm))
+
+    async def run():
+        db_session.add(Note(id="bg", title="Bg", content="Long content", summary_status="pending"))
+        await db_session.commit()
+        await pipeline.process("bg")
+        db_session.expire_all()
+        return await db_session.get(Note, "bg")
+
+    note = asyncio.run(run())
+    assert note.summary_status == "ready"
+    assert note.summary == "Short summary"
+
+
+def test_pending_summaries_are_swept_into_the_queue(db_engine):
+    """Test that notes left pending by a restart are summarized once workers start"""
+    import asyncio
+    import httpx
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.models.models import Note
+    from app.services.ai_service import AIService
+    from app.services.llm_client import LLMClient
+    from app.services.summary_pipeline import SummaryPipeline
+
+    llm = LLMClient(
+        base_url="http://llm.test",
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"choices": [{"text": "Swept summary"}]})
+        ),
+    )
+    session_factory = async_sessionmaker(db_engine, expire_on_commit=False)
+    pipeline = SummaryPipeline(session_factory=session_factory, ai_service=AIService(llm))
+
+    async def run():
+        async with session_factory() as db:
+            db.add_all(
+                [Note(id=f"p{i}", title="P", content=f"Note {i}") for i in range(5)]
+                + [Note(id="r", title="R", content="Done", summary_status="ready")]
+            )
+            await db.commit()
+        await pipeline.start(workers=2)
+        try:
+            pipeline.enqueue_pending()
+            await pipeline._queue.join()
+        finally:
+            await pipeline.stop()
+        async with session_factory() as db:
+            return dict((await db.execute(select(Note.id, Note.summary))).all())
+
+    summaries = asyncio.run(run())
+    assert summaries == {**{f"p{i}": "Swept summary" for i in range(5)}, "r": None}
+
+
+def test_celery_enqueue_does_not_block_and_falls_back_locally(monkeypatch):
+    """Test that a slow, failing broker publish stays off the loop and runs the job here"""
+    import asyncio
+    import time
+    from app.core.config import settings
+    from app.services import summary_pipeline as pipeline_module
+    from app.services.summary_pipeline import SummaryPipeline
+
+    def slow_broker(note_id):
+        time.sleep(0.2)
+        raise ConnectionError("broker down")
+
+    monkeypatch.setattr(settings, "SUMMARY_QUEUE", "celery")
+    monkeypatch.setattr(pipeline_module, "_publish_summary", slow_broker)
+    pipeline = SummaryPipeline(session_factory=None, ai_service=object())
+    processed = []
+
+    async def process(note_id):
+        processed.append(note_id)
+
+    pipeline.process = process
+
+    async def run():
+        await pipeline.start(workers=1)
+        try:
+            started = time.monotonic()
+            pipeline.enqueue("n1")
+            assert time.monotonic() - started < 0.1
+            while not processed:
+                await asyncio.sleep(0.01)
+        finally:
+            await pipeline.stop()
+
+    asyncio.run(asyncio.wait_for(run(), timeout=5))
+    assert processed == ["n1"]
+
+
+def test_get_summary_not_found(client):
+    """Test summary status for a missing note"""
+    response = client.get("/api/v1/notes/missing/summary")
+    assert response.status_code == 404
+
+
+def test_bulk_create_and_export_notes(client):
+    """Test bulk note creation queues summaries and round-trips through export"""
+    import json
+
+    response = client.post(
+        "/api/v1/notes/bulk",
+        json={
+            "items": [
+                {"title": "Bulk note", "content": "First. Second.", "category": "work"},
+                {"title": "No content"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 1
+    assert data["failed"] == 1
+    assert "content" in data["results"][1]["error"]
+
+    response = client.get("/api/v1/notes/export", params={"category": "work"})
+    assert response.status_code == 200
+    notes = [json.loads(line) for line in response.text.splitlines()]
+    assert len(notes) == 1
+    assert notes[0]["id"] == data["results"][0]["id"]
+    assert notes[0]["summary_status"] in ("pending", "ready")
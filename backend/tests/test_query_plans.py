@@ -0,0 +1,229 @@
+"""
+Query planner coverage: every query issued by the services must use an index
+"""
+
+import asyncio
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.models.fulltext import FULLTEXT_COLUMNS, trigger_statements
+from app.models.models import DeviceSyncLog, Note, Task
+from app.services.chunk_service import ChunkService
+from app.services.note_service import NoteService
+from app.services.priority_service import PriorityService
+from app.services.search_service import SearchService
+from app.services.summary_pipeline import SummaryPipeline
+from app.services.sync_service import SyncService
+from app.services.task_service import TaskService
+
+# A virtual table scan without constraints, e.g. FTS5 filtering an UNINDEXED column
+_VIRTUAL_FULL_SCAN = re.compile(r"VIRTUAL TABLE INDEX \d+:$")
+# Queries that read every row by design
+FULL_SCAN_ALLOWED = (
+    "embedding IS NOT NULL",  # Building the in-memory vector index
+)
+
+
+@pytest.fixture
+def captured(db_engine, db_session):
+    """Record SELECT, UPDATE and DELETE statements issued while the test runs"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip().upper().startswith(
+            ("SELECT", "UPDATE", "DELETE")
+        ):
+            statements.append((statement, parameters))
+
+    db_session.add_all(
+        [
+            Task(
+                id=f"t{i}",
+                title=f"Task {i}",
+                category="work" if i % 2 else "home",
+                completed=i % 3 == 0,
+                due_date=datetime(2030, 1, 1) + timedelta(days=i) if i % 4 else None,
+            )
+            for i in range(20)
+        ]
+        + [Note(id=f"n{i}", title=f"Note {i}", content="c", category="work") for i in range(5)]
+    )
+    asyncio.run(db_session.commit())
+
+    event.listen(db_engine.sync_engine, "before_cursor_execute", capture)
+    yield statements
+    event.remove(db_engine.sync_engine, "before_cursor_execute", capture)
+
+
+def _plan(db_session, statement, parameters):
+    async def explain():
+        connection = await db_session.connection()
+        result = await connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in result]
+
+    return asyncio.run(explain())
+
+
+def _unindexed_steps(db_session, statement, parameters):
+    plan = _plan(db_session, statement, parameters)
+    return [
+        step
+        for step in plan
+        if step.startswith("SCAN")
+        and not step.endswith("CONSTANT ROWS")  # An inline VALUES list, not a table
+        and ("INDEX" not in step or _VIRTUAL_FULL_SCAN.search(step))
+    ]
+
+
+def _assert_all_indexed(db_session, statements):
+    assert statements, "no queries were captured"
+    for statement, parameters in statements:
+        if any(allowed in statement for allowed in FULL_SCAN_ALLOWED):
+            continue
+        scans = _unindexed_steps(db_session, statement, parameters)
+        assert not scans, f"full table scan {scans} for:\n{statement}"
+
+
+def test_task_queries_use_indexes(db_session, captured):
+    """Test list/get/update paths in TaskService"""
+    service = TaskService()
+
+    async def run():
+        for order in ("created_at", "due_date", "ai_priority"):
+            for completed in (None, True, False):
+                for category in (None, "work"):
+                    cursor = None
+                    for _ in range(3):  # Follow cursors across the NULL boundary
+                        _, cursor = await service.list_tasks(
+                            db_session, 0, 4, completed, category, cursor, order
+                        )
+                        if not cursor:
+                            break
+        await service.get_task(db_session, "t1")
+        await service.complete_task(db_session, "t2")
+        await PriorityService().rescore(db_session, batch_size=5)
+        await PriorityService().rank_open_tasks(db_session, 5)
+
+    asyncio.run(run())
+    _assert_all_indexed(db_session, captured)
+
+
+def test_open_tasks_by_due_date_read_in_index_order(db_session, captured):
+    """Test that the home-screen query needs no sort step"""
+    asyncio.run(TaskService().list_tasks(db_session, 0, 10, False, None, None, "due_date"))
+
+    statement, parameters = next(s for s in captured if "due_date IS NOT NULL" in s[0])
+    plan = _plan(db_session, statement, parameters)
+    assert any("ix_tasks_open_due_date" in step for step in plan)
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+
+def test_note_queries_use_indexes(db_session, captured):
+    """Test list/get paths in NoteService"""
+    service = NoteService()
+
+    async def run():
+        for category in (None, "work"):
+            _, cursor = await service.list_notes(db_session, 0, 2, category)
+            await service.list_notes(db_session, 0, 2, category, cursor)
+        await service.get_note(db_session, "n1")
+
+    asyncio.run(run())
+    _assert_all_indexed(db_session, captured)
+
+
+def test_search_row_fetch_uses_primary_key(db_session, captured):
+    """Test that search only loads its top-k rows by primary key"""
+    asyncio.run(SearchService()._fetch(db_session, Task, [("t1", 0.9), ("t2", 0.8)]))
+    _assert_all_indexed(db_session, captured)
+
+
+def test_rescoring_loads_embeddings_by_primary_key(db_session, captured):
+    """Test that quantized search rescoring looks candidates up by key"""
+    service = SearchService()
+
+    async def run():
+        await service._stored_embeddings(db_session, "task", "title", ["t1", "t2"])
+        await service._stored_embeddings(db_session, "note", "chunk", ["n1:abc", "n2:def"])
+
+    asyncio.run(run())
+    _assert_all_indexed(db_session, captured)
+
+
+def test_keyword_search_uses_fulltext_index(db_session, captured):
+    """Test that keyword candidates come from the FTS index, joined by primary key"""
+    service = SearchService()
+    hits = asyncio.run(service._keyword_hits(db_session, "task", "task 3", 10))
+    assert hits[0][0] == "t3"
+    _assert_all_indexed(db_session, captured)
+
+
+def test_fulltext_triggers_look_rows_up_by_key(db_session):
+    """Test that keeping the FTS tables in sync costs no scan per task/note write"""
+    for table in FULLTEXT_COLUMNS:
+        for statements in trigger_statements(table).values():
+            for statement in statements:
+                # Trigger row references become plain values for EXPLAIN
+                explained = re.sub(r"\b(?:new|old)\.\w+", "'t1'", statement)
+                scans = _unindexed_steps(db_session, explained, ())
+                assert not scans, f"full table scan {scans} for:\n{statement}"
+
+
+def test_pending_summary_sweep_uses_index(db_session, captured):
+    """Test that the startup sweep reads only the pending notes"""
+    pipeline = SummaryPipeline(session_factory=lambda: db_session)
+    pipeline.enqueue = lambda note_id: None
+    asyncio.run(pipeline._enqueue_pending(batch_size=2))
+    _assert_all_indexed(db_session, captured)
+
+
+def test_chunk_maintenance_uses_indexes(db_session, captured):
+    """Test that re-chunking and embedding pending chunks look chunks up by key"""
+    service = ChunkService()
+
+    async def run():
+        await service.rechunk(db_session, "task", {"t1": "new text", "t2": None})
+        await db_session.commit()
+        await service.embed_pending(db_session, "task")
+        await service.embed_pending(db_session, "task", ["t1"])
+
+    asyncio.run(run())
+    _assert_all_indexed(db_session, captured)
+
+
+def test_sync_changes_use_indexes(db_session, captured):
+    """Test that delta sync reads a log range and loads entities by primary key"""
+    db_session.add_all(
+        [DeviceSyncLog(entity_type="task", entity_id=f"t{i}", action="update") for i in range(5)]
+        + [DeviceSyncLog(entity_type="note", entity_id="n1", action="update")]
+    )
+    asyncio.run(db_session.commit())
+    captured.clear()
+
+    asyncio.run(SyncService().get_changes(db_session, 2, "phone", 3))
+    _assert_all_indexed(db_session, captured)
+
+
+def test_tag_filters_and_facets_use_indexes(db_session, captured):
+    """Test tag-filtered listing, facet maintenance and facet counts"""
+    from app.services.facet_service import facet_service
+
+    async def run():
+        await facet_service.refacet(
+            db_session, "task", {f"t{i}": ("work", ["a", "b"]) for i in range(6)}
+        )
+        await facet_service.refacet(db_session, "task", {"t1": ("home", ["a"]), "t2": None})
+        await db_session.commit()
+        cursor = None
+        for _ in range(3):
+            _, cursor = await TaskService().list_tasks(
+                db_session, 0, 2, None, None, cursor, "created_at", ["a", "b"]
+            )
+        await NoteService().list_notes(db_session, 0, 2, None, None, ["a"])
+        await facet_service.counts(db_session, ["task", "note"], 10)
+
+    asyncio.run(run())
+    _assert_all_indexed(db_session, captured)
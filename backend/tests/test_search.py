@@ -0,0 +1,620 @@
+"""
+Tests for semantic search
+"""
+
+import numpy as np
+import pytest
+from app.services.chunk_service import split_chunks
+from app.services.vector_index import QuantizedVectorIndex, VectorIndex
+
+
+def _brute_force(vectors, query, limit):
+    matrix = np.stack([v / np.linalg.norm(v) for v in vectors.values()])
+    scores = matrix @ (query / np.linalg.norm(query))
+    ids = list(vectors)
+    order = np.argsort(-scores)[:limit]
+    return [ids[i] for i in order]
+
+
+def test_vector_index_matches_brute_force():
+    """Test that the vectorized top-k agrees with an exhaustive scan"""
+    rng = np.random.default_rng(0)
+    vectors = {f"id-{i}": rng.normal(size=32) for i in range(200)}
+
+    index = VectorIndex()
+    index.build(vectors.items())
+
+    # Exercise in-place updates and swap-with-last removal
+    for i in range(0, 200, 7):
+        del vectors[f"id-{i}"]
+        index.remove(f"id-{i}")
+    vectors["id-1"] = rng.normal(size=32)
+    index.upsert("id-1", vectors["id-1"])
+    vectors["new"] = rng.normal(size=32)
+    index.upsert("new", vectors["new"])
+
+    query = rng.normal(size=32)
+    hits = index.search(query, limit=10)
+
+    assert len(index) == len(vectors)
+    assert [entity_id for entity_id, _ in hits] == _brute_force(vectors, query, 10)
+
+
+def test_vector_index_hnsw_mode():
+    """Test the approximate index returns the exact nearest neighbour"""
+    pytest.importorskip("hnswlib")
+    rng = np.random.default_rng(1)
+    vectors = {f"id-{i}": rng.normal(size=16) for i in range(100)}
+
+    index = VectorIndex(mode="hnsw")
+    index.build(vectors.items())
+    index.remove("id-5")
+
+    hits = index.search(vectors["id-7"], limit=3)
+    assert hits[0][0] == "id-7"
+    assert "id-5" not in [entity_id for entity_id, _ in index.search(vectors["id-5"], limit=100)]
+
+
+@pytest.mark.parametrize(
+    "create",
+    [
+        lambda path: VectorIndex(snapshot_path=path),
+        lambda path: QuantizedVectorIndex("int8", snapshot_path=path),
+        lambda path: QuantizedVectorIndex("binary", snapshot_path=path),
+    ],
+    ids=["float32", "int8", "binary"],
+)
+def test_vector_index_snapshot_round_trip(tmp_path, create):
+    """Test that a saved index is restored on the next start, then discarded"""
+    rng = np.random.default_rng(2)
+    vectors = {f"id-{i}": rng.normal(size=64) for i in range(20)}
+    path = str(tmp_path / "task.npz")
+
+    index = create(path)
+    index.build(vectors.items())
+    index.remove("id-3")
+    index.save()
+
+    restored = create(path)
+    assert not restored.is_stale()
+    assert len(restored) == 19
+    assert restored.search(vectors["id-4"], limit=1)[0][0] == "id-4"
+    # Consumed: a crash before the next save must not restore stale contents
+    assert create(path).is_stale()
+
+
+@pytest.mark.parametrize("method", ["int8", "binary"])
+def test_quantized_index_candidates_contain_exact_top_k(method):
+    """Test that rescoring the code-ranked candidates recovers the exact top-k"""
+    rng = np.random.default_rng(3)
+    # Clustered like real embeddings: topics with variation inside each
+    centers = rng.normal(size=(10, 384))
+    vectors = {f"id-{i}": centers[i % 10] + rng.normal(size=384) for i in range(500)}
+
+    index = QuantizedVectorIndex(method)
+    index.build(vectors.items())
+    for i in range(0, 500, 11):
+        del vectors[f"id-{i}"]
+        index.remove(f"id-{i}")
+    vectors["id-1"] = centers[3] + rng.normal(size=384)
+    index.upsert("id-1", vectors["id-1"])
+
+    assert index.approximate
+    assert index.nbytes * 3 < len(vectors) * 384 * 4
+    found = 0
+    for i in range(20):
+        query = centers[i % 10] + rng.normal(size=384)
+        exact = _brute_force(vectors, query, 5)
+        candidates = {key for key, _ in index.search(query, 5 * index.rescore_factor)}
+        found += len(candidates & set(exact))
+    assert found / (20 * 5) >= 0.9
+
+    if method == "int8":
+        query = rng.normal(size=384)
+        for key, score in index.search(query, 5):
+            vector = vectors[key] / np.linalg.norm(vectors[key])
+            assert score == pytest.approx(vector @ (query / np.linalg.norm(query)), abs=0.01)
+
+
+def test_quantized_search_returns_exact_similarities(client, monkeypatch):
+    """Test that search over quantized indexes reports rescored cosine similarities"""
+    from app.core.config import settings
+    from app.services.vector_index import reset_vector_indexes
+
+    client.post("/api/v1/tasks/", json={"title": "Renew passport", "priority": 1})
+    client.post("/api/v1/tasks/", json={"title": "Passport photos", "priority": 0})
+    client.post(
+        "/api/v1/notes/",
+        json={"title": "Travel", "content": "Check the passport expiry date before booking"},
+    )
+    request = {"query": "passport", "entity_type": "all", "limit": 10, "mode": "semantic"}
+    exact = client.post("/api/v1/search/semantic", json=request).json()["results"]
+    assert exact
+
+    for method in ("int8", "binary"):
+        monkeypatch.setattr(settings, "VECTOR_INDEX_QUANTIZATION", method)
+        reset_vector_indexes()
+        results = client.post("/api/v1/search/semantic", json=request).json()["results"]
+        assert {r["entity_id"]: r["similarity_score"] for r in results} == pytest.approx(
+            {r["entity_id"]: r["similarity_score"] for r in exact}
+        )
+
+
+def test_milvus_store_falls_back_to_local_until_connected(monkeypatch):
+    """Test local fallback while Milvus is down, reconnection, and post-write versions"""
+    import sys
+    import threading
+    from app.core.config import settings
+    from app.services import vector_index, vector_store
+
+    monkeypatch.setattr(settings, "VECTOR_STORE", "milvus")
+    monkeypatch.setitem(sys.modules, "pymilvus", None)
+    monkeypatch.setattr(vector_store, "_milvus_collection", None)
+    monkeypatch.setattr(vector_store, "_milvus_failed_at", None)
+    store = vector_index._create_index("task")
+
+    store.build([("a", np.array([1.0, 0.0]))])
+    store.upsert("b", np.array([0.0, 1.0]))
+    assert [key for key, _ in store.search(np.array([0.0, 1.0]), 1)] == ["b"]
+    assert not store.is_stale()
+
+    written = threading.Event()
+
+    class Collection:
+        def __init__(self):
+            self.rows = {}
+
+        def query(self, expr, output_fields, limit):
+            return [{"pk": pk} for pk in list(self.rows)[:limit]]
+
+        def delete(self, expr):
+            self.rows.clear()
+
+        def insert(self, columns):
+            self.rows.update(zip(columns[0], columns[4]))
+
+        def upsert(self, columns):
+            written.wait(5)
+            self.insert(columns)
+
+    collection = Collection()
+    collection.rows["stale"] = [1.0, 0.0]
+    monkeypatch.setattr(vector_store, "_connect_milvus", lambda: collection)
+    monkeypatch.setattr(vector_store, "MILVUS_RETRY_SECONDS", 0.0)
+
+    # Writes made while disconnected are missing from the non-empty collection
+    assert store.is_stale()
+    store.build([("a", np.array([1.0, 0.0])), ("b", np.array([0.0, 1.0]))])
+    assert not store.is_stale() and set(collection.rows) == {"task:title:a", "task:title:b"}
+
+    version = store.version
+    store.upsert("c", np.array([1.0, 1.0]))
+    assert store.version == version  # Not searchable yet
+    written.set()
+    vector_store._milvus_writer.submit(lambda: None).result(5)
+    assert "task:title:c" in collection.rows and store.version != version
+
+
+def test_semantic_search(client):
+    """Test semantic search picks up created and deleted items"""
+    client.post("/api/v1/tasks/", json={"title": "Buy groceries", "priority": 1})
+    note = client.post(
+        "/api/v1/notes/",
+        json={"title": "Groceries list", "content": "Milk, eggs, bread"},
+    ).json()
+
+    response = client.post(
+        "/api/v1/search/semantic",
+        json={"query": "groceries", "entity_type": "all", "limit": 10},
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert {r["entity_type"] for r in results} == {"task", "note"}
+
+    # Deleting keeps the index in sync
+    client.delete(f"/api/v1/notes/{note['id']}")
+    response = client.post(
+        "/api/v1/search/semantic",
+        json={"query": "groceries", "entity_type": "note"},
+    )
+    assert response.json()["results"] == []
+
+
+def test_hybrid_search_finds_exact_terms(client):
+    """Test that a ticket number only present in a description is found"""
+    for title in ("Login page redesign", "Login bug triage"):
+        client.post("/api/v1/tasks/", json={"title": title})
+    target = client.post(
+        "/api/v1/tasks/",
+        json={"title": "Customer escalation", "description": "Tracked in INC4821"},
+    ).json()
+
+    def search(query, mode):
+        response = client.post(
+            "/api/v1/search/semantic",
+            json={"query": query, "entity_type": "task", "mode": mode},
+        )
+        return response.json()["results"]
+
+    results = search("inc4821", "hybrid")
+    assert results[0]["entity_id"] == target["id"]
+    # Matches from both retrievers outrank matches from one
+    results = search("login bug", "hybrid")
+    assert results[0]["title"] == "Login bug triage"
+    assert results[0]["score"] > results[1]["score"]
+
+
+def test_keyword_search_follows_writes(client):
+    """Test that the full-text index tracks creates, edits and deletes"""
+    note = client.post(
+        "/api/v1/notes/", json={"title": "Trip", "content": "Book the Lisbon hotel"}
+    ).json()
+
+    def keyword(query):
+        response = client.post(
+            "/api/v1/search/semantic",
+            json={"query": query, "entity_type": "note", "mode": "keyword"},
+        )
+        return [r["entity_id"] for r in response.json()["results"]]
+
+    assert keyword("lisbon") == [note["id"]]
+    client.put(f"/api/v1/notes/{note['id']}", json={"content": "Book the Porto hotel"})
+    assert keyword("lisbon") == []
+    assert keyword("porto") == [note["id"]]
+    client.delete(f"/api/v1/notes/{note['id']}")
+    assert keyword("porto") == []
+    # Query syntax characters are not passed through to the index
+    assert keyword('"porto* OR -') == []
+
+
+def test_keyword_search_ranks_title_hits_first(client):
+    """Test that a title match outranks a match only in the content"""
+    body_only = client.post(
+        "/api/v1/notes/", json={"title": "Weekend", "content": "Pack for the Lisbon trip"}
+    ).json()
+    in_title = client.post(
+        "/api/v1/notes/", json={"title": "Lisbon", "content": "Pack for the weekend trip"}
+    ).json()
+
+    response = client.post(
+        "/api/v1/search/semantic",
+        json={"query": "lisbon", "entity_type": "note", "mode": "keyword"},
+    )
+    assert [r["entity_id"] for r in response.json()["results"]] == [
+        in_title["id"],
+        body_only["id"],
+    ]
+
+
+def test_keyword_search_survives_renumbered_rowids(client, db_engine):
+    """Test that keyword hits and index upkeep don't depend on the notes' rowids"""
+    import asyncio
+    from sqlalchemy import text
+
+    ids = [
+        client.post("/api/v1/notes/", json={"title": f"Note {i}", "content": word}).json()["id"]
+        for i, word in enumerate(["alpha", "bravo", "charlie"])
+    ]
+    client.delete(f"/api/v1/notes/{ids[0]}")
+
+    async def renumber():
+        # What VACUUM or a batch migration copying the table is free to do
+        async with db_engine.begin() as conn:
+            await conn.execute(text("UPDATE notes SET rowid = rowid + 100"))
+
+    asyncio.run(renumber())
+
+    def keyword(query):
+        response = client.post(
+            "/api/v1/search/semantic",
+            json={"query": query, "entity_type": "note", "mode": "keyword"},
+        )
+        return [r["entity_id"] for r in response.json()["results"]]
+
+    assert keyword("charlie") == [ids[2]]
+    client.put(f"/api/v1/notes/{ids[2]}", json={"content": "delta"})
+    assert keyword("charlie") == []
+    assert keyword("delta") == [ids[2]]
+    assert keyword("bravo") == [ids[1]]
+
+
+def test_repeated_search_is_served_from_cache(client, monkeypatch):
+    """Test that normalized repeats skip the search and writes invalidate them"""
+    from app.services.search_service import SearchService
+
+    searches = []
+    search = SearchService._search
+
+    async def counting_search(self, db, query, *args):
+        searches.append(query)
+        return await search(self, db, query, *args)
+
+    monkeypatch.setattr(SearchService, "_search", counting_search)
+
+    def ids(query):
+        response = client.post(
+            "/api/v1/search/semantic", json={"query": query, "entity_type": "task"}
+        )
+        return [r["entity_id"] for r in response.json()["results"]]
+
+    first = client.post("/api/v1/tasks/", json={"title": "Buy groceries"}).json()
+    assert ids("groceries") == [first["id"]]
+    assert ids("  Groceries ") == [first["id"]]
+    assert searches == ["groceries"]
+
+    second = client.post("/api/v1/tasks/", json={"title": "Groceries for the party"}).json()
+    assert set(ids("groceries")) == {first["id"], second["id"]}
+    client.put(f"/api/v1/tasks/{second['id']}", json={"priority": 3})
+    ids("groceries")
+    assert searches == ["groceries"] * 3
+
+
+def test_search_cache_ignores_rolled_back_writes(db_session):
+    """Test that only committed writes change the search cache state"""
+    import asyncio
+    from app.services.search_cache import mark_changed, state_token
+
+    async def run(finish):
+        before = state_token(["note"])
+        mark_changed(db_session, "note")
+        await finish()
+        return before, state_token(["note"])
+
+    before, after = asyncio.run(run(db_session.rollback))
+    assert before == after
+    before, after = asyncio.run(run(db_session.commit))
+    assert before != after
+
+
+def test_sync_push_invalidates_search_cache(client):
+    """Test that mutations pushed by devices invalidate cached results too"""
+    from app.services.search_cache import state_token
+
+    task = client.post("/api/v1/tasks/", json={"title": "Water plants"}).json()
+    before = state_token(["task", "note"])
+    # Leaves every vector store unchanged
+    client.post(
+        "/api/v1/sync/push",
+        json={
+            "device_id": "phone",
+            "mutations": [
+                {"entity_type": "task", "action": "update", "entity_id": task["id"],
+                 "data": {"priority": 2}},
+            ],
+        },
+    )
+    after = state_token(["task", "note"])
+    assert before[0] != after[0]
+    assert before[1] == after[1]
+
+
+def test_search_warmup_precomputes_query_embeddings():
+    """Test that warmup fills the query embedding cache under normalized keys"""
+    import asyncio
+    from app.services.search_cache import query_embedding_cache
+    from app.services.search_service import SearchService
+
+    asyncio.run(SearchService().warmup(["Today", "team  meeting", ""]))
+    for query in ("today", "team meeting"):
+        assert asyncio.run(query_embedding_cache.get(query))
+
+
+def test_split_chunks_overlaps_windows_within_paragraphs():
+    """Test window size, overlap and paragraph boundaries"""
+    words = [f"w{i}" for i in range(10)]
+    chunks = split_chunks(" ".join(words) + "\n\nshort paragraph", size=4, overlap=1)
+    assert chunks == [
+        "w0 w1 w2 w3",
+        "w3 w4 w5 w6",
+        "w6 w7 w8 w9",
+        "short paragraph",
+    ]
+    assert split_chunks(None) == []
+
+
+def test_long_note_content_is_searchable(client, db_session):
+    """Test that text deep inside a note is found and edits re-chunk minimally"""
+    import asyncio
+    from sqlalchemy import select
+    from app.models.models import ContentChunk
+    from app.services.chunk_service import chunk_service
+
+    paragraphs = [
+        "Monday standup notes about the release train",
+        "Remember the quarterly budget spreadsheet review",
+        "Dentist appointment moved to Thursday afternoon",
+    ]
+    note = client.post(
+        "/api/v1/notes/", json={"title": "Weekly journal", "content": "\n\n".join(paragraphs)}
+    ).json()
+
+    def search(query):
+        response = client.post(
+            "/api/v1/search/semantic",
+            json={"query": query, "entity_type": "note", "mode": "semantic"},
+        )
+        return response.json()["results"]
+
+    def chunks():
+        async def run():
+            rows = await db_session.scalars(
+                select(ContentChunk).where(ContentChunk.entity_id == note["id"])
+            )
+            return {chunk.content_hash: chunk for chunk in rows}
+
+        return asyncio.run(run())
+
+    def embed_pending():
+        # What the background pipeline does after each write
+        return asyncio.run(chunk_service.embed_pending(db_session, "note"))
+
+    # Writes store chunks without waiting for the model
+    assert all(chunk.embedding is None for chunk in chunks().values())
+    assert embed_pending() == 3
+    results = search("quarterly budget spreadsheet")
+    assert [r["entity_id"] for r in results] == [note["id"]]
+    assert results[0]["similarity_score"] > 0.5
+
+    def chunk_texts():
+        db_session.expire_all()
+        return {content_hash: chunk.content for content_hash, chunk in chunks().items()}
+
+    before = chunk_texts()
+    assert sorted(before.values()) == sorted(paragraphs)
+
+    paragraphs[1] = "Book flights for the offsite"
+    client.put(f"/api/v1/notes/{note['id']}", json={"content": "\n\n".join(paragraphs)})
+    after = chunk_texts()
+    assert len(set(before) & set(after)) == 2
+    assert embed_pending() == 1  # Only the edited paragraph is embedded again
+    assert search("quarterly budget spreadsheet") == []
+    assert [r["entity_id"] for r in search("flights offsite")] == [note["id"]]
+
+    client.delete(f"/api/v1/notes/{note['id']}")
+    assert chunk_texts() == {}
+    assert search("flights offsite") == []
+
+
+def test_chunks_are_embedded_by_the_background_pipeline(db_engine, monkeypatch):
+    """Test that task writes leave chunks pending and pipeline workers embed them"""
+    import asyncio
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.models.models import ContentChunk
+    from app.schemas.schemas import TaskCreate
+    from app.services import summary_pipeline as pipeline_module
+    from app.services.summary_pipeline import SummaryPipeline
+    from app.services.task_service import TaskService
+    from app.services.vector_index import chunk_indexes, reset_vector_indexes
+
+    reset_vector_indexes()
+    chunk_indexes["task"].build([])  # Loaded, as after a first search
+    session_factory = async_sessionmaker(db_engine, expire_on_commit=False, autoflush=False)
+    pipeline = SummaryPipeline(session_factory=session_factory)
+    monkeypatch.setattr(pipeline_module, "summary_pipeline", pipeline)
+    description = "Collect receipts\n\nFile the expense report"
+
+    async def run():
+        await pipeline.start(workers=1)
+        try:
+            async with session_factory() as db:
+                task = await TaskService().create_task(
+                    db, TaskCreate(title="Expenses", description=description)
+                )
+                pending = await db.scalars(
+                    select(ContentChunk.embedding).where(ContentChunk.entity_id == task.id)
+                )
+                assert list(pending) == [None, None]
+            await pipeline._queue.join()
+            async with session_factory() as db:
+                embedded = await db.scalars(
+                    select(ContentChunk.embedding).where(ContentChunk.entity_id == task.id)
+                )
+                return task.id, list(embedded)
+        finally:
+            await pipeline.stop()
+
+    _, embeddings = asyncio.run(run())
+    assert len(embeddings) == 2 and all(e is not None for e in embeddings)
+    assert len(chunk_indexes["task"]) == 2
+    reset_vector_indexes()
+
+
+def test_embedding_column_is_float32(db_session):
+    """Test embeddings round-trip through the binary vector column"""
+    import asyncio
+    from app.models.models import Task
+
+    async def run():
+        db_session.add(Task(id="vec", title="Vector", embedding=[0.25, -1.0, 3.5]))
+        await db_session.commit()
+        db_session.expire_all()
+        return (await db_session.get(Task, "vec")).embedding
+
+    embedding = asyncio.run(run())
+    assert embedding.dtype == np.float32
+    assert embedding.tolist() == [0.25, -1.0, 3.5]
+
+
+def test_suggest_index_matches_word_prefixes():
+    """Test prefix matching, whole-word context, shared tags and removal"""
+    from app.services.suggest_index import SuggestIndex
+
+    index = SuggestIndex()
+    index.build(
+        [
+            ("task", "t1", "Buy groceries", "Errands", ["shopping", "Home"]),
+            ("task", "t2", "Grocery budget", "Finance", ["home", "HOME"]),
+            ("note", "n1", "Groceries list", None, []),
+        ]
+    )
+
+    def texts(query):
+        return [(match.kind, match.text) for match in index.suggest(query, 10)]
+
+    # Texts starting with the query first, each group alphabetical
+    assert texts("gro") == [
+        ("note", "Groceries list"), ("task", "Grocery budget"), ("task", "Buy groceries")
+    ]
+    assert texts("buy GRO") == [("task", "Buy groceries")]
+    assert texts("budget gro") == [("task", "Grocery budget")]
+    assert index.suggest("hom", 10)[0].count == 2
+
+    index.upsert("task", "t2", "Monthly budget", None, [])
+    assert texts("gro") == [("note", "Groceries list"), ("task", "Buy groceries")]
+    assert index.suggest("hom", 10)[0].count == 1
+    assert texts("fin") == []
+    index.remove("task", "t1")
+    assert texts("hom") == [] and texts("err") == []
+    assert texts("") == []
+
+
+def test_suggest_endpoint_follows_writes_without_the_model(client, monkeypatch):
+    """Test that suggestions track creates, edits and deletes without embedding anything"""
+    from app.services.embedding_service import EmbeddingService
+
+    task = client.post(
+        "/api/v1/tasks/", json={"title": "Plan team offsite", "category": "Work"}
+    ).json()
+    note = client.post(
+        "/api/v1/notes/",
+        json={"title": "Offsite agenda", "content": "Day one", "tags": ["planning"]},
+    ).json()
+
+    async def no_model(*args):
+        raise AssertionError("suggest must not embed")
+
+    def suggest(q):
+        with monkeypatch.context() as patch:
+            patch.setattr(EmbeddingService, "get_embedding", no_model)
+            response = client.get("/api/v1/search/suggest", params={"q": q})
+        assert response.status_code == 200
+        return [(s["kind"], s["text"], s["entity_id"]) for s in response.json()["suggestions"]]
+
+    assert suggest("off") == [
+        ("note", "Offsite agenda", note["id"]),
+        ("task", "Plan team offsite", task["id"]),
+    ]
+    assert suggest("pla") == [("task", "Plan team offsite", task["id"]), ("tag", "planning", None)]
+    assert suggest("wo") == [("category", "Work", None)]
+
+    client.put(f"/api/v1/tasks/{task['id']}", json={"title": "Book venue"})
+    assert suggest("venue") == [("task", "Book venue", task["id"])]
+    assert ("task", "Plan team offsite", task["id"]) not in suggest("off")
+    client.delete(f"/api/v1/tasks/{task['id']}")
+    assert suggest("venue") == [] and suggest("work") == []
+
+    # Mutations pushed by devices are indexed too
+    client.post(
+        "/api/v1/sync/push",
+        json={
+            "device_id": "phone",
+            "mutations": [
+                {"entity_type": "note", "action": "update", "entity_id": note["id"],
+                 "data": {"title": "Retreat agenda"}},
+            ],
+        },
+    )
+    assert suggest("retr") == [("note", "Retreat agenda", note["id"])]
+    assert suggest("offsite") == []
+    assert client.get("/api/v1/search/suggest", params={"q": ""}).status_code == 422
@@ -0,0 +1,223 @@
+"""
+Tests for delta sync API
+"""
+
+
+def _changes(client, since=0, **params):
+    response = client.get("/api/v1/sync/changes", params={"since": since, **params})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_sync_changes_since_cursor(client):
+    """Test that only changes after the cursor are returned, latest state first"""
+    phone = {"X-Device-ID": "phone"}
+    start = _changes(client)["cursor"]
+
+    task = client.post("/api/v1/tasks/", json={"title": "Buy milk"}, headers=phone).json()
+    note = client.post(
+        "/api/v1/notes/", json={"title": "Idea", "content": "Write it down."}
+    ).json()
+
+    data = _changes(client, start)
+    assert [(c["entity_type"], c["action"]) for c in data["changes"]] == [
+        ("task", "create"),
+        ("note", "create"),
+    ]
+    assert data["changes"][0]["task"]["title"] == "Buy milk"
+    assert data["has_more"] is False
+    cursor = data["cursor"]
+
+    client.put(f"/api/v1/tasks/{task['id']}", json={"title": "Buy oat milk"})
+    client.delete(f"/api/v1/notes/{note['id']}")
+
+    data = _changes(client, cursor)
+    by_id = {c["entity_id"]: c for c in data["changes"]}
+    assert by_id[task["id"]]["action"] == "update"
+    assert by_id[task["id"]]["task"]["title"] == "Buy oat milk"
+    assert by_id[note["id"]]["action"] == "delete"
+    assert by_id[note["id"]]["note"] is None
+
+    assert _changes(client, data["cursor"])["changes"] == []
+
+
+def test_sync_changes_collapses_and_skips_own_device(client):
+    """Test one entry per entity and that a device doesn't get its own writes back"""
+    start = _changes(client)["cursor"]
+    tablet = {"X-Device-ID": "tablet"}
+
+    task = client.post("/api/v1/tasks/", json={"title": "Draft"}).json()
+    client.put(f"/api/v1/tasks/{task['id']}", json={"priority": 2})
+    client.post(f"/api/v1/tasks/{task['id']}/complete", headers=tablet)
+    other = client.post("/api/v1/tasks/", json={"title": "Other"}, headers=tablet).json()
+
+    changes = _changes(client, start)["changes"]
+    assert [c["entity_id"] for c in changes] == [task["id"], other["id"]]
+    assert changes[0]["task"]["completed"] is True
+
+    changes = _changes(client, start, device_id="tablet")["changes"]
+    assert changes == []
+
+
+def test_sync_changes_pages_with_limit(client):
+    """Test that has_more and cursor walk the log in pages"""
+    start = _changes(client)["cursor"]
+    client.post("/api/v1/tasks/bulk", json={"items": [{"title": f"T{i}"} for i in range(5)]})
+
+    seen, cursor, has_more = [], start, True
+    while has_more:
+        data = _changes(client, cursor, limit=2)
+        seen += [c["task"]["title"] for c in data["changes"]]
+        cursor, has_more = data["cursor"], data["has_more"]
+    assert sorted(seen) == [f"T{i}" for i in range(5)]
+
+
+def test_sync_push_applies_batch(client):
+    """Test that a pushed offline queue is applied in order with per-mutation results"""
+    existing = client.post("/api/v1/tasks/", json={"title": "Existing"}).json()
+    start = _changes(client)["cursor"]
+
+    response = client.post(
+        "/api/v1/sync/push",
+        json={
+            "device_id": "phone",
+            "mutations": [
+                {"entity_type": "task", "action": "create", "entity_id": "offline-1",
+                 "data": {"title": "Made offline"}},
+                {"entity_type": "task", "action": "update", "entity_id": "offline-1",
+                 "data": {"priority": 3}},
+                {"entity_type": "note", "action": "create", "data": {"title": "No content"}},
+                {"entity_type": "task", "action": "delete", "entity_id": existing["id"]},
+                {"entity_type": "task", "action": "update", "entity_id": "missing",
+                 "data": {"title": "Gone"}},
+                {"entity_type": "note", "action": "delete", "entity_id": "never-existed"},
+            ],
+        },
+    )
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["status"] for r in results] == [
+        "applied", "applied", "error", "applied", "conflict", "applied"
+    ]
+    assert results[1]["task"]["title"] == "Made offline"
+    assert results[1]["task"]["priority"] == 3
+    assert "content" in results[2]["error"]
+
+    assert client.get("/api/v1/tasks/offline-1").json()["priority"] == 3
+    assert client.get(f"/api/v1/tasks/{existing['id']}").status_code == 404
+
+    # Pushed changes reach other devices but are not echoed to the pusher
+    changes = _changes(client, start)["changes"]
+    assert {(c["entity_id"], c["action"]) for c in changes} == {
+        ("offline-1", "create"),
+        (existing["id"], "delete"),
+    }
+    assert _changes(client, start, device_id="phone")["changes"] == []
+
+
+def test_sync_push_detects_conflicts(client):
+    """Test base_updated_at conflict detection and last-writer-wins without it"""
+    task = client.post("/api/v1/tasks/", json={"title": "Shared"}).json()
+    stale = "2000-01-01T00:00:00"
+
+    def push(mutation):
+        response = client.post(
+            "/api/v1/sync/push",
+            json={"device_id": "tablet", "mutations": [
+                {"entity_type": "task", "entity_id": task["id"], **mutation}
+            ]},
+        )
+        return response.json()["results"][0]
+
+    result = push({"action": "update", "data": {"title": "Stale"}, "base_updated_at": stale})
+    assert result["status"] == "conflict"
+    assert result["task"]["title"] == "Shared"
+
+    result = push({"action": "update", "data": {"title": "Fresh"},
+                   "base_updated_at": task["updated_at"]})
+    assert result["status"] == "applied"
+    assert result["task"]["title"] == "Fresh"
+
+    result = push({"action": "update", "data": {"title": "Forced"}})
+    assert result["status"] == "applied"
+    assert client.get(f"/api/v1/tasks/{task['id']}").json()["title"] == "Forced"
+
+
+def test_background_summary_does_not_conflict_with_device_edits(client, db_engine):
+    """Test that a summary written after a device synced a note doesn't reject its edit"""
+    import asyncio
+    from datetime import datetime
+    import httpx
+    from sqlalchemy import update
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+    from app.models.models import Note
+    from app.services.ai_service import AIService
+    from app.services.llm_client import LLMClient
+    from app.services.summary_pipeline import SummaryPipeline
+
+    note = client.post("/api/v1/notes/", json={"title": "Plan", "content": "Ship it."}).json()
+    session_factory = async_sessionmaker(db_engine, expire_on_commit=False, autoflush=False)
+
+    async def backdate():
+        # Timestamps have one-second resolution: make a bumped updated_at detectable
+        async with session_factory() as db:
+            await db.execute(
+                update(Note).where(Note.id == note["id"]).values(updated_at=datetime(2020, 1, 1))
+            )
+            await db.commit()
+
+    asyncio.run(backdate())
+    synced = client.get(f"/api/v1/notes/{note['id']}").json()
+
+    llm = LLMClient(
+        base_url="http://llm.test",
+        transport=httpx.MockTransport(
+            lambda request: httpx.Response(200, json={"choices": [{"text": "Ship\n- It"}]})
+        ),
+    )
+    pipeline = SummaryPipeline(session_factory=session_factory, ai_service=AIService(llm))
+    asyncio.run(pipeline.process(note["id"]))
+    summarized = client.get(f"/api/v1/notes/{note['id']}").json()
+    assert summarized["summary_status"] == "ready"
+    assert summarized["updated_at"] == synced["updated_at"]
+    assert note["id"] in [c["entity_id"] for c in _changes(client)["changes"]]
+
+    response = client.post(
+        "/api/v1/sync/push",
+        json={"device_id": "phone", "mutations": [
+            {"entity_type": "note", "action": "update", "entity_id": note["id"],
+             "data": {"title": "Plan v2"}, "base_updated_at": synced["updated_at"]},
+        ]},
+    )
+    assert response.json()["results"][0]["status"] == "applied"
+
+
+def test_sync_cursor_stops_before_unsettled_gaps(db_session):
+    """Test that the cursor waits out sequence gaps that may be uncommitted writes"""
+    import asyncio
+    from datetime import datetime, timedelta
+    from app.models.models import DeviceSyncLog
+    from app.services.sync_service import SyncService, settled_entries
+
+    now = datetime(2026, 1, 1, 12, 0)
+    old, recent = now - timedelta(minutes=5), now - timedelta(seconds=1)
+
+    def log(*rows):
+        return [
+            DeviceSyncLog(id=i, entity_type="task", entity_id=f"t{i}", action="delete", synced_at=at)
+            for i, at in rows
+        ]
+
+    entries = log((3, old), (4, recent), (6, recent), (7, recent))
+    assert settled_entries(entries, 2, now, 60) == entries[:2]
+    # A gap right after the cursor holds back everything past it
+    assert settled_entries(entries[2:], 4, now, 60) == []
+    # Old gaps were rolled back writes, not in-flight ones
+    rolled_back = log((3, old), (9, old), (10, recent))
+    assert settled_entries(rolled_back, 0, now, 60) == rolled_back
+
+    # SQLite commits in sequence order, so its gaps are never waited for
+    db_session.add_all(log((1, recent), (2, recent), (5, datetime.utcnow())))
+    asyncio.run(db_session.commit())
+    changes, cursor, has_more = asyncio.run(SyncService().get_changes(db_session, 0))
+    assert (cursor, has_more) == (5, False)
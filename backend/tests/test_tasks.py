@@ -2,6 +2,7 @@
 Tests for tasks API
 """
 
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 
@@ -129,3 +130,138 @@ def test_complete_task(client):
     data = response.json()
     assert data["completed"] is True
 
+
+def test_list_tasks_cursor_pagination(client):
+    """Test walking every page with the next-page cursor"""
+    due = datetime(2030, 1, 1)
+    created = []
+    for i in range(7):
+        payload = {"title": f"Paged {i}", "priority": 0}
+        if i % 3:
+            payload["due_date"] = (due + timedelta(days=i % 2)).isoformat()
+        created.append(client.post("/api/v1/tasks/", json=payload).json()["id"])
+
+    for order in ("created_at", "due_date", "ai_priority"):
+        seen = []
+        cursor = None
+        while True:
+            params = {"limit": 3, "order": order}
+            if cursor:
+                params["cursor"] = cursor
+            response = client.get("/api/v1/tasks/", params=params)
+            assert response.status_code == 200
+            seen.extend(t["id"] for t in response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert sorted(seen) == sorted(created)
+        assert len(seen) == len(set(seen))
+
+
+def test_list_tasks_by_ai_priority(client):
+    """Test that open tasks are listed most urgent first from their stored score"""
+    now = datetime.utcnow()
+    ids = {}
+    for name, payload in {
+        "overdue": {"priority": 1, "due_date": (now - timedelta(days=1)).isoformat()},
+        "soon": {"priority": 1, "due_date": (now + timedelta(hours=6)).isoformat()},
+        "urgent": {"priority": 3},
+        "later": {"priority": 0, "due_date": (now + timedelta(days=60)).isoformat()},
+        "done": {"priority": 3, "due_date": now.isoformat()},
+    }.items():
+        ids[name] = client.post("/api/v1/tasks/", json={"title": name, **payload}).json()["id"]
+    done = client.post(f"/api/v1/tasks/{ids['done']}/complete").json()
+    assert done["ai_priority_score"] is None
+
+    response = client.get("/api/v1/tasks/", params={"order": "ai_priority"})
+    assert response.status_code == 200
+    tasks = response.json()
+    expected = ("overdue", "soon", "urgent", "later", "done")
+    assert [t["id"] for t in tasks] == [ids[name] for name in expected]
+    scores = [t["ai_priority_score"] for t in tasks[:-1]]
+    assert scores == sorted(scores, reverse=True)
+
+    # Raising the priority rescores the task right away
+    client.put(f"/api/v1/tasks/{ids['later']}", json={"priority": 3})
+    tasks = client.get("/api/v1/tasks/", params={"order": "ai_priority"}).json()
+    order = [t["id"] for t in tasks]
+    assert order.index(ids["later"]) < order.index(ids["urgent"])
+
+
+def test_rescore_keeps_updated_at(db_session):
+    """Test that periodic rescoring ages stored scores without touching updated_at"""
+    from app.models.models import Task
+    from app.services.priority_service import PriorityService
+
+    idle_since = datetime(2020, 1, 1)
+    db_session.add_all(
+        [
+            Task(id="idle", title="Idle", priority=0, updated_at=idle_since, ai_priority_score=0.0),
+            Task(id="done", title="Done", completed=True, updated_at=idle_since),
+        ]
+    )
+    asyncio.run(db_session.commit())
+
+    assert asyncio.run(PriorityService().rescore(db_session)) == 1
+    db_session.expire_all()
+    idle = asyncio.run(db_session.get(Task, "idle"))
+    assert idle.ai_priority_score > 0.19  # Long idle: close to the full staleness weight
+    assert idle.updated_at == idle_since
+    assert asyncio.run(db_session.get(Task, "done")).ai_priority_score is None
+
+    # Scores that didn't move are not rewritten
+    assert asyncio.run(PriorityService().rescore(db_session)) == 0
+
+
+def test_list_tasks_invalid_cursor(client):
+    """Test that a malformed cursor is rejected"""
+    response = client.get("/api/v1/tasks/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_bulk_create_tasks(client):
+    """Test bulk creation reports invalid items without failing the batch"""
+    response = client.post(
+        "/api/v1/tasks/bulk",
+        json={
+            "items": [
+                {"title": "Bulk 1", "priority": 1},
+                {"title": "", "priority": 1},
+                {"title": "Bulk 3", "priority": 9},
+                {"title": "Bulk 4", "tags": ["a"]},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["created"] == 2
+    assert data["failed"] == 2
+    results = data["results"]
+    assert [r["index"] for r in results] == [0, 1, 2, 3]
+    assert results[0]["id"] and results[0]["error"] is None
+    assert results[1]["id"] is None and "title" in results[1]["error"]
+    assert results[2]["id"] is None and "priority" in results[2]["error"]
+
+    task = client.get(f"/api/v1/tasks/{results[3]['id']}").json()
+    assert task["title"] == "Bulk 4"
+    assert task["tags"] == ["a"]
+
+
+def test_export_tasks(client, monkeypatch):
+    """Test NDJSON export streams every task across several pages"""
+    import json
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    client.post(
+        "/api/v1/tasks/bulk",
+        json={"items": [{"title": f"Export {i}"} for i in range(5)]},
+    )
+
+    response = client.get("/api/v1/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(task["title"] for task in lines) == [f"Export {i}" for i in range(5)]
+    assert len({task["id"] for task in lines}) == 5